@@ -6,7 +6,7 @@ from sqlalchemy import pool
 from alembic import context
 
 from app.models import *  # Importar todos los modelos
-from app.database import Base
+from app.database import Base, get_db_url
 
 # Cargar variables de entorno
 load_dotenv()
@@ -15,9 +15,10 @@ load_dotenv()
 # access to the values within the .ini file in use.
 config = context.config
 
-# URL de la base de datos
-db_url = f"postgresql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
-config.set_main_option("sqlalchemy.url", db_url)
+# URL de la base de datos, con la misma configuración que la aplicación
+# (incluida la contraseña en DB_PASSWORD_FILE). '%' se escapa para configparser
+db_url = get_db_url()
+config.set_main_option("sqlalchemy.url", db_url.replace("%", "%%"))
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
@@ -73,7 +74,9 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata,
+            # SQLite no admite la mayoría de ALTER TABLE: Alembic recrea la tabla
+            render_as_batch=connection.dialect.name == "sqlite"
         )
 
         with context.begin_transaction():
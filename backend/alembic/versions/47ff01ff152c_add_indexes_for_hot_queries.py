@@ -0,0 +1,75 @@
+"""add indexes for hot queries
+
+Revision ID: 47ff01ff152c
+Revises: fbf1aa575a28
+Create Date: 2026-10-18 10:12:41.204318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '47ff01ff152c'
+down_revision: Union[str, None] = 'fbf1aa575a28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (nombre, tabla, columnas, opciones)
+INDICES = [
+    ('ix_resultados_mesa_partida', 'resultados', ['mesa_id', 'partida'], {}),
+    ('ix_resultados_pareja_partida', 'resultados', ['pareja_id', 'partida'],
+     {'postgresql_include': ['pg', 'pp', 'rt', 'mg']}),
+    ('ix_mesas_campeonato_partida', 'mesas', ['campeonato_id', 'partida', 'id'], {}),
+    ('ix_parejas_campeonato_activa', 'parejas', ['campeonato_id', 'activa'], {}),
+    ('ix_jugadores_pareja_id', 'jugadores', ['pareja_id'], {}),
+]
+
+RESTRICCION_UNICA = 'uq_resultados_campeonato_partida_pareja'
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+
+    # La restricción única falla si ya hay resultados duplicados; avisar con
+    # un mensaje claro en lugar del error genérico de PostgreSQL
+    duplicados = conn.execute(sa.text("""
+        SELECT campeonato_id, partida, pareja_id, COUNT(*) AS total
+        FROM resultados
+        GROUP BY campeonato_id, partida, pareja_id
+        HAVING COUNT(*) > 1
+        LIMIT 10
+    """)).fetchall()
+    if duplicados:
+        detalle = ", ".join(
+            f"(campeonato={d.campeonato_id}, partida={d.partida}, pareja={d.pareja_id}: {d.total})"
+            for d in duplicados
+        )
+        raise RuntimeError(
+            f"Hay resultados duplicados que impiden crear {RESTRICCION_UNICA}: {detalle}. "
+            "Elimínalos antes de aplicar esta migración."
+        )
+
+    # Las bases de datos creadas con create_all ya tienen estos objetos
+    restricciones = {u['name'] for u in inspector.get_unique_constraints('resultados')}
+    if RESTRICCION_UNICA not in restricciones:
+        op.create_unique_constraint(
+            RESTRICCION_UNICA, 'resultados', ['campeonato_id', 'partida', 'pareja_id']
+        )
+
+    for nombre, tabla, columnas, opciones in INDICES:
+        op.create_index(nombre, tabla, columnas, if_not_exists=True, **opciones)
+
+    # Actualizar las estadísticas para que el planificador use los índices nuevos
+    for tabla in ('resultados', 'mesas', 'parejas', 'jugadores'):
+        op.execute(f"ANALYZE {tabla}")
+
+
+def downgrade() -> None:
+    for nombre, tabla, _, _ in reversed(INDICES):
+        op.drop_index(nombre, table_name=tabla, if_exists=True)
+    op.drop_constraint(RESTRICCION_UNICA, 'resultados', type_='unique')
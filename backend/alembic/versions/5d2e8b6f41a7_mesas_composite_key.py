@@ -0,0 +1,107 @@
+"""mesas composite key
+
+Revision ID: 5d2e8b6f41a7
+Revises: c3a91d7e5b20
+Create Date: 2026-10-18 18:05:37.512944
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2e8b6f41a7'
+down_revision: Union[str, None] = 'c3a91d7e5b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# SQLite no guarda el nombre de la clave primaria de create_all: el lote que
+# recrea la tabla le da el mismo que tiene en PostgreSQL para poder quitarla
+NOMBRES_SQLITE = {"pk": "%(table_name)s_pkey"}
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    # Las bases de datos creadas con create_all ya tienen la clave nueva
+    if 'numero' in {c['name'] for c in inspector.get_columns('mesas')}:
+        return
+
+    # La clave primaria cubre las búsquedas por (campeonato_id, partida)
+    if 'ix_mesas_campeonato_partida' in {i['name'] for i in inspector.get_indexes('mesas')}:
+        op.drop_index('ix_mesas_campeonato_partida', table_name='mesas')
+
+    # Una mesa sin campeonato o partida no se puede consultar
+    op.execute("DELETE FROM mesas WHERE campeonato_id IS NULL OR partida IS NULL")
+
+    # El id pasa a ser el número de mesa dentro de la partida, sin secuencia
+    nombre_pk = inspector.get_pk_constraint('mesas')['name'] or 'mesas_pkey'
+    with op.batch_alter_table('mesas', naming_convention=NOMBRES_SQLITE) as batch_op:
+        batch_op.drop_constraint(nombre_pk, type_='primary')
+        batch_op.alter_column('id', new_column_name='numero', existing_type=sa.Integer(), server_default=None)
+        batch_op.alter_column('campeonato_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.alter_column('partida', existing_type=sa.Integer(), nullable=False)
+    # Lote aparte: al recrear la tabla en SQLite solo se copian las restricciones
+    # cuyas columnas ya tenían ese nombre al empezar el lote
+    with op.batch_alter_table('mesas') as batch_op:
+        batch_op.create_primary_key('mesas_pkey', ['campeonato_id', 'partida', 'numero'])
+    if bind.dialect.name == 'postgresql':
+        op.execute("DROP SEQUENCE IF EXISTS mesas_id_seq")
+
+    # Recuperar las mesas de las partidas anteriores, que se borraban al crear
+    # cada partida, desde los resultados. La pareja 1 es la del primer resultado
+    # de la mesa, como se guardan en POST /resultados, y la pareja 2 la del siguiente.
+    op.execute("""
+        INSERT INTO mesas (campeonato_id, partida, numero, pareja1_id, pareja2_id)
+        SELECT g.campeonato_id, g.partida, g.mesa_id,
+               (SELECT r1.pareja_id FROM resultados r1 WHERE r1.id = g.primero),
+               (SELECT r2.pareja_id FROM resultados r2
+                WHERE r2.campeonato_id = g.campeonato_id
+                  AND r2.partida = g.partida
+                  AND r2.mesa_id = g.mesa_id
+                  AND r2.id > g.primero
+                ORDER BY r2.id
+                LIMIT 1)
+        FROM (
+            SELECT r.campeonato_id, r.partida, r.mesa_id, MIN(r.id) AS primero
+            FROM resultados r
+            WHERE r.campeonato_id IS NOT NULL
+              AND r.partida IS NOT NULL
+              AND r.mesa_id IS NOT NULL
+            GROUP BY r.campeonato_id, r.partida, r.mesa_id
+        ) g
+        WHERE NOT EXISTS (
+            SELECT 1 FROM mesas m
+            WHERE m.campeonato_id = g.campeonato_id
+              AND m.partida = g.partida
+              AND m.numero = g.mesa_id
+        )
+    """)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+
+    # El esquema anterior solo guardaba las mesas de la partida en curso
+    op.execute("""
+        DELETE FROM mesas
+        WHERE partida <> (
+            SELECT c.partida_actual FROM campeonatos c WHERE c.id = mesas.campeonato_id
+        )
+    """)
+    nombre_pk = sa.inspect(bind).get_pk_constraint('mesas')['name'] or 'mesas_pkey'
+    with op.batch_alter_table('mesas', naming_convention=NOMBRES_SQLITE) as batch_op:
+        batch_op.drop_constraint(nombre_pk, type_='primary')
+        batch_op.alter_column('campeonato_id', existing_type=sa.Integer(), nullable=True)
+        batch_op.alter_column('partida', existing_type=sa.Integer(), nullable=True)
+        batch_op.alter_column('numero', new_column_name='id', existing_type=sa.Integer())
+    with op.batch_alter_table('mesas') as batch_op:
+        batch_op.create_primary_key('mesas_pkey', ['id'])
+    if bind.dialect.name == 'postgresql':
+        op.execute("CREATE SEQUENCE mesas_id_seq OWNED BY mesas.id")
+        op.execute("SELECT setval('mesas_id_seq', COALESCE((SELECT MAX(id) FROM mesas), 0) + 1, false)")
+        op.alter_column('mesas', 'id', server_default=sa.text("nextval('mesas_id_seq'::regclass)"))
+    op.create_index('ix_mesas_campeonato_partida', 'mesas', ['campeonato_id', 'partida', 'id'])
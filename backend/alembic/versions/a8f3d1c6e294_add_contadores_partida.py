@@ -0,0 +1,62 @@
+"""add contadores_partida
+
+Revision ID: a8f3d1c6e294
+Revises: 5d2e8b6f41a7
+Create Date: 2026-10-18 21:12:48.604193
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8f3d1c6e294'
+down_revision: Union[str, None] = '5d2e8b6f41a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+
+    # create_all puede haber creado ya la tabla sin añadir la columna a mesas
+    # (no modifica las tablas existentes): cada parte se comprueba por
+    # separado y el relleno se hace siempre
+    if 'con_resultado' not in {c['name'] for c in inspector.get_columns('mesas')}:
+        op.add_column('mesas', sa.Column('con_resultado', sa.Boolean(), nullable=False, server_default=sa.false()))
+    if 'contadores_partida' not in inspector.get_table_names():
+        op.create_table(
+            'contadores_partida',
+            sa.Column('campeonato_id', sa.Integer(), nullable=False),
+            sa.Column('partida', sa.Integer(), nullable=False),
+            sa.Column('mesas', sa.Integer(), nullable=False),
+            sa.Column('mesas_con_resultado', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['campeonato_id'], ['campeonatos.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('campeonato_id', 'partida')
+        )
+
+    # Marcar las mesas que ya tienen resultados y contar las de cada partida
+    op.execute("""
+        UPDATE mesas SET con_resultado = TRUE
+        WHERE EXISTS (
+            SELECT 1 FROM resultados r
+            WHERE r.campeonato_id = mesas.campeonato_id
+              AND r.partida = mesas.partida
+              AND r.mesa_id = mesas.numero
+        )
+    """)
+    op.execute("DELETE FROM contadores_partida")
+    op.execute("""
+        INSERT INTO contadores_partida (campeonato_id, partida, mesas, mesas_con_resultado)
+        SELECT campeonato_id, partida, COUNT(*), SUM(CASE WHEN con_resultado THEN 1 ELSE 0 END)
+        FROM mesas
+        GROUP BY campeonato_id, partida
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('contadores_partida')
+    with op.batch_alter_table('mesas') as batch_op:
+        batch_op.drop_column('con_resultado')
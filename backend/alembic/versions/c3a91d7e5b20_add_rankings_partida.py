@@ -0,0 +1,52 @@
+"""add rankings_partida
+
+Revision ID: c3a91d7e5b20
+Revises: 47ff01ff152c
+Create Date: 2026-10-18 16:40:12.381027
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3a91d7e5b20'
+down_revision: Union[str, None] = '47ff01ff152c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Las bases de datos creadas con create_all ya tienen la tabla
+    if 'rankings_partida' in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.create_table(
+        'rankings_partida',
+        sa.Column('campeonato_id', sa.Integer(), nullable=False),
+        sa.Column('partida', sa.Integer(), nullable=False),
+        sa.Column('pareja_id', sa.Integer(), nullable=False),
+        sa.Column('posicion', sa.Integer(), nullable=False),
+        sa.Column('posicion_anterior', sa.Integer(), nullable=True),
+        sa.Column('gb', sa.Boolean(), nullable=False),
+        sa.Column('rt', sa.Integer(), nullable=False),
+        sa.Column('mg', sa.Integer(), nullable=False),
+        sa.Column('pp', sa.Integer(), nullable=False),
+        sa.Column('pg', sa.Integer(), nullable=False),
+        sa.Column('partidas_jugadas', sa.Integer(), nullable=False),
+        sa.Column('ultima_partida', sa.Integer(), nullable=False),
+        sa.Column('orden_sorteo', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['campeonato_id'], ['campeonatos.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['pareja_id'], ['parejas.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('campeonato_id', 'partida', 'pareja_id')
+    )
+    op.create_index('ix_rankings_partida_posicion', 'rankings_partida', ['campeonato_id', 'partida', 'posicion'])
+    # Las partidas ya cerradas se rellenan con `python -m scripts.clasificacion reconstruir`;
+    # hasta entonces el ranking de esas partidas se calcula desde los resultados
+
+
+def downgrade() -> None:
+    op.drop_index('ix_rankings_partida_posicion', table_name='rankings_partida')
+    op.drop_table('rankings_partida')
@@ -0,0 +1,35 @@
+"""add version to campeonato
+
+Revision ID: d2c5a7e91f38
+Revises: a8f3d1c6e294
+Create Date: 2026-10-18 23:05:31.218447
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2c5a7e91f38'
+down_revision: Union[str, None] = 'a8f3d1c6e294'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Las bases de datos creadas con create_all ya tienen la columna
+    columnas = {c['name'] for c in sa.inspect(op.get_bind()).get_columns('campeonatos')}
+    if 'version' in columnas:
+        return
+
+    op.add_column('campeonatos', sa.Column('version', sa.Integer(), nullable=True, server_default='0'))
+    op.execute("UPDATE campeonatos SET version = 0 WHERE version IS NULL")
+    with op.batch_alter_table('campeonatos') as batch_op:
+        batch_op.alter_column('version', existing_type=sa.Integer(), nullable=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('campeonatos') as batch_op:
+        batch_op.drop_column('version')
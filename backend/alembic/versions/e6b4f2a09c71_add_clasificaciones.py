@@ -0,0 +1,47 @@
+"""add clasificaciones
+
+Revision ID: e6b4f2a09c71
+Revises: d2c5a7e91f38
+Create Date: 2026-10-19 10:14:07.552931
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6b4f2a09c71'
+down_revision: Union[str, None] = 'd2c5a7e91f38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Las bases de datos creadas con create_all ya tienen la tabla
+    if 'clasificaciones' in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.create_table(
+        'clasificaciones',
+        sa.Column('pareja_id', sa.Integer(), nullable=False),
+        sa.Column('campeonato_id', sa.Integer(), nullable=False),
+        sa.Column('rt', sa.Integer(), nullable=False),
+        sa.Column('mg', sa.Integer(), nullable=False),
+        sa.Column('pp', sa.Integer(), nullable=False),
+        sa.Column('pg', sa.Integer(), nullable=False),
+        sa.Column('partidas_jugadas', sa.Integer(), nullable=False),
+        sa.Column('ultima_partida', sa.Integer(), nullable=False),
+        sa.Column('orden_sorteo', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['pareja_id'], ['parejas.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['campeonato_id'], ['campeonatos.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('pareja_id')
+    )
+    op.create_index('ix_clasificaciones_campeonato_id', 'clasificaciones', ['campeonato_id'])
+    # Los campeonatos en juego los rellena init_app.py después de las migraciones
+
+
+def downgrade() -> None:
+    op.drop_index('ix_clasificaciones_campeonato_id', table_name='clasificaciones')
+    op.drop_table('clasificaciones')
@@ -0,0 +1,212 @@
+"""
+Caché en memoria de los datos del campeonato.
+
+Casi todas las rutas empiezan leyendo el campeonato (su `pm`, la partida
+actual o la versión para el ETag) y los clientes consultan
+/campeonatos/actual continuamente. La caché guarda una copia inmutable
+(DatosCampeonato) por id y otra para el campeonato activo, con caducidad
+(CACHE_TTL segundos) y un máximo de entradas (CACHE_MAXIMO) que expulsa las
+menos usadas.
+
+Las escrituras llaman a invalidar_campeonato dentro de su transacción (lo hace
+incrementar_version, y las rutas que cambian el campeonato sin incrementar la
+versión lo llaman directamente). Las claves se borran al hacer commit; si la
+transacción se deshace no se borra nada. Una lectura que empezó antes de la
+invalidación no guarda su resultado, para no volver a dejar en la caché datos
+ya sustituidos.
+
+Cada worker tiene su propia caché. La invalidación se publica además como
+evento INVALIDAR_CACHE: en PostgreSQL, con pg_notify en la misma transacción,
+que los demás workers reciben por su conexión en LISTEN al hacer commit
+(services/eventos.py). Si esa conexión se pierde, al recuperarla se vacía la
+caché entera; mientras tanto, las entradas caducan a los CACHE_TTL segundos.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from datetime import date
+from typing import Any, Callable, Hashable, Optional
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from .models import Campeonato
+from .services.eventos import INVALIDAR_CACHE, difusor, publicar_evento
+
+TTL = float(os.getenv("CACHE_TTL", "10"))
+MAXIMO = int(os.getenv("CACHE_MAXIMO", "64"))
+
+# Clave del campeonato activo
+ACTUAL = "actual"
+
+_AUSENTE = object()
+
+class CacheTTL:
+    """Diccionario LRU con caducidad, seguro entre hilos, con contadores de uso"""
+    def __init__(self, maximo: int = MAXIMO, ttl: float = TTL):
+        self.maximo = maximo
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entradas: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        # Cambia con cada invalidación: una carga que empezó antes no se guarda
+        self._generacion = 0
+        self.reiniciar_estadisticas()
+
+    def reiniciar_estadisticas(self):
+        self.aciertos = 0
+        self.fallos = 0
+        self.caducadas = 0
+        self.expulsadas = 0
+        self.invalidadas = 0
+        self.desde = time.time()
+
+    def obtener(self, clave: Hashable, defecto: Any = _AUSENTE) -> Any:
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                valor, caduca = entrada
+                if caduca > time.monotonic():
+                    self._entradas.move_to_end(clave)
+                    self.aciertos += 1
+                    return valor
+                del self._entradas[clave]
+                self.caducadas += 1
+            self.fallos += 1
+            return defecto
+
+    def guardar(self, clave: Hashable, valor: Any, generacion: Optional[int] = None):
+        """Guarda el valor, salvo si ha habido invalidaciones desde `generacion`"""
+        with self._lock:
+            if generacion is not None and generacion != self._generacion:
+                return
+            self._entradas[clave] = (valor, time.monotonic() + self.ttl)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.maximo:
+                self._entradas.popitem(last=False)
+                self.expulsadas += 1
+
+    def obtener_o_cargar(self, clave: Hashable, cargar: Callable[[], Any]) -> Any:
+        valor = self.obtener(clave)
+        if valor is not _AUSENTE:
+            return valor
+        generacion = self._generacion
+        valor = cargar()
+        self.guardar(clave, valor, generacion)
+        return valor
+
+    def invalidar(self, *claves: Hashable):
+        with self._lock:
+            self._generacion += 1
+            for clave in claves:
+                if self._entradas.pop(clave, None) is not None:
+                    self.invalidadas += 1
+
+    def limpiar(self):
+        with self._lock:
+            self._generacion += 1
+            self.invalidadas += len(self._entradas)
+            self._entradas.clear()
+
+    def estadisticas(self, reiniciar: bool = False) -> dict:
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            resumen = {
+                "entradas": len(self._entradas),
+                "maximo": self.maximo,
+                "ttl_s": self.ttl,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": round(self.aciertos / consultas, 3) if consultas else 0.0,
+                "caducadas": self.caducadas,
+                "expulsadas": self.expulsadas,
+                "invalidadas": self.invalidadas,
+                "desde": self.desde
+            }
+            if reiniciar:
+                self.reiniciar_estadisticas()
+            return resumen
+
+@dataclass(frozen=True)
+class DatosCampeonato:
+    """
+    Copia de las columnas de un campeonato, independiente de la sesión. Tiene
+    los mismos atributos que el modelo, así que sirve para las funciones que
+    solo leen el campeonato (calcular_resultados_mesa, consulta_ranking_historico...)
+    """
+    id: int
+    nombre: str
+    fecha_inicio: date
+    dias_duracion: int
+    numero_partidas: int
+    gb: bool
+    gb_valor: Optional[int]
+    activo: bool
+    partida_actual: int
+    pm: int
+    logo: Optional[str]
+    version: int
+
+    @classmethod
+    def desde_modelo(cls, campeonato: Campeonato) -> "DatosCampeonato":
+        return cls(**{campo: getattr(campeonato, campo) for campo in cls.__dataclass_fields__})
+
+    def a_diccionario(self) -> dict:
+        return asdict(self)
+
+cache_campeonatos = CacheTTL()
+
+def _clave(campeonato_id: int) -> tuple:
+    return ("campeonato", campeonato_id)
+
+def _con_cambios_pendientes(db: Session) -> bool:
+    # La transacción ya ha modificado campeonatos: sus lecturas aún no son de
+    # nadie más y no deben guardarse
+    return bool(db.info.get("cache_invalidar"))
+
+def _datos(fila: Optional[Campeonato]) -> Optional[DatosCampeonato]:
+    return DatosCampeonato.desde_modelo(fila) if fila is not None else None
+
+def leer_campeonato(db: Session, campeonato_id: int) -> Optional[DatosCampeonato]:
+    """Datos del campeonato o None si no existe"""
+    def cargar():
+        return _datos(db.query(Campeonato).filter(Campeonato.id == campeonato_id).first())
+    if _con_cambios_pendientes(db):
+        return cargar()
+    return cache_campeonatos.obtener_o_cargar(_clave(campeonato_id), cargar)
+
+def leer_campeonato_actual(db: Session) -> Optional[DatosCampeonato]:
+    """Datos del campeonato activo o None si no hay ninguno"""
+    def cargar():
+        return _datos(db.query(Campeonato).filter(Campeonato.activo == True).first())
+    if _con_cambios_pendientes(db):
+        return cargar()
+    return cache_campeonatos.obtener_o_cargar(ACTUAL, cargar)
+
+def invalidar_campeonato(db: Session, campeonato_id: Optional[int]):
+    """
+    Borra de la caché el campeonato (y el campeonato activo, que puede ser el
+    mismo) cuando la transacción de `db` haga commit, en este worker y en los demás
+    """
+    pendientes = db.info.setdefault("cache_invalidar", set())
+    if campeonato_id not in pendientes:
+        pendientes.add(campeonato_id)
+        publicar_evento(db, INVALIDAR_CACHE, campeonato_id)
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_pendientes(session):
+    pendientes = session.info.pop("cache_invalidar", None)
+    if pendientes:
+        cache_campeonatos.invalidar(ACTUAL, *(_clave(c) for c in pendientes if c is not None))
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_pendientes(session):
+    session.info.pop("cache_invalidar", None)
+
+def _invalidar_aviso(campeonato_id: Optional[int]):
+    """Aviso INVALIDAR_CACHE recibido de otro worker (o de este mismo)"""
+    if campeonato_id is None:
+        cache_campeonatos.limpiar()
+    else:
+        cache_campeonatos.invalidar(ACTUAL, _clave(campeonato_id))
+
+difusor.al_invalidar(_invalidar_aviso)
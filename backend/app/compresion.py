@@ -0,0 +1,118 @@
+"""
+Compresión negociada (brotli o gzip) de las respuestas JSON y de texto.
+
+Solo se comprimen las respuestas de un único bloque a partir de
+COMPRESION_TAMANO_MINIMO bytes. Las respuestas en streaming (exportaciones,
+eventos SSE) y los ficheros estáticos se envían tal cual: comprimir un flujo
+por bloques retrasaría los eventos, y las imágenes ya van comprimidas.
+Brotli se usa si el paquete está instalado y el cliente lo acepta.
+
+Los cuerpos a partir de COMPRESION_TAMANO_HILO bytes se comprimen en el
+pool de hilos para no bloquear el bucle de eventos; los pequeños tardan
+menos en comprimirse que en pasar a otro hilo y se comprimen en línea.
+"""
+import gzip
+import os
+from typing import Optional
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli es opcional
+    brotli = None
+
+TAMANO_MINIMO = int(os.getenv("COMPRESION_TAMANO_MINIMO", "1024"))
+TAMANO_HILO = int(os.getenv("COMPRESION_TAMANO_HILO", str(16 * 1024)))
+
+# Niveles rápidos: la respuesta se comprime en cada petición
+NIVEL_GZIP = 6
+CALIDAD_BROTLI = 4
+
+TIPOS_COMPRIMIBLES = ("application/json", "text/html", "text/plain", "text/css", "application/javascript")
+
+def elegir_codificacion(accept_encoding: str) -> Optional[str]:
+    """Codificación preferida de las que acepta el cliente ('br', 'gzip' o None)"""
+    aceptadas = {}
+    for parte in accept_encoding.lower().split(","):
+        nombre, _, parametros = parte.strip().partition(";")
+        calidad = 1.0
+        if parametros.strip().startswith("q="):
+            try:
+                calidad = float(parametros.strip()[2:])
+            except ValueError:
+                calidad = 0.0
+        aceptadas[nombre.strip()] = calidad
+    if brotli is not None and aceptadas.get("br", 0) > 0:
+        return "br"
+    if aceptadas.get("gzip", aceptadas.get("*", 0)) > 0:
+        return "gzip"
+    return None
+
+def comprimir(cuerpo: bytes, codificacion: str) -> bytes:
+    if codificacion == "br":
+        return brotli.compress(cuerpo, quality=CALIDAD_BROTLI)
+    return gzip.compress(cuerpo, compresslevel=NIVEL_GZIP)
+
+class Compresion:
+    """Middleware ASGI que comprime las respuestas según Accept-Encoding"""
+    def __init__(self, app: ASGIApp, tamano_minimo: int = TAMANO_MINIMO, tamano_hilo: int = TAMANO_HILO):
+        self.app = app
+        self.tamano_minimo = tamano_minimo
+        self.tamano_hilo = tamano_hilo
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        codificacion = elegir_codificacion(Headers(scope=scope).get("accept-encoding", ""))
+        if codificacion is None:
+            await self.app(scope, receive, send)
+            return
+
+        inicio: Optional[Message] = None
+        directo = False
+
+        async def enviar(message: Message):
+            nonlocal inicio, directo
+            if message["type"] == "http.response.start":
+                cabeceras = Headers(raw=message["headers"])
+                tipo = cabeceras.get("content-type", "")
+                if "content-encoding" in cabeceras or not tipo.startswith(TIPOS_COMPRIMIBLES):
+                    directo = True
+                    await send(message)
+                else:
+                    # Se retiene hasta saber si el cuerpo llega en un solo bloque
+                    inicio = message
+                return
+            if directo or message["type"] != "http.response.body":
+                await send(message)
+                return
+            if inicio is None:
+                await send(message)
+                return
+
+            cuerpo = message.get("body", b"")
+            respuesta_inicio, inicio = inicio, None
+            if message.get("more_body", False):
+                # Streaming: se envía sin comprimir
+                directo = True
+                await send(respuesta_inicio)
+                await send(message)
+                return
+
+            cabeceras = MutableHeaders(raw=respuesta_inicio["headers"])
+            cabeceras.add_vary_header("Accept-Encoding")
+            if len(cuerpo) >= self.tamano_minimo:
+                if len(cuerpo) >= self.tamano_hilo:
+                    cuerpo = await run_in_threadpool(comprimir, cuerpo, codificacion)
+                else:
+                    cuerpo = comprimir(cuerpo, codificacion)
+                cabeceras["Content-Encoding"] = codificacion
+                cabeceras["Content-Length"] = str(len(cuerpo))
+                message = {**message, "body": cuerpo}
+            await send(respuesta_inicio)
+            await send(message)
+
+        await self.app(scope, receive, enviar)
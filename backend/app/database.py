@@ -1,13 +1,50 @@
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, text, exc, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 from dotenv import load_dotenv
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
 import os
 import logging
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
+# Directorio backend, donde se guardan por defecto las bases de datos SQLite
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def get_db_backend() -> str:
+    """
+    Motor de base de datos elegido con DB_BACKEND: "postgresql" (por defecto)
+    o "sqlite", un fichero local sin servidor para los torneos en un portátil
+    """
+    backend = os.getenv("DB_BACKEND", "postgresql").strip().lower()
+    if backend in ("postgresql", "postgres"):
+        return "postgresql"
+    if backend == "sqlite":
+        return "sqlite"
+    raise ValueError(f"DB_BACKEND no válido: {backend} (use postgresql o sqlite)")
+
+def get_sqlite_path(db_name: str) -> str:
+    """Fichero de la base de datos SQLite: DB_SQLITE_DIR/<db_name>.sqlite3"""
+    directorio = os.getenv("DB_SQLITE_DIR") or os.path.join(BASE_DIR, "data")
+    os.makedirs(directorio, exist_ok=True)
+    return os.path.join(directorio, f"{db_name}.sqlite3")
+
 def get_db_url(db_name: str = None):
+    if get_db_backend() == "sqlite":
+        DB_NAME = db_name or os.getenv("DB_NAME")
+        if not DB_NAME:
+            raise ValueError("Falta configuración de base de datos: DB_NAME")
+        ruta = get_sqlite_path(DB_NAME)
+        logger.info(f"Configuración de BD: SQLite en {ruta}")
+        return f"sqlite:///{ruta}"
+
     # Leer valores de las variables de entorno
     DB_USER = os.getenv("DB_USER")
     DB_HOST = os.getenv("DB_HOST")
@@ -45,13 +82,332 @@ def get_db_url(db_name: str = None):
     # Construir y devolver la URL de conexión
     return f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
+def get_async_db_url(db_name: str = None):
+    """URL de conexión para el engine asíncrono (driver asyncpg o aiosqlite)"""
+    url = get_db_url(db_name)
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+
+def get_pool_config():
+    """
+    Configuración del pool de conexiones leída de las variables de entorno
+    (.env.dev / .env.prod). Los valores por defecto son los de SQLAlchemy,
+    salvo recycle y pre-ping, que protegen frente a conexiones cerradas por
+    el servidor tras periodos sin actividad entre partidas.
+    """
+    def entero(nombre, defecto):
+        valor = os.getenv(nombre)
+        return int(valor) if valor not in (None, "") else defecto
+
+    return {
+        "pool_size": entero("DB_POOL_SIZE", 5),
+        "max_overflow": entero("DB_MAX_OVERFLOW", 10),
+        "pool_timeout": entero("DB_POOL_TIMEOUT", 30),
+        "pool_recycle": entero("DB_POOL_RECYCLE", 1800),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes", "si", "sí")
+    }
+
+# Pragmas de cada conexión SQLite. WAL deja leer mientras otra conexión escribe
+# y, con synchronous=NORMAL, el commit no espera a sincronizar el disco en cada
+# transacción (solo en los checkpoints); busy_timeout hace esperar al escritor
+# en vez de fallar con "database is locked". La caché es pequeña a propósito:
+# las bases de datos de un torneo caben de sobra y los portátiles tienen poca
+# memoria
+PRAGMAS_SQLITE = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "foreign_keys": "ON",
+    "busy_timeout": int(os.getenv("DB_SQLITE_BUSY_TIMEOUT", "5000")),
+    "cache_size": -8192,  # KiB: 8 MiB por conexión
+    "temp_store": "MEMORY",
+    "mmap_size": 64 * 1024 * 1024,
+}
+
+def _configurar_sqlite(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for nombre, valor in PRAGMAS_SQLITE.items():
+            cursor.execute(f"PRAGMA {nombre}={valor}")
+    finally:
+        cursor.close()
+
+def _opciones_engine(url: str, asincrono: bool) -> dict:
+    """Argumentos de create_engine según el motor de la URL"""
+    pool_config = get_pool_config()
+    if url.startswith("sqlite"):
+        # Con un fichero local no hay conexiones que caduquen ni que comprobar
+        pool_config.update(pool_recycle=-1, pool_pre_ping=False)
+        connect_args = {} if asincrono else {"check_same_thread": False}
+    else:
+        # La codificación se envía al abrir la conexión, sin un SET adicional
+        # en cada una (asyncpg ya usa siempre UTF-8)
+        connect_args = {} if asincrono else {"client_encoding": "utf8"}
+    return {
+        "echo": False,
+        "poolclass": PoolMedidoAsync if asincrono else PoolMedido,
+        "connect_args": connect_args,
+        **pool_config
+    }
+
+class EstadisticasPool:
+    """
+    Contadores de uso de un pool: tiempo de espera para obtener una conexión,
+    conexiones abiertas por encima de pool_size y esperas que agotan el timeout
+    """
+    # Esperas a partir de las cuales se considera que el pool se ha quedado corto
+    UMBRAL_ESPERA = 0.01
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        with self._lock:
+            self.checkouts = 0
+            self.espera_total = 0.0
+            self.espera_maxima = 0.0
+            self.esperas_largas = 0
+            self.desbordamientos = 0
+            self.timeouts = 0
+            self.desde = time.time()
+
+    def registrar_checkout(self, espera: float, desbordamiento: bool):
+        with self._lock:
+            self.checkouts += 1
+            self.espera_total += espera
+            self.espera_maxima = max(self.espera_maxima, espera)
+            if espera >= self.UMBRAL_ESPERA:
+                self.esperas_largas += 1
+            if desbordamiento:
+                self.desbordamientos += 1
+
+    def registrar_timeout(self, espera: float):
+        with self._lock:
+            self.timeouts += 1
+            self.espera_total += espera
+            self.espera_maxima = max(self.espera_maxima, espera)
+
+    def resumen(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "espera_media_ms": round(self.espera_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "espera_maxima_ms": round(self.espera_maxima * 1000, 3),
+                "esperas_largas": self.esperas_largas,
+                "desbordamientos": self.desbordamientos,
+                "timeouts": self.timeouts,
+                "desde": self.desde
+            }
+
+class _PoolMedido:
+    """
+    Mide el tiempo de cada checkout del pool. Las estadísticas son un atributo
+    de clase porque SQLAlchemy crea una instancia nueva del pool al recrearlo
+    (dispose, conexiones invalidadas).
+    """
+    estadisticas: EstadisticasPool
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        overflow_previo = self.overflow()
+        try:
+            conexion = super()._do_get()
+        except exc.TimeoutError:
+            self.estadisticas.registrar_timeout(time.perf_counter() - inicio)
+            raise
+        # overflow() crece al abrir una conexión; es desbordamiento si supera pool_size
+        desbordamiento = self.overflow() > max(overflow_previo, 0)
+        self.estadisticas.registrar_checkout(time.perf_counter() - inicio, desbordamiento)
+        return conexion
+
+class PoolMedido(_PoolMedido, QueuePool):
+    estadisticas = EstadisticasPool()
+
+class PoolMedidoAsync(_PoolMedido, AsyncAdaptedQueuePool):
+    estadisticas = EstadisticasPool()
+
+def _estado_pool(motor, estadisticas: EstadisticasPool) -> dict:
+    pool = motor.pool
+    return {
+        "tamano": pool.size(),
+        "en_uso": pool.checkedout(),
+        "libres": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        **estadisticas.resumen()
+    }
+
+def get_pool_stats(reiniciar: bool = False) -> dict:
+    """Estado actual y contadores de los pools síncrono y asíncrono"""
+    estado = {"configuracion": get_pool_config()}
+    if engine is not None and isinstance(engine.pool, PoolMedido):
+        estado["sync"] = _estado_pool(engine, PoolMedido.estadisticas)
+    if async_engine is not None and isinstance(async_engine.pool, PoolMedidoAsync):
+        estado["async"] = _estado_pool(async_engine, PoolMedidoAsync.estadisticas)
+    if reiniciar:
+        PoolMedido.estadisticas.reiniciar()
+        PoolMedidoAsync.estadisticas.reiniciar()
+    return estado
+
+# --- Perfil de consultas por petición ---------------------------------------
+#
+# Los eventos de SQLAlchemy sobre Engine (todos los engines, también el
+# síncrono que hay debajo del asíncrono) cuentan y miden cada sentencia y la
+# suman al perfil de la petición en curso, guardado en una contextvar que se
+# propaga al pool de hilos de las rutas def. El middleware de métricas
+# (metricas.MedirPeticiones) abre el perfil de cada petición y, al terminar,
+# llama a revisar_perfil.
+
+def _entero_env(nombre: str, defecto: int) -> int:
+    valor = os.getenv(nombre)
+    return int(valor) if valor not in (None, "") else defecto
+
+# Presupuesto por petición: por encima se registra un informe de consultas lentas
+PERFIL_MAX_CONSULTAS = _entero_env("PERFIL_MAX_CONSULTAS", 30)
+PERFIL_MAX_MS = _entero_env("PERFIL_MAX_MS", 500)
+
+# Modo desarrollo: avisar de sentencias idénticas repetidas (probable N+1)
+PERFIL_N1 = os.getenv(
+    "PERFIL_N1", "false" if os.getenv("ENV", "development").lower() == "production" else "true"
+).lower() in ("1", "true", "yes", "si", "sí")
+PERFIL_N1_UMBRAL = _entero_env("PERFIL_N1_UMBRAL", 5)
+
+class PerfilConsultas:
+    """Número, tiempo y sentencias de las consultas de una petición"""
+    def __init__(self):
+        self.consultas = 0
+        self.tiempo = 0.0
+        # Sentencia SQL -> [veces, tiempo total]. Las que solo cambian en los
+        # parámetros comparten la misma sentencia
+        self.sentencias: Dict[str, List[float]] = {}
+
+    def registrar(self, sentencia: str, duracion: float):
+        self.consultas += 1
+        self.tiempo += duracion
+        datos = self.sentencias.setdefault(sentencia, [0, 0.0])
+        datos[0] += 1
+        datos[1] += duracion
+
+    def repetidas(self, umbral: int) -> List[Tuple[str, int, float]]:
+        """Sentencias ejecutadas al menos `umbral` veces, de más a menos"""
+        return sorted(
+            ((sentencia, int(veces), tiempo) for sentencia, (veces, tiempo) in self.sentencias.items() if veces >= umbral),
+            key=lambda s: -s[1]
+        )
+
+    def informe(self, maximo: int = 5) -> str:
+        """Resumen con las sentencias que más tiempo suman"""
+        lineas = [f"{self.consultas} consultas, {self.tiempo * 1000:.1f} ms en la base de datos"]
+        lentas = sorted(self.sentencias.items(), key=lambda s: -s[1][1])[:maximo]
+        for sentencia, (veces, tiempo) in lentas:
+            lineas.append(f"  {tiempo * 1000:8.1f} ms  x{int(veces):<4} {_resumir(sentencia)}")
+        return "\n".join(lineas)
+
+def _resumir(sentencia: str, longitud: int = 200) -> str:
+    sentencia = " ".join(sentencia.split())
+    return sentencia if len(sentencia) <= longitud else sentencia[:longitud] + "..."
+
+_perfil: ContextVar[Optional[PerfilConsultas]] = ContextVar("perfil_consultas", default=None)
+
+# Perfiles abiertos con contar_consultas, que reciben todas las sentencias
+_perfiles_globales: List[PerfilConsultas] = []
+_lock_perfiles = threading.Lock()
+
+def iniciar_perfil() -> Tuple[PerfilConsultas, object]:
+    """Abre el perfil de la petición en curso; devuelve el perfil y el token"""
+    perfil = PerfilConsultas()
+    return perfil, _perfil.set(perfil)
+
+def terminar_perfil(token):
+    _perfil.reset(token)
+
+def perfil_actual() -> Optional[PerfilConsultas]:
+    return _perfil.get()
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _antes_de_consulta(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("inicio_consulta", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _despues_de_consulta(conn, cursor, statement, parameters, context, executemany):
+    inicios = conn.info.get("inicio_consulta")
+    if not inicios:
+        return
+    duracion = time.perf_counter() - inicios.pop()
+    perfil = _perfil.get()
+    if perfil is not None:
+        perfil.registrar(statement, duracion)
+    if _perfiles_globales:
+        with _lock_perfiles:
+            for global_ in _perfiles_globales:
+                global_.registrar(statement, duracion)
+
+@event.listens_for(Engine, "handle_error")
+def _error_de_consulta(contexto):
+    # after_cursor_execute no se llama si la consulta falla
+    if contexto.connection is not None:
+        inicios = contexto.connection.info.get("inicio_consulta")
+        if inicios:
+            inicios.pop()
+
+def revisar_perfil(perfil: PerfilConsultas, peticion: str, duracion: Optional[float]):
+    """
+    Registra un informe si la petición supera el presupuesto de consultas o de
+    tiempo (sin comprobar el tiempo si `duracion` es None) y, en modo
+    desarrollo, avisa de las sentencias repetidas
+    """
+    lenta = duracion is not None and duracion * 1000 > PERFIL_MAX_MS
+    if perfil.consultas > PERFIL_MAX_CONSULTAS or lenta:
+        duracion_ms = f"{duracion * 1000:.1f} ms" if duracion is not None else "conexión continua"
+        logger.warning(
+            f"Petición lenta {peticion}: {duracion_ms} "
+            f"(presupuesto {PERFIL_MAX_CONSULTAS} consultas, {PERFIL_MAX_MS} ms)\n{perfil.informe()}"
+        )
+    if PERFIL_N1:
+        for sentencia, veces, tiempo in perfil.repetidas(PERFIL_N1_UMBRAL):
+            logger.warning(
+                f"Posible N+1 en {peticion}: la misma consulta se ejecuta {veces} veces "
+                f"({tiempo * 1000:.1f} ms): {_resumir(sentencia)}"
+            )
+
+@contextmanager
+def contar_consultas():
+    """
+    Cuenta todas las consultas ejecutadas dentro del bloque, en cualquier hilo
+    (p. ej. las de una petición hecha con TestClient):
+
+        with contar_consultas() as perfil:
+            client.get("/mesas", params=...)
+        assert perfil.consultas <= 5, perfil.informe()
+    """
+    perfil = PerfilConsultas()
+    with _lock_perfiles:
+        _perfiles_globales.append(perfil)
+    try:
+        yield perfil
+    finally:
+        with _lock_perfiles:
+            _perfiles_globales.remove(perfil)
+
+@contextmanager
+def maximo_consultas(maximo: int):
+    """Falla con AssertionError si el bloque ejecuta más de `maximo` consultas"""
+    with contar_consultas() as perfil:
+        yield perfil
+    if perfil.consultas > maximo:
+        raise AssertionError(f"Se esperaban como máximo {maximo} consultas:\n{perfil.informe()}")
+
 engine = None
 SessionLocal = None
+async_engine = None
+AsyncSessionLocal = None
 Base = declarative_base()
 
-def init_db(db_name: str):
+def init_db(db_name: str, crear_tablas: bool = True):
     """
-    Inicializa la base de datos y crea las tablas si no existen
+    Inicializa la base de datos y crea las tablas si no existen.
+    Los workers de la API pasan crear_tablas=False: el esquema se prepara
+    una sola vez con init_app.py antes de arrancarlos.
     """
     global engine, SessionLocal
     try:
@@ -61,32 +417,91 @@ def init_db(db_name: str):
         safe_url = DATABASE_URL.replace(DATABASE_URL.split('@')[0], '***')
         logger.info(f"Intentando conectar a la base de datos con URL: {safe_url}")
         
-        # Configurar el engine con soporte UTF-8
-        engine = create_engine(
-            DATABASE_URL,
-            echo=False,
-            connect_args={
-                'client_encoding': 'utf8'
-            }
-        )
+        opciones = _opciones_engine(DATABASE_URL, asincrono=False)
+        logger.info(f"Configuración del pool: {get_pool_config()}")
+        
+        engine = create_engine(DATABASE_URL, **opciones)
+        if engine.dialect.name == "sqlite":
+            event.listen(engine, "connect", _configurar_sqlite)
         SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
         
         # Probar la conexión
         with engine.connect() as conn:
             logger.info("Conexión a la base de datos establecida exitosamente")
             conn.execute(text("SELECT 1"))
-            # Asegurar que la conexión use UTF-8
-            conn.execute(text("SET client_encoding TO 'UTF8'"))
         
-        # Crear todas las tablas si no existen
-        Base.metadata.create_all(bind=engine)
-        logger.info("Tablas creadas/verificadas exitosamente")
+        if crear_tablas:
+            crear_esquema(engine)
         
         return engine
     except Exception as e:
         logger.error(f"Error al inicializar la base de datos: {e}")
         raise e
 
+# Clave del advisory lock que serializa la creación del esquema
+LOCK_ESQUEMA = 7210431
+
+def crear_esquema(motor):
+    """
+    Crea las tablas que falten. En PostgreSQL se hace bajo un advisory lock
+    para que varios procesos que arrancan a la vez no compitan con el DDL.
+    """
+    # Registrar todos los modelos en Base.metadata aunque el llamador no los haya importado
+    from . import models
+    
+    with motor.connect() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("SELECT pg_advisory_lock(:clave)"), {"clave": LOCK_ESQUEMA})
+        try:
+            Base.metadata.create_all(bind=conn)
+            conn.commit()
+        finally:
+            if conn.dialect.name == "postgresql":
+                conn.execute(text("SELECT pg_advisory_unlock(:clave)"), {"clave": LOCK_ESQUEMA})
+                conn.commit()
+    logger.info("Tablas creadas/verificadas exitosamente")
+
+def init_async_db(db_name: str):
+    """
+    Inicializa el engine asíncrono usado por las rutas `async def`.
+    No crea tablas: el esquema lo gestiona init_db.
+    """
+    global async_engine, AsyncSessionLocal
+    try:
+        logger.info(f"Inicializando engine asíncrono con nombre: {db_name}")
+        url = get_async_db_url(db_name)
+        async_engine = create_async_engine(url, **_opciones_engine(url, asincrono=True))
+        if async_engine.dialect.name == "sqlite":
+            event.listen(async_engine.sync_engine, "connect", _configurar_sqlite)
+        # Sin expirar en el commit: los objetos se serializan después del commit
+        # y en una sesión asíncrona no se pueden recargar de forma implícita
+        AsyncSessionLocal = async_sessionmaker(
+            bind=async_engine,
+            class_=AsyncSession,
+            autoflush=False,
+            expire_on_commit=False
+        )
+        return async_engine
+    except Exception as e:
+        logger.error(f"Error al inicializar el engine asíncrono: {e}")
+        raise e
+
+def lectura_consistente(db: Session):
+    """
+    Hace que todas las consultas siguientes de `db` lean la misma foto de la
+    base de datos, aunque otras peticiones hagan commit mientras tanto:
+    REPEATABLE READ en PostgreSQL y una transacción de lectura explícita en
+    SQLite (que, sin ella, confirma cada SELECT por separado). Termina antes la
+    transacción que hubiera abierta, porque el aislamiento solo se puede fijar
+    al empezarla.
+    """
+    if db.in_transaction():
+        db.rollback()
+    if db.get_bind().dialect.name == "postgresql":
+        db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+    elif db.get_bind().dialect.name == "sqlite":
+        db.connection().exec_driver_sql("BEGIN")
+
 def get_db():
     if SessionLocal is None:
         raise RuntimeError("Database not initialized. Call init_db first.")
@@ -95,4 +510,11 @@ def get_db():
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close() 
+
+async def get_async_db():
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Async database not initialized. Call init_async_db first.")
+    
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,71 @@
+"""
+Ficheros estáticos (logos y plantillas) con cabeceras de caché.
+
+Las URLs que devuelve la API llevan `?v=` con la versión del fichero (parte
+del sha256 de su contenido o, para los ficheros con nombre fijo, una derivada
+de la fecha de modificación y el tamaño), así que cambian al sustituirlo. Con
+`v` la respuesta se puede guardar en caché un año sin volver a pedirla; sin
+`v` el navegador la revalida siempre con ETag / Last-Modified y recibe un 304
+si no ha cambiado.
+"""
+import hashlib
+import os
+import re
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+from .services.subidas import VARIANTES
+
+CACHE_VERSIONADO = "public, max-age=31536000, immutable"
+CACHE_SIN_VERSION = "no-cache"
+
+# `<nombre>_<variante>.<ext>`: variantes reducidas de services/subidas.py
+PATRON_VARIANTE = re.compile(r"^(?P<base>.+)_(?:%s)(?P<extension>\.[^./]+)$" % "|".join(VARIANTES))
+
+def version_archivo(ruta: os.PathLike) -> str:
+    """Versión corta del fichero; cambia cuando se sobrescribe"""
+    stat_result = os.stat(ruta)
+    clave = f"{stat_result.st_mtime_ns}-{stat_result.st_size}"
+    return hashlib.md5(clave.encode()).hexdigest()[:12]
+
+def url_versionada(url: str, ruta: os.PathLike) -> str:
+    """Añade ?v=<versión del fichero en `ruta`> a la URL pública del fichero"""
+    return f"{url}?v={version_archivo(ruta)}"
+
+class EstaticosConCache(StaticFiles):
+    """
+    StaticFiles que añade Cache-Control según la URL lleve versión o no. Si
+    se pide una variante de una imagen que aún no existe (se generan en
+    segundo plano, y no las hay de los ficheros anteriores), sirve el
+    original sin permitir que se guarde en caché como la variante.
+    """
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        try:
+            return await super().get_response(path, scope)
+        except HTTPException as exc:
+            variante = PATRON_VARIANTE.match(path)
+            if exc.status_code != 404 or variante is None:
+                raise
+            original = variante.group("base") + variante.group("extension")
+            return await super().get_response(original, {**scope, "query_string": b""})
+
+    def file_response(
+        self,
+        full_path: os.PathLike,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        response = FileResponse(
+            full_path, status_code=status_code, stat_result=stat_result, method=scope["method"]
+        )
+        versionada = any(
+            parte.startswith(b"v=") for parte in scope.get("query_string", b"").split(b"&")
+        )
+        response.headers["Cache-Control"] = CACHE_VERSIONADO if versionada else CACHE_SIN_VERSION
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
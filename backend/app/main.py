@@ -1,4 +1,9 @@
+import time
+# Referencia para medir el arranque de cada worker
+INICIO_PROCESO = time.time()
+
 import os
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 import pathlib
 import logging
@@ -32,12 +37,66 @@ for secret_key in ["SECRET_KEY", "JWT_SECRET_KEY"]:
             logger.info(f"Cargado {secret_key} desde archivo {file_path}")
 
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from .routes import campeonato, pareja, mesa, resultados, ranking, plantilla
-from .database import Base, engine, init_db, get_db_url
+from .routes import campeonato, pareja, mesa, resultados, ranking, plantilla, eventos, exportacion
+from .services.eventos import escucha
+from .services.serializacion import RespuestaJSON
+from .compresion import Compresion
+from .metricas import MedirPeticiones, registro as registro_metricas
+from .estaticos import EstaticosConCache
+from .services.emparejamiento import cerrar_ejecutor
+from . import database
+from .database import init_db, init_async_db, get_pool_stats
+from .cache import cache_campeonatos
+
+DB_NAME = os.getenv("DB_NAME")
+if not DB_NAME:
+    raise ValueError("DB_NAME no está definido en el archivo .env")
+logger.info(f"Nombre de base de datos configurado: {DB_NAME}")
+
+# Tiempos de arranque de este worker, expuestos en /health
+arranque = {"pid": os.getpid(), "listo_s": None, "primera_peticion_s": None}
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Inicialización de cada worker: solo conexiones, sin DDL. El esquema lo
+    # prepara init_app.py una vez antes de arrancar los workers
+    init_db(DB_NAME, crear_tablas=False)
+    # Engine asíncrono para las rutas async def, que así no bloquean el event loop
+    init_async_db(DB_NAME)
+    # Cada worker escucha las notificaciones de PostgreSQL y las reparte a sus clientes
+    await escucha.iniciar()
+
+    arranque["listo_s"] = round(time.time() - INICIO_PROCESO, 3)
+    logger.info(f"Worker {arranque['pid']} listo en {arranque['listo_s']} s")
+    yield
+
+    await escucha.detener()
+    cerrar_ejecutor()
+    if database.async_engine is not None:
+        await database.async_engine.dispose()
+    if database.engine is not None:
+        database.engine.dispose()
+
+class MedirPrimeraPeticion:
+    """Registra cuánto tarda el worker desde que arranca hasta su primera petición"""
+    def __init__(self, app):
+        self.app = app
 
-app = FastAPI()
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and arranque["primera_peticion_s"] is None:
+            arranque["primera_peticion_s"] = round(time.time() - INICIO_PROCESO, 3)
+            logger.info(f"Worker {arranque['pid']} atiende su primera petición a los {arranque['primera_peticion_s']} s")
+        await self.app(scope, receive, send)
+
+# Las respuestas que pasan por el response_model también se serializan con orjson
+app = FastAPI(lifespan=lifespan, default_response_class=RespuestaJSON)
+app.add_middleware(MedirPrimeraPeticion)
+# Compresión brotli/gzip de las respuestas JSON grandes (ranking, mesas...)
+app.add_middleware(Compresion)
+# Métricas por ruta para /metrics
+app.add_middleware(MedirPeticiones)
 
 # Configurar CORS
 app.add_middleware(
@@ -66,24 +125,10 @@ app.add_middleware(
     max_age=3600  # Tiempo de caché de preflight en segundos
 )
 
-# Montar directorio de archivos estáticos
-# Creamos el directorio si no existe
-os.makedirs(os.path.join(BASE_DIR, "static"), exist_ok=True)
-os.makedirs(os.path.join(BASE_DIR, "static/logos"), exist_ok=True)
-os.makedirs(os.path.join(BASE_DIR, "static/plantillas"), exist_ok=True)
-app.mount("/static", StaticFiles(directory=os.path.join(BASE_DIR, "static")), name="static")
-
-# Inicializar la base de datos
-DB_NAME = os.getenv("DB_NAME")
-if not DB_NAME:
-    raise ValueError("DB_NAME no está definido en el archivo .env")
-
-logger.info(f"Nombre de base de datos configurado: {DB_NAME}")
-logger.info(f"Inicializando con configuración de base de datos")
-engine = init_db(DB_NAME)
-
-# Crear tablas
-Base.metadata.create_all(bind=engine)
+# Montar directorio de archivos estáticos, con Cache-Control según la URL
+# lleve versión (?v=) o no. Los directorios los crea init_app.py;
+# check_dir=False evita fallar al importar si todavía no existen
+app.mount("/static", EstaticosConCache(directory=os.path.join(BASE_DIR, "static"), check_dir=False), name="static")
 
 # Incluir routers
 app.include_router(campeonato)
@@ -92,7 +137,36 @@ app.include_router(mesa)
 app.include_router(resultados)
 app.include_router(ranking)
 app.include_router(plantilla)
+app.include_router(eventos)
+app.include_router(exportacion)
 
 @app.get("/health")
 def health_check():
-    return {"status": "ok", "database": engine is not None} 
\ No newline at end of file
+    return {"status": "ok", "database": database.engine is not None, "worker": arranque}
+
+@app.get("/health/pool")
+def pool_stats(reiniciar: bool = False):
+    """
+    Estado de los pools de conexiones y contadores desde el último reinicio:
+    espera media y máxima del checkout, esperas largas, desbordamientos por
+    encima de DB_POOL_SIZE y timeouts. Con reiniciar=true se ponen a cero
+    después de leerlos, para medir una ronda concreta.
+    """
+    return get_pool_stats(reiniciar)
+
+@app.get("/health/cache")
+def cache_stats(reiniciar: bool = False):
+    """
+    Uso de la caché de campeonatos de este worker: entradas, aciertos, fallos,
+    entradas caducadas, expulsadas por CACHE_MAXIMO e invalidadas por las
+    escrituras. Con reiniciar=true los contadores se ponen a cero después de leerlos.
+    """
+    return cache_campeonatos.estadisticas(reiniciar)
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metricas():
+    """
+    Métricas de las peticiones de este worker en formato Prometheus: número,
+    latencia, peticiones en curso, errores y tiempo de base de datos por ruta
+    """
+    return PlainTextResponse(registro_metricas.exportar(), media_type="text/plain; version=0.0.4")
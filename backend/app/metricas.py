@@ -0,0 +1,179 @@
+"""
+Métricas de las peticiones en formato Prometheus (GET /metrics).
+
+El middleware MedirPeticiones registra, por método y plantilla de ruta
+(`/mesas/{mesa_id}`, no la URL concreta):
+
+- domino_peticiones_total: peticiones por clase de estado (2xx, 4xx, 5xx...).
+- domino_peticion_duracion_segundos: histograma de la latencia.
+- domino_peticiones_en_curso: peticiones sin terminar.
+- domino_peticion_bd_segundos: histograma del tiempo en la base de datos.
+- domino_peticion_consultas_total: consultas SQL ejecutadas.
+
+El tiempo y las consultas de base de datos salen del perfil de consultas de
+la petición (database.iniciar_perfil), que además registra las peticiones que
+superan el presupuesto y los posibles N+1. Cada worker tiene sus propias
+métricas.
+"""
+import threading
+import time
+from typing import Dict, Tuple
+from starlette.datastructures import Headers
+from starlette.routing import Match, Mount
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from .database import PerfilConsultas, iniciar_perfil, terminar_perfil, revisar_perfil
+
+# Límites superiores (segundos) de los intervalos de los histogramas
+LIMITES = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Peticiones que no corresponden a ninguna ruta (404), agrupadas para no crear
+# una serie por cada URL
+SIN_RUTA = "sin_ruta"
+
+class Histograma:
+    def __init__(self):
+        self.cubetas = [0] * len(LIMITES)
+        self.suma = 0.0
+        self.total = 0
+
+    def observar(self, valor: float):
+        self.suma += valor
+        self.total += 1
+        for i, limite in enumerate(LIMITES):
+            if valor <= limite:
+                self.cubetas[i] += 1
+                break
+
+class MetricasRuta:
+    def __init__(self):
+        self.estados: Dict[str, int] = {}
+        self.duracion = Histograma()
+        self.bd = Histograma()
+        self.consultas = 0
+        self.en_curso = 0
+
+class Registro:
+    """Métricas de las peticiones del worker, por (método, ruta)"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rutas: Dict[Tuple[str, str], MetricasRuta] = {}
+
+    def _ruta(self, metodo: str, ruta: str) -> MetricasRuta:
+        clave = (metodo, ruta)
+        if clave not in self._rutas:
+            self._rutas[clave] = MetricasRuta()
+        return self._rutas[clave]
+
+    def iniciar(self, metodo: str, ruta: str):
+        with self._lock:
+            self._ruta(metodo, ruta).en_curso += 1
+
+    def terminar(self, metodo: str, ruta: str, estado: int, duracion: float, perfil: PerfilConsultas):
+        with self._lock:
+            metricas = self._ruta(metodo, ruta)
+            metricas.en_curso -= 1
+            clase = f"{estado // 100}xx"
+            metricas.estados[clase] = metricas.estados.get(clase, 0) + 1
+            metricas.duracion.observar(duracion)
+            metricas.bd.observar(perfil.tiempo)
+            metricas.consultas += perfil.consultas
+
+    def reiniciar(self):
+        with self._lock:
+            self._rutas = {}
+
+    def exportar(self) -> str:
+        """Texto en el formato de exposición de Prometheus (0.0.4)"""
+        with self._lock:
+            rutas = sorted(self._rutas.items())
+            lineas = [
+                "# HELP domino_peticiones_total Peticiones HTTP atendidas",
+                "# TYPE domino_peticiones_total counter",
+            ]
+            for (metodo, ruta), m in rutas:
+                for clase, total in sorted(m.estados.items()):
+                    lineas.append(f'domino_peticiones_total{{{_etiquetas(metodo, ruta)},estado="{clase}"}} {total}')
+
+            lineas += [
+                "# HELP domino_peticiones_en_curso Peticiones HTTP sin terminar",
+                "# TYPE domino_peticiones_en_curso gauge",
+            ]
+            for (metodo, ruta), m in rutas:
+                lineas.append(f"domino_peticiones_en_curso{{{_etiquetas(metodo, ruta)}}} {m.en_curso}")
+
+            for nombre, descripcion, atributo in (
+                ("domino_peticion_duracion_segundos", "Duración de las peticiones HTTP", "duracion"),
+                ("domino_peticion_bd_segundos", "Tiempo de cada petición en la base de datos", "bd"),
+            ):
+                lineas += [f"# HELP {nombre} {descripcion}", f"# TYPE {nombre} histogram"]
+                for (metodo, ruta), m in rutas:
+                    lineas += _lineas_histograma(nombre, _etiquetas(metodo, ruta), getattr(m, atributo))
+
+            lineas += [
+                "# HELP domino_peticion_consultas_total Consultas SQL ejecutadas por las peticiones",
+                "# TYPE domino_peticion_consultas_total counter",
+            ]
+            for (metodo, ruta), m in rutas:
+                lineas.append(f"domino_peticion_consultas_total{{{_etiquetas(metodo, ruta)}}} {m.consultas}")
+        return "\n".join(lineas) + "\n"
+
+def _etiquetas(metodo: str, ruta: str) -> str:
+    ruta = ruta.replace("\\", "\\\\").replace('"', '\\"')
+    return f'metodo="{metodo}",ruta="{ruta}"'
+
+def _lineas_histograma(nombre: str, etiquetas: str, histograma: Histograma):
+    acumulado = 0
+    for limite, cuenta in zip(LIMITES, histograma.cubetas):
+        acumulado += cuenta
+        yield f'{nombre}_bucket{{{etiquetas},le="{limite}"}} {acumulado}'
+    yield f'{nombre}_bucket{{{etiquetas},le="+Inf"}} {histograma.total}'
+    yield f"{nombre}_sum{{{etiquetas}}} {histograma.suma:.6f}"
+    yield f"{nombre}_count{{{etiquetas}}} {histograma.total}"
+
+registro = Registro()
+
+def plantilla_ruta(app: ASGIApp, scope: Scope) -> str:
+    """Plantilla de la ruta que atiende la petición (`/mesas/{mesa_id}`)"""
+    for ruta in getattr(app, "routes", []):
+        coincidencia, _ = ruta.matches(scope)
+        if coincidencia == Match.FULL:
+            if isinstance(ruta, Mount):
+                return ruta.path + "/{path}"
+            return ruta.path
+    return SIN_RUTA
+
+class MedirPeticiones:
+    """Middleware ASGI que registra las métricas de cada petición HTTP"""
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metodo = scope["method"]
+        # Starlette deja la aplicación en el scope antes de los middlewares
+        ruta = plantilla_ruta(scope.get("app"), scope)
+        estado = 500
+        eventos = False
+        perfil, token = iniciar_perfil()
+        registro.iniciar(metodo, ruta)
+        inicio = time.perf_counter()
+
+        async def enviar(message: Message):
+            nonlocal estado, eventos
+            if message["type"] == "http.response.start":
+                estado = message["status"]
+                eventos = Headers(raw=message["headers"]).get("content-type", "").startswith("text/event-stream")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            terminar_perfil(token)
+            duracion = time.perf_counter() - inicio
+            registro.terminar(metodo, ruta, estado, duracion, perfil)
+            # Una conexión SSE dura lo que el cliente siga conectado: solo se
+            # revisan sus consultas, no su duración
+            revisar_perfil(perfil, f"{metodo} {ruta}", None if eventos else duracion)
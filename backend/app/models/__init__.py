@@ -1,13 +1,19 @@
 from .campeonato import Campeonato
+from .clasificacion import Clasificacion
+from .contador_partida import ContadorPartida
 from .jugador import Jugador
 from .mesa import Mesa
 from .pareja import Pareja
+from .ranking_partida import RankingPartida
 from .resultado import Resultado
 
 __all__ = [
     "Campeonato",
+    "Clasificacion",
+    "ContadorPartida",
     "Jugador",
     "Mesa",
     "Pareja",
+    "RankingPartida",
     "Resultado"
 ]
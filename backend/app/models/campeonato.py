@@ -17,9 +17,13 @@ class Campeonato(Base):
     partida_actual = Column(Integer, default=0)
     pm = Column(Integer, default=300)
     logo = Column(String, nullable=True)
+    version = Column(Integer, default=0, nullable=False)  # Versión de datos, cambia con cada escritura
     
     parejas = relationship("Pareja", back_populates="campeonato", cascade="all, delete-orphan")
     jugadores = relationship("Jugador", back_populates="campeonato", cascade="all, delete-orphan")
     mesas = relationship("Mesa", back_populates="campeonato", cascade="all, delete-orphan")
     resultados = relationship("Resultado", back_populates="campeonato", cascade="all, delete-orphan")
+    clasificaciones = relationship("Clasificacion", back_populates="campeonato", cascade="all, delete-orphan")
+    rankings_partida = relationship("RankingPartida", back_populates="campeonato", cascade="all, delete-orphan")
+    contadores_partida = relationship("ContadorPartida", back_populates="campeonato", cascade="all, delete-orphan")
     
\ No newline at end of file
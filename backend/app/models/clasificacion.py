@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, ForeignKey
+from sqlalchemy.orm import relationship
+from ..database import Base
+
+class Clasificacion(Base):
+    """
+    Totales acumulados por pareja. Se mantiene en la misma transacción que
+    los resultados para que el ranking no tenga que agregar `resultados`.
+    """
+    __tablename__ = "clasificaciones"
+    
+    pareja_id = Column(Integer, ForeignKey("parejas.id", ondelete="CASCADE"), primary_key=True)
+    campeonato_id = Column(Integer, ForeignKey("campeonatos.id", ondelete="CASCADE"), index=True, nullable=False)
+    rt = Column(Integer, default=0, nullable=False)  # Suma de RT
+    mg = Column(Integer, default=0, nullable=False)  # Suma de MG
+    pp = Column(Integer, default=0, nullable=False)  # Suma de PP
+    pg = Column(Integer, default=0, nullable=False)  # Suma de PG
+    partidas_jugadas = Column(Integer, default=0, nullable=False)
+    ultima_partida = Column(Integer, default=0, nullable=False)
+    orden_sorteo = Column(Integer, default=0, nullable=False)  # Orden en el sorteo de la primera partida
+    
+    pareja = relationship("Pareja", back_populates="clasificacion")
+    campeonato = relationship("Campeonato", back_populates="clasificaciones")
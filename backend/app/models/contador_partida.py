@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, ForeignKey
+from sqlalchemy.orm import relationship
+from ..database import Base
+
+class ContadorPartida(Base):
+    """
+    Mesas de una partida y cuántas tienen ya resultado. Se actualiza en las
+    transacciones que crean o borran mesas y guardan resultados
+    (services/estado_partida.py), así que saber si una partida está completa
+    no necesita contar los resultados.
+    """
+    __tablename__ = "contadores_partida"
+    
+    campeonato_id = Column(Integer, ForeignKey("campeonatos.id", ondelete="CASCADE"), primary_key=True)
+    partida = Column(Integer, primary_key=True)
+    mesas = Column(Integer, default=0, nullable=False)
+    mesas_con_resultado = Column(Integer, default=0, nullable=False)
+    
+    campeonato = relationship("Campeonato", back_populates="contadores_partida")
@@ -8,7 +8,7 @@ class Jugador(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     nombre = Column(String)
     apellido = Column(String)
-    pareja_id = Column(Integer, ForeignKey("parejas.id"))
+    pareja_id = Column(Integer, ForeignKey("parejas.id"), index=True)
     campeonato_id = Column(Integer, ForeignKey("campeonatos.id"))
     
     pareja = relationship("Pareja", back_populates="jugadores")
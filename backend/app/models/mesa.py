@@ -1,16 +1,24 @@
-from sqlalchemy import Column, Integer, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, Boolean, ForeignKey
+from sqlalchemy.orm import relationship, synonym
 from ..database import Base
 
 class Mesa(Base):
     __tablename__ = "mesas"
-    
-    id = Column(Integer, primary_key=True, autoincrement=True)
-    partida = Column(Integer)
+
+    # Las mesas de todas las partidas se conservan: cada mesa se identifica por
+    # su número dentro de la partida. La clave primaria también sirve a la
+    # consulta de las mesas de una partida.
+    campeonato_id = Column(Integer, ForeignKey("campeonatos.id"), primary_key=True)
+    partida = Column(Integer, primary_key=True)
+    numero = Column(Integer, primary_key=True, autoincrement=False)
     pareja1_id = Column(Integer, ForeignKey("parejas.id"))
     pareja2_id = Column(Integer, ForeignKey("parejas.id"))
-    campeonato_id = Column(Integer, ForeignKey("campeonatos.id"))
-    
+    # Ya tiene resultado: la mesa cuenta en contadores_partida.mesas_con_resultado
+    con_resultado = Column(Boolean, default=False, nullable=False)
+
+    # La API y los resultados (mesa_id) siguen llamando id al número de mesa
+    id = synonym("numero")
+
     pareja1 = relationship("Pareja", foreign_keys=[pareja1_id])
     pareja2 = relationship("Pareja", foreign_keys=[pareja2_id])
-    campeonato = relationship("Campeonato", back_populates="mesas") 
\ No newline at end of file
+    campeonato = relationship("Campeonato", back_populates="mesas")
@@ -1,9 +1,12 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from ..database import Base
 
 class Pareja(Base):
     __tablename__ = "parejas"
+    __table_args__ = (
+        Index("ix_parejas_campeonato_activa", "campeonato_id", "activa"),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     nombre = Column(String)
@@ -14,4 +17,5 @@ class Pareja(Base):
     
     jugadores = relationship("Jugador", back_populates="pareja")
     campeonato = relationship("Campeonato", back_populates="parejas")
-    resultados = relationship("Resultado", back_populates="pareja") 
\ No newline at end of file
+    resultados = relationship("Resultado", back_populates="pareja")
+    clasificacion = relationship("Clasificacion", back_populates="pareja", uselist=False, cascade="all, delete-orphan") 
\ No newline at end of file
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, Boolean, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from ..database import Base
+
+class RankingPartida(Base):
+    """
+    Clasificación de cada pareja al cerrar una partida. Se escribe una vez al
+    pasar a la partida siguiente y no cambia, de modo que el ranking de
+    partidas anteriores se lee sin volver a agregar `resultados`.
+    """
+    __tablename__ = "rankings_partida"
+    __table_args__ = (
+        Index("ix_rankings_partida_posicion", "campeonato_id", "partida", "posicion"),
+    )
+    
+    campeonato_id = Column(Integer, ForeignKey("campeonatos.id", ondelete="CASCADE"), primary_key=True)
+    partida = Column(Integer, primary_key=True)
+    pareja_id = Column(Integer, ForeignKey("parejas.id", ondelete="CASCADE"), primary_key=True)
+    posicion = Column(Integer, nullable=False)
+    posicion_anterior = Column(Integer, nullable=True)  # Posición al cerrar la partida previa
+    gb = Column(Boolean, default=False, nullable=False)
+    rt = Column(Integer, default=0, nullable=False)
+    mg = Column(Integer, default=0, nullable=False)
+    pp = Column(Integer, default=0, nullable=False)
+    pg = Column(Integer, default=0, nullable=False)
+    partidas_jugadas = Column(Integer, default=0, nullable=False)
+    ultima_partida = Column(Integer, default=0, nullable=False)
+    orden_sorteo = Column(Integer, default=0, nullable=False)
+    
+    pareja = relationship("Pareja")
+    campeonato = relationship("Campeonato", back_populates="rankings_partida")
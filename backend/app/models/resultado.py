@@ -1,9 +1,22 @@
-from sqlalchemy import Column, Integer, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, ForeignKey, Boolean, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from ..database import Base
 
 class Resultado(Base):
     __tablename__ = "resultados"
+    __table_args__ = (
+        # Una pareja solo tiene un resultado por partida; el índice que crea
+        # también sirve a las búsquedas por (campeonato_id, partida)
+        UniqueConstraint("campeonato_id", "partida", "pareja_id", name="uq_resultados_campeonato_partida_pareja"),
+        Index("ix_resultados_mesa_partida", "mesa_id", "partida"),
+        # Cubre la suma de totales por pareja sin leer la tabla
+        Index(
+            "ix_resultados_pareja_partida",
+            "pareja_id",
+            "partida",
+            postgresql_include=["pg", "pp", "rt", "mg"]
+        ),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     pareja_id = Column(Integer, ForeignKey("parejas.id", ondelete="CASCADE"))
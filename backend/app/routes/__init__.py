@@ -4,6 +4,8 @@ from .mesa import router as mesa
 from .resultados import router as resultados
 from .ranking import router as ranking
 from .plantilla import router as plantilla
+from .eventos import router as eventos
+from .exportacion import router as exportacion
 
 __all__ = [
     "campeonato",
@@ -11,5 +13,7 @@ __all__ = [
     "mesa",
     "resultados",
     "ranking",
-    "plantilla"
+    "plantilla",
+    "eventos",
+    "exportacion"
 ] 
\ No newline at end of file
@@ -1,10 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Request, Response, BackgroundTasks
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 import logging
 import random
 import os
-import shutil
 from pathlib import Path
 from ..database import get_db
 from ..models.campeonato import Campeonato
@@ -14,6 +13,20 @@ from ..models.resultado import Resultado
 from ..models.jugador import Jugador
 from ..schemas.campeonato import CampeonatoCreate, CampeonatoUpdate, CampeonatoResponse
 from ..schemas.pareja import Pareja as ParejaSchema
+from ..services.clasificacion import reconstruir_clasificacion
+from ..services.ranking_partida import borrar_rankings_partida
+from ..schemas.dashboard import Dashboard, EstadoPartida
+from ..services.version import incrementar_version, obtener_version, calcular_etag, comprobar_etag
+from ..cache import invalidar_campeonato, leer_campeonato_actual
+from ..services.eventos import publicar_evento, PARTIDA_CREADA, CAMPEONATO_ACTUALIZADO
+from ..services.listados import listar_parejas
+from ..services.paginacion import ErrorPaginacion, responder
+from ..services.dashboard import datos_dashboard
+from ..services.estado_partida import recontar_partidas, leer_estado_partida
+from ..services.serializacion import respuesta_json
+from ..services.subidas import (
+    ErrorSubida, SubidaDemasiadoGrande, extension_imagen, guardar_subida, generar_variantes, urls_subida
+)
 from sqlalchemy import text, desc
 
 router = APIRouter(prefix="/campeonatos", tags=["campeonatos"])
@@ -25,7 +38,14 @@ LOGO_DIR = Path("static/logos")
 os.makedirs(LOGO_DIR, exist_ok=True)
 
 @router.get("/{campeonato_id}/parejas", response_model=List[ParejaSchema])
-def obtener_parejas_campeonato(campeonato_id: int, db: Session = Depends(get_db)):
+def obtener_parejas_campeonato(
+    campeonato_id: int,
+    response: Response,
+    after: Optional[str] = None,
+    limit: Optional[int] = None,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
     try:
         logger.info(f"Obteniendo parejas del campeonato {campeonato_id}")
         # Verificar que existe el campeonato
@@ -36,12 +56,12 @@ def obtener_parejas_campeonato(campeonato_id: int, db: Session = Depends(get_db)
                 detail="Campeonato no encontrado"
             )
         
-        # Obtener todas las parejas del campeonato ordenadas por ID descendente
-        parejas = db.query(Pareja)\
-                    .filter(Pareja.campeonato_id == campeonato_id)\
-                    .order_by(desc(Pareja.id))\
-                    .all()
-        return parejas
+        # Parejas del campeonato ordenadas por ID descendente, por páginas si se pide
+        try:
+            parejas, siguiente, directo = listar_parejas(db, campeonato_id, after, limit, fields)
+        except ErrorPaginacion as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        return responder(parejas, response, siguiente, directo)
     except HTTPException as he:
         raise he
     except Exception as e:
@@ -56,15 +76,21 @@ def reset_database_sequences(db: Session):
     tables = [
         'campeonatos',
         'parejas',
-        'mesas',
         'resultados',
         'jugadores'
     ]
     
     try:
-        for table in tables:
-            # Reiniciar la secuencia de cada tabla
-            db.execute(text(f"ALTER SEQUENCE {table}_id_seq RESTART WITH 1"))
+        if db.get_bind().dialect.name == "sqlite":
+            # SQLite no tiene secuencias: sin AUTOINCREMENT el id siguiente es
+            # max(id) + 1, y con él el contador se guarda en sqlite_sequence
+            if db.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_sequence'")).first():
+                for table in tables:
+                    db.execute(text("DELETE FROM sqlite_sequence WHERE name = :tabla"), {"tabla": table})
+        else:
+            for table in tables:
+                # Reiniciar la secuencia de cada tabla
+                db.execute(text(f"ALTER SEQUENCE {table}_id_seq RESTART WITH 1"))
         db.commit()
     except Exception as e:
         logger.error(f"Error al reiniciar secuencias: {str(e)}")
@@ -100,6 +126,10 @@ def crear_campeonato(campeonato: CampeonatoCreate, db: Session = Depends(get_db)
             logo=campeonato.logo
         )
         db.add(db_campeonato)
+        db.flush()
+        # Hay un nuevo campeonato activo (y su id puede haberse usado antes)
+        invalidar_campeonato(db, db_campeonato.id)
+        publicar_evento(db, CAMPEONATO_ACTUALIZADO, db_campeonato.id)
         db.commit()
         db.refresh(db_campeonato)
         logger.info(f"Campeonato creado exitosamente: {db_campeonato.id}")
@@ -144,6 +174,8 @@ def actualizar_campeonato(campeonato_id: int, campeonato: CampeonatoUpdate, db:
         if campeonato.logo is not None:
             db_campeonato.logo = campeonato.logo
         
+        incrementar_version(db, campeonato_id)
+        publicar_evento(db, CAMPEONATO_ACTUALIZADO, campeonato_id)
         db.commit()
         db.refresh(db_campeonato)
         logger.info(f"Campeonato {campeonato_id} actualizado exitosamente")
@@ -160,9 +192,10 @@ def actualizar_campeonato(campeonato_id: int, campeonato: CampeonatoUpdate, db:
         )
 
 @router.get("/actual", response_model=CampeonatoResponse)
-def obtener_campeonato_actual(db: Session = Depends(get_db)):
+def obtener_campeonato_actual(request: Request, response: Response, db: Session = Depends(get_db)):
     try:
-        campeonato = db.query(Campeonato).filter(Campeonato.activo == True).first()
+        # Lo consultan todos los clientes continuamente: se lee de la caché
+        campeonato = leer_campeonato_actual(db)
         
         if not campeonato:
             raise HTTPException(
@@ -170,22 +203,12 @@ def obtener_campeonato_actual(db: Session = Depends(get_db)):
                 detail="No hay campeonato activo"
             )
         
-        # Convertir el modelo SQLAlchemy a un diccionario
-        campeonato_dict = {
-            "id": campeonato.id,
-            "nombre": campeonato.nombre,
-            "fecha_inicio": campeonato.fecha_inicio,
-            "dias_duracion": campeonato.dias_duracion,
-            "numero_partidas": campeonato.numero_partidas,
-            "gb": campeonato.gb,
-            "gb_valor": campeonato.gb_valor,
-            "activo": campeonato.activo,
-            "partida_actual": campeonato.partida_actual,
-            "pm": campeonato.pm,
-            "logo": campeonato.logo
-        }
+        etag = calcular_etag("campeonato", campeonato.id, campeonato.version)
+        no_modificado = comprobar_etag(request, response, etag)
+        if no_modificado:
+            return no_modificado
         
-        return campeonato_dict
+        return campeonato.a_diccionario()
     except HTTPException as he:
         raise he
     except Exception as e:
@@ -194,6 +217,43 @@ def obtener_campeonato_actual(db: Session = Depends(get_db)):
             detail=f"Error al obtener el campeonato actual: {str(e)}"
         )
 
+@router.get("/{campeonato_id}/dashboard", response_model=Dashboard)
+def obtener_dashboard(campeonato_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    """
+    Todo lo que muestran las pantallas del campeonato en una respuesta: el
+    campeonato, las mesas y los resultados de la partida actual, el ranking y
+    si la partida está completa. Se lee de una sola foto de la base de datos,
+    así que nunca mezcla datos de antes y de después de una escritura;
+    `version` es la versión de datos de esa foto.
+    """
+    version = obtener_version(db, campeonato_id)
+    if version is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Campeonato no encontrado")
+    no_modificado = comprobar_etag(request, response, calcular_etag("dashboard", campeonato_id, version))
+    if no_modificado:
+        return no_modificado
+    
+    contenido = datos_dashboard(db, campeonato_id)
+    if contenido is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Campeonato no encontrado")
+    # La foto puede ser más reciente que la versión consultada antes
+    response.headers["ETag"] = calcular_etag("dashboard", campeonato_id, contenido["version"])
+    return respuesta_json(contenido, response)
+
+@router.get("/{campeonato_id}/partidas/{partida}/estado", response_model=EstadoPartida)
+def obtener_estado_partida(campeonato_id: int, partida: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    """
+    Mesas de la partida y cuántas tienen resultado, leídas del contador de la
+    partida sin recorrer los resultados
+    """
+    version = obtener_version(db, campeonato_id)
+    if version is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Campeonato no encontrado")
+    no_modificado = comprobar_etag(request, response, calcular_etag("estado", campeonato_id, version, partida))
+    if no_modificado:
+        return no_modificado
+    return leer_estado_partida(db, campeonato_id, partida)
+
 @router.delete("/{campeonato_id}")
 def eliminar_campeonato(campeonato_id: int, db: Session = Depends(get_db)):
     try:
@@ -209,6 +269,8 @@ def eliminar_campeonato(campeonato_id: int, db: Session = Depends(get_db)):
         
         # Eliminar el campeonato (el cascade se encargará del resto)
         db.delete(db_campeonato)
+        invalidar_campeonato(db, campeonato_id)
+        publicar_evento(db, CAMPEONATO_ACTUALIZADO, campeonato_id)
         db.commit()
         
         logger.info(f"Campeonato {campeonato_id} y datos relacionados eliminados exitosamente")
@@ -260,21 +322,30 @@ def cerrar_inscripcion(campeonato_id: int, db: Session = Depends(get_db)):
         random.shuffle(parejas_ids)
         
         # Crear mesas
+        mesas = []
         for i in range(0, len(parejas_ids), 2):
             pareja1_id = parejas_ids[i]
             pareja2_id = parejas_ids[i + 1] if i + 1 < len(parejas_ids) else None
             
             mesa = Mesa(
-                id=i//2 + 1,  # Mesa 1, 2, 3, etc.
+                numero=i//2 + 1,  # Mesa 1, 2, 3, etc.
                 partida=1,
                 pareja1_id=pareja1_id,
                 pareja2_id=pareja2_id,
                 campeonato_id=campeonato_id
             )
             db.add(mesa)
+            mesas.append(mesa)
         
         # Actualizar estado del campeonato
         campeonato.partida_actual = 1
+        
+        # Guardar el orden del sorteo en la clasificación (desempate final del
+        # ranking) con los totales de la partida 1 que ya hubiera de antes
+        reconstruir_clasificacion(db, campeonato_id)
+        recontar_partidas(db, campeonato_id)
+        incrementar_version(db, campeonato_id)
+        publicar_evento(db, PARTIDA_CREADA, campeonato_id, partida=1)
         db.commit()
         
         logger.info(f"Inscripción cerrada exitosamente para el campeonato {campeonato_id}")
@@ -305,6 +376,11 @@ def reiniciar_campeonato(campeonato_id: int, db: Session = Depends(get_db)):
         
         # Reiniciar la partida actual a 0
         campeonato.partida_actual = 0
+        borrar_rankings_partida(db, campeonato_id)
+        # Los resultados que queden ya no cuentan en la clasificación
+        reconstruir_clasificacion(db, campeonato_id)
+        incrementar_version(db, campeonato_id)
+        publicar_evento(db, CAMPEONATO_ACTUALIZADO, campeonato_id)
         db.commit()
         
         logger.info(f"Campeonato {campeonato_id} reiniciado exitosamente")
@@ -319,48 +395,39 @@ def reiniciar_campeonato(campeonato_id: int, db: Session = Depends(get_db)):
         )
 
 @router.post("/upload-logo")
-async def upload_logo(file: UploadFile = File(...)):
+async def upload_logo(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
     """
-    Sube una imagen de logo y devuelve la ruta para acceder a ella
+    Sube una imagen de logo y devuelve la ruta para acceder a ella y a sus
+    variantes reducidas (pantalla, impresión y miniatura), que se generan en
+    segundo plano. Un logo idéntico a uno ya subido reutiliza el fichero.
     """
     try:
         logger.info(f"Subiendo archivo: {file.filename}")
         
-        # Validar el tipo de archivo
-        if not file.content_type.startswith("image/"):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="El archivo debe ser una imagen"
-            )
-        
-        # Asegurar que el directorio existe
-        os.makedirs(LOGO_DIR, exist_ok=True)
-        logger.info(f"Directorio de logos: {LOGO_DIR}")
+        # Validar el tipo de archivo y la extensión
+        extension = extension_imagen(file)
         
-        # Crear un nombre seguro para el archivo
-        file_extension = file.filename.split(".")[-1].lower()
+        # Guardar el archivo por bloques, con su sha256 como nombre
+        subida = await guardar_subida(file, LOGO_DIR, extension)
+        logger.info(f"Logo guardado en: {subida.ruta}" + (" (ya existía)" if subida.duplicado else ""))
         
-        # Validar la extensión del archivo
-        valid_extensions = ['jpg', 'jpeg', 'png', 'gif', 'svg', 'webp']
-        if file_extension not in valid_extensions:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Extensión no permitida. Use: {', '.join(valid_extensions)}"
-            )
-            
-        file_name = f"logo_{random.randint(10000, 99999)}.{file_extension}"
-        file_path = LOGO_DIR / file_name
+        # Generar las variantes reducidas después de responder
+        background_tasks.add_task(generar_variantes, subida.ruta)
         
-        # Guardar el archivo
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-            
-        logger.info(f"Logo guardado en: {file_path}")
-        
-        # Devolver la ruta relativa para acceder al archivo
-        logo_path = f"/static/logos/{file_name}"
-        return {"logo_path": logo_path}
+        # Devolver la ruta relativa para acceder al archivo, con su versión
+        # para que se pueda guardar en caché sin revalidarla
+        urls = urls_subida("/static/logos", subida.nombre, subida.sha256[:12])
+        return {
+            "logo_path": urls["url"],
+            "variantes": urls["variantes"],
+            "sha256": subida.sha256,
+            "duplicado": subida.duplicado
+        }
     
+    except SubidaDemasiadoGrande as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except ErrorSubida as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except HTTPException as he:
         logger.error(f"Error de validación al subir logo: {he.detail}")
         raise he
@@ -417,9 +484,15 @@ def retroceder_partida(campeonato_id: int, db: Session = Depends(get_db)):
             Mesa.campeonato_id == campeonato_id,
             Mesa.partida == campeonato.partida_actual
         ).delete()
+        recontar_partidas(db, campeonato_id, campeonato.partida_actual)
+        
+        # La partida anterior vuelve a estar abierta: su clasificación guardada ya no vale
+        borrar_rankings_partida(db, campeonato_id, partida_anterior)
         
         # Actualizar la partida actual
         campeonato.partida_actual = partida_anterior
+        incrementar_version(db, campeonato_id)
+        publicar_evento(db, CAMPEONATO_ACTUALIZADO, campeonato_id, partida=partida_anterior)
         db.commit()
         
         # Obtener información de las mesas de la partida anterior para devolverla en la respuesta
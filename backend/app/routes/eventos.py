@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+from typing import Optional
+import asyncio
+from ..services.eventos import difusor
+
+router = APIRouter(prefix="/eventos", tags=["eventos"])
+
+# Comentario SSE periódico para que proxies y navegadores no cierren la conexión
+INTERVALO_LATIDO = 15
+
+@router.get("")
+async def suscribir_eventos(request: Request, campeonato_id: Optional[int] = None):
+    """
+    Canal Server-Sent Events con los eventos del campeonato:
+    resultado_guardado, partida_creada, pareja_actualizada, ranking_actualizado,
+    campeonato_actualizado y sincronizar. Los clientes solo recargan al recibirlos.
+    """
+    suscripcion = difusor.suscribir(campeonato_id)
+    
+    async def generar():
+        try:
+            # Reintento del navegador si se corta la conexión
+            yield "retry: 2000\n\n"
+            while True:
+                try:
+                    mensaje = await asyncio.wait_for(suscripcion.cola.get(), timeout=INTERVALO_LATIDO)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": latido\n\n"
+                    continue
+                yield mensaje
+        finally:
+            difusor.cancelar(suscripcion)
+    
+    return StreamingResponse(
+        generar(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Evitar que nginx acumule los eventos en su buffer
+            "X-Accel-Buffering": "no"
+        }
+    )
@@ -0,0 +1,95 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from typing import Optional
+from ..database import get_db
+from ..models import Campeonato
+from ..services.exportacion import (
+    FORMATOS, COLUMNAS_CLASIFICACION, exportar, numerar_clasificacion,
+    consulta_resultados, consulta_mesas_exportacion
+)
+from ..services.ranking_partida import consulta_ranking_historico, existe_ranking_partida
+from .ranking import consulta_ranking
+
+router = APIRouter(prefix="/campeonatos", tags=["exportacion"])
+
+def _obtener_campeonato(db: Session, campeonato_id: int, formato: str) -> Campeonato:
+    if formato not in FORMATOS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Formato desconocido: {formato}. Opciones: {', '.join(FORMATOS)}"
+        )
+    campeonato = db.query(Campeonato).filter(Campeonato.id == campeonato_id).first()
+    if not campeonato:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Campeonato no encontrado"
+        )
+    return campeonato
+
+def _respuesta(contenido, formato: str, nombre: str) -> StreamingResponse:
+    return StreamingResponse(
+        contenido,
+        media_type=FORMATOS[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nombre}.{formato}"'}
+    )
+
+@router.get("/{campeonato_id}/export/resultados")
+def exportar_resultados(campeonato_id: int, formato: str = "csv", db: Session = Depends(get_db)):
+    """
+    Descarga todos los resultados del campeonato (CSV o NDJSON), ordenados
+    por partida y mesa, sin cargarlos en memoria
+    """
+    _obtener_campeonato(db, campeonato_id, formato)
+    return _respuesta(
+        exportar(consulta_resultados(campeonato_id), formato),
+        formato,
+        f"campeonato_{campeonato_id}_resultados"
+    )
+
+@router.get("/{campeonato_id}/export/mesas")
+def exportar_mesas(
+    campeonato_id: int,
+    formato: str = "csv",
+    partida: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """Descarga las mesas de una partida o, sin `partida`, las de todas"""
+    _obtener_campeonato(db, campeonato_id, formato)
+    nombre = f"campeonato_{campeonato_id}_mesas" + (f"_partida_{partida}" if partida is not None else "")
+    return _respuesta(
+        exportar(consulta_mesas_exportacion(campeonato_id, partida), formato),
+        formato,
+        nombre
+    )
+
+@router.get("/{campeonato_id}/export/clasificacion")
+def exportar_clasificacion(
+    campeonato_id: int,
+    formato: str = "csv",
+    partida: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Descarga la clasificación actual o, con `partida`, la de una partida
+    cerrada, con los mismos criterios que GET /resultados/ranking
+    """
+    campeonato = _obtener_campeonato(db, campeonato_id, formato)
+    if partida is not None and not 1 <= partida <= campeonato.partida_actual:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"La partida {partida} no se ha jugado en el campeonato"
+        )
+
+    guardado = partida is not None and existe_ranking_partida(db, campeonato_id, partida)
+    if partida is None or (partida == campeonato.partida_actual and not guardado):
+        consulta = consulta_ranking(campeonato_id, partida_anterior=campeonato.partida_actual - 1)
+    else:
+        consulta = consulta_ranking_historico(campeonato, partida, guardado=guardado)
+
+    nombre = f"campeonato_{campeonato_id}_clasificacion" + (f"_partida_{partida}" if partida is not None else "")
+    return _respuesta(
+        exportar(consulta, formato, transformar=numerar_clasificacion(), columnas=COLUMNAS_CLASIFICACION),
+        formato,
+        nombre
+    )
@@ -1,10 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session, joinedload
-from typing import List, Dict
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
+from sqlalchemy.orm import Session
+from typing import List, Dict, Optional
 from random import shuffle, randint
 from ..database import get_db
+from ..cache import leer_campeonato, leer_campeonato_actual
 from ..models import Mesa, Pareja, Campeonato, Resultado
 from ..schemas import MesaCreate, Mesa as MesaSchema
+from ..services.clasificacion import registrar_orden_sorteo, reiniciar_orden_sorteo, reconstruir_clasificacion
+from ..services.version import incrementar_version, obtener_version, calcular_etag, comprobar_etag
+from ..services.eventos import publicar_evento, PARTIDA_CREADA, CAMPEONATO_ACTUALIZADO
+from ..services.ranking_partida import guardar_ranking_partida, borrar_rankings_partida
+from ..services.estado_partida import recontar_partidas
+from ..services.listados import listar_mesas
+from ..services.paginacion import ErrorPaginacion, responder
+from ..services.emparejamiento import (
+    ESTRATEGIAS, ESTRATEGIA_POR_DEFECTO, calcular_mesas, historial_enfrentamientos, contar_repetidos
+)
 from sqlalchemy import func, text
 import logging
 
@@ -13,6 +24,38 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/mesas", tags=["mesas"])
 
+def consulta_ranking_parejas(db: Session, campeonato: Campeonato, por_gb: bool = True):
+    """
+    Construye la consulta de parejas activas ordenadas por el ranking acumulado
+    hasta la partida actual. Con por_gb=False no se separan los grupos GB.
+    """
+    query = db.query(
+        Pareja,
+        func.coalesce(func.sum(Resultado.pg), 0).label('total_pg'),
+        func.coalesce(func.sum(Resultado.pp), 0).label('total_pp'),
+        func.coalesce(func.sum(Resultado.rt), 0).label('total_rt'),
+        func.coalesce(func.sum(Resultado.mg), 0).label('total_mg')
+    ).outerjoin(
+        Resultado,
+        (Pareja.id == Resultado.pareja_id) &
+        (Resultado.campeonato_id == campeonato.id) &
+        (Resultado.partida <= campeonato.partida_actual)
+    ).filter(
+        Pareja.campeonato_id == campeonato.id,
+        Pareja.activa == True
+    ).group_by(
+        Pareja.id
+    )
+
+    orden = [Pareja.gb.asc()] if por_gb else []  # GB ascendente (grupo A antes que B)
+    orden += [
+        func.coalesce(func.sum(Resultado.pg), 0).desc(),  # PG descendente (Partidas Ganadas)
+        func.coalesce(func.sum(Resultado.pp), 0).desc(),  # PP descendente (Diferencia)
+        func.coalesce(func.sum(Resultado.rt), 0).desc(),  # RT descendente (Puntos Totales)
+        func.coalesce(func.sum(Resultado.mg), 0).asc()    # MG ascendente (Manos Ganadas)
+    ]
+    return query.order_by(*orden)
+
 @router.post("/sorteo", response_model=List[MesaSchema])
 def crear_mesas_sorteo(campeonato_id: int, db: Session = Depends(get_db)):
     # Verificar que existe el campeonato
@@ -54,7 +97,7 @@ def crear_mesas_sorteo(campeonato_id: int, db: Session = Depends(get_db)):
         pareja2_id = parejas_ids[i + 1] if i + 1 < len(parejas_ids) else None
         
         mesa = Mesa(
-            id=i//2 + 1,  # Mesa 1, 2, 3, etc.
+            numero=i//2 + 1,  # Mesa 1, 2, 3, etc.
             partida=1,
             pareja1_id=pareja1_id,
             pareja2_id=pareja2_id,
@@ -63,14 +106,25 @@ def crear_mesas_sorteo(campeonato_id: int, db: Session = Depends(get_db)):
         db.add(mesa)
         mesas.append(mesa)
     
+    # Guardar el orden del sorteo en la clasificación (desempate final del ranking)
+    registrar_orden_sorteo(db, campeonato_id, mesas)
+    recontar_partidas(db, campeonato_id)
+    
     # Actualizar partida actual del campeonato
     campeonato.partida_actual = 1
+    incrementar_version(db, campeonato_id)
+    publicar_evento(db, PARTIDA_CREADA, campeonato_id, partida=1)
     
     db.commit()
     return mesas
 
 @router.post("/ranking")
-def crear_mesas_ranking(campeonato_id: int, db: Session = Depends(get_db)):
+def crear_mesas_ranking(campeonato_id: int, estrategia: str = ESTRATEGIA_POR_DEFECTO, db: Session = Depends(get_db)):
+    if estrategia not in ESTRATEGIAS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Estrategia de emparejamiento desconocida: {estrategia}. Opciones: {', '.join(ESTRATEGIAS)}"
+        )
     try:
         # Verificar que existe el campeonato
         campeonato = db.query(Campeonato).filter(Campeonato.id == campeonato_id).first()
@@ -87,8 +141,10 @@ def crear_mesas_ranking(campeonato_id: int, db: Session = Depends(get_db)):
                 detail="La primera partida debe ser por sorteo"
             )
         
-        # Si es la última partida, no crear nuevas mesas
+        # Si es la última partida, no crear nuevas mesas; solo se cierra la partida
         if campeonato.partida_actual == campeonato.numero_partidas:
+            if guardar_ranking_partida(db, campeonato, campeonato.partida_actual):
+                db.commit()
             return {"mesas": [], "ranking_actualizado": True}
 
         # Verificar que no se excede el número de partidas
@@ -100,33 +156,20 @@ def crear_mesas_ranking(campeonato_id: int, db: Session = Depends(get_db)):
 
         nueva_partida = campeonato.partida_actual + 1
 
-        # Eliminar todas las mesas existentes del campeonato
-        db.query(Mesa).filter(Mesa.campeonato_id == campeonato_id).delete()
+        # Guardar la clasificación de la partida que se cierra, antes de separar los grupos GB
+        guardar_ranking_partida(db, campeonato, campeonato.partida_actual)
+
+        # Las mesas de las partidas anteriores se conservan; solo se descartan
+        # las que pudieran quedar de la nueva partida
+        db.query(Mesa).filter(
+            Mesa.campeonato_id == campeonato_id,
+            Mesa.partida >= nueva_partida
+        ).delete(synchronize_session=False)
 
         # Verificar si estamos en la partida GBP y necesitamos asignar GB=B
         if campeonato.gb and campeonato.partida_actual == campeonato.gb_valor:
             # Obtener todas las parejas ordenadas por ranking actual
-            parejas_ranking = db.query(
-                Pareja,
-                func.coalesce(func.sum(Resultado.pg), 0).label('total_pg'),
-                func.coalesce(func.sum(Resultado.pp), 0).label('total_pp'),
-                func.coalesce(func.sum(Resultado.rt), 0).label('total_rt'),
-                func.coalesce(func.sum(Resultado.mg), 0).label('total_mg')
-            ).outerjoin(
-                Resultado,
-                (Pareja.id == Resultado.pareja_id) & 
-                (Resultado.partida <= campeonato.partida_actual)
-            ).filter(
-                Pareja.campeonato_id == campeonato_id,
-                Pareja.activa == True
-            ).group_by(
-                Pareja.id
-            ).order_by(
-                func.coalesce(func.sum(Resultado.pg), 0).desc(),  # 1. PG descendente (Partidas Ganadas)
-                func.coalesce(func.sum(Resultado.pp), 0).desc(),  # 2. PP descendente (Diferencia)
-                func.coalesce(func.sum(Resultado.rt), 0).desc(),  # 3. RT descendente (Puntos Totales)
-                func.coalesce(func.sum(Resultado.mg), 0).asc()    # 4. MG ascendente (Manos Ganadas)
-            ).all()
+            parejas_ranking = consulta_ranking_parejas(db, campeonato, por_gb=False).all()
 
             # Calcular el índice desde donde empiezan las parejas GB=B
             total_parejas = len(parejas_ranking)
@@ -138,28 +181,7 @@ def crear_mesas_ranking(campeonato_id: int, db: Session = Depends(get_db)):
                 db.query(Pareja).filter(Pareja.id == pareja.id).update({"gb": True})
 
         # Obtener parejas activas ordenadas por ranking actual
-        parejas_ranking = db.query(
-            Pareja,
-            func.coalesce(func.sum(Resultado.pg), 0).label('total_pg'),
-            func.coalesce(func.sum(Resultado.pp), 0).label('total_pp'),
-            func.coalesce(func.sum(Resultado.rt), 0).label('total_rt'),
-            func.coalesce(func.sum(Resultado.mg), 0).label('total_mg')
-        ).outerjoin(
-            Resultado,
-            (Pareja.id == Resultado.pareja_id) & 
-            (Resultado.partida <= campeonato.partida_actual)
-        ).filter(
-            Pareja.campeonato_id == campeonato_id,
-            Pareja.activa == True
-        ).group_by(
-            Pareja.id
-        ).order_by(
-            Pareja.gb.asc(),  # 1. GB ascendente (grupo A antes que B)
-            func.coalesce(func.sum(Resultado.pg), 0).desc(),  # 2. PG descendente (Partidas Ganadas)
-            func.coalesce(func.sum(Resultado.pp), 0).desc(),  # 3. PP descendente (Diferencia)
-            func.coalesce(func.sum(Resultado.rt), 0).desc(),  # 4. RT descendente (Puntos Totales)
-            func.coalesce(func.sum(Resultado.mg), 0).asc()    # 5. MG ascendente (Manos Ganadas)
-        ).all()
+        parejas_ranking = consulta_ranking_parejas(db, campeonato).all()
 
         if not parejas_ranking:
             raise HTTPException(
@@ -167,139 +189,114 @@ def crear_mesas_ranking(campeonato_id: int, db: Session = Depends(get_db)):
                 detail="No hay parejas activas para crear mesas"
             )
 
-        # Separar parejas por GB manteniendo el orden del ranking
-        parejas_ordenadas = []
+        # Separar parejas por grupo GB manteniendo el orden del ranking
+        grupos = {}
         for pareja_info in parejas_ranking:
             pareja = pareja_info[0]
-            total_pg = pareja_info[1]
-            total_pp = pareja_info[2]
-            total_rt = pareja_info[3]
-            total_mg = pareja_info[4]
-            
-            parejas_ordenadas.append({
-                'pareja': pareja,
-                'total_pg': total_pg,
-                'total_pp': total_pp,
-                'total_rt': total_rt,
-                'total_mg': total_mg
-            })
+            grupos.setdefault(bool(pareja.gb), []).append(pareja.id)
+        grupos = [grupos[gb] for gb in sorted(grupos)]
 
-        # Crear mesas manteniendo el orden del ranking
-        mesas = []
-        mesa_id = 1
+        # El emparejamiento consecutivo no necesita el historial de rivales
+        if estrategia == "consecutivo":
+            rivales, descansos = {}, set()
+        else:
+            rivales, descansos = historial_enfrentamientos(db, campeonato_id, campeonato.partida_actual)
+        emparejamiento = calcular_mesas(estrategia, grupos, rivales, descansos)
 
-        # Crear mesas emparejando parejas consecutivas
-        for i in range(0, len(parejas_ordenadas), 2):
-            # La pareja con ranking superior (i) va a la izquierda como pareja1
-            # La pareja con ranking inferior (i+1) va a la derecha como pareja2
-            if i + 1 < len(parejas_ordenadas):
-                pareja1 = parejas_ordenadas[i]['pareja']      # Ranking superior a la izquierda
-                pareja2 = parejas_ordenadas[i + 1]['pareja']  # Ranking inferior a la derecha
-            else:
-                # Si es la última pareja y está sola
-                pareja1 = parejas_ordenadas[i]['pareja']
-                pareja2 = None
-            
+        # Crear mesas manteniendo el orden del ranking: la pareja con ranking
+        # superior va a la izquierda como pareja1
+        mesas = []
+        for numero, (pareja1_id, pareja2_id) in enumerate(emparejamiento, start=1):
             mesa = Mesa(
-                id=mesa_id,
+                numero=numero,
                 partida=nueva_partida,
-                pareja1_id=pareja1.id,
-                pareja2_id=pareja2.id if pareja2 else None,
+                pareja1_id=pareja1_id,
+                pareja2_id=pareja2_id,
                 campeonato_id=campeonato_id
             )
             db.add(mesa)
             mesas.append(mesa)
-            mesa_id += 1
+        # También descarta los contadores de las mesas borradas
+        recontar_partidas(db, campeonato_id, nueva_partida)
 
         # Actualizar partida actual del campeonato
         campeonato.partida_actual = nueva_partida
+        incrementar_version(db, campeonato_id)
+        publicar_evento(db, PARTIDA_CREADA, campeonato_id, partida=nueva_partida)
         
         db.commit()
-        return {"mesas": mesas, "ranking_actualizado": True}
+        return {
+            "mesas": mesas,
+            "ranking_actualizado": True,
+            "estrategia": estrategia,
+            "enfrentamientos_repetidos": contar_repetidos(emparejamiento, rivales)
+        }
             
     except Exception as e:
         db.rollback()
-        print(f"Error al crear mesas por ranking: {str(e)}")  # Agregar log del error
+        logger.error(f"Error al crear mesas por ranking: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al crear mesas por ranking: {str(e)}"
         )
 
 @router.get("", response_model=List[MesaSchema])
-def get_mesas(campeonato_id: int, partida: int, db: Session = Depends(get_db)):
-    # Buscar mesas existentes
-    mesas = db.query(Mesa).filter(
-        Mesa.campeonato_id == campeonato_id,
-        Mesa.partida == partida
-    ).options(
-        joinedload(Mesa.pareja1).load_only(Pareja.id, Pareja.nombre, Pareja.gb),
-        joinedload(Mesa.pareja2).load_only(Pareja.id, Pareja.nombre, Pareja.gb)
-    ).order_by(Mesa.id.asc()).all()
-    
-    # Si hay mesas, retornarlas
-    if mesas:
-        return mesas
-    
-    # Si no hay mesas, intentar reconstruirlas desde los resultados
-    # Esto es útil cuando se retrocede una partida
-    print(f"No se encontraron mesas para campeonato {campeonato_id}, partida {partida}. Intentando reconstruirlas desde resultados.")
-    
-    # Obtener resultados de la partida
-    resultados = db.query(Resultado).filter(
-        Resultado.campeonato_id == campeonato_id,
-        Resultado.partida == partida
-    ).all()
-    
-    if not resultados:
-        print(f"No se encontraron resultados para reconstruir las mesas de la partida {partida}.")
-        return []
+def get_mesas(
+    campeonato_id: int,
+    partida: int,
+    request: Request,
+    response: Response,
+    after: Optional[str] = None,
+    limit: Optional[int] = None,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Mesas de una partida por número de mesa. Admite paginación por clave
+    (`after`, `limit`) y selección de campos (`fields`).
+    """
+    # Responder 304 si el cliente ya tiene la versión actual de los datos
+    version = obtener_version(db, campeonato_id)
+    if version is not None:
+        etag = calcular_etag("mesas", campeonato_id, version, partida, after, limit, fields)
+        no_modificado = comprobar_etag(request, response, etag)
+        if no_modificado:
+            return no_modificado
     
-    # Agrupar resultados por mesa_id
-    mesas_por_id = {}
-    for resultado in resultados:
-        mesa_id = resultado.mesa_id
-        if mesa_id not in mesas_por_id:
-            mesas_por_id[mesa_id] = {
-                'id': mesa_id,
-                'parejas': []
-            }
-        
-        # Obtener la pareja completa
-        pareja = db.query(Pareja).filter(Pareja.id == resultado.pareja_id).first()
-        if pareja:
-            mesas_por_id[mesa_id]['parejas'].append(pareja)
-    
-    # Crear objetos Mesa a partir de los resultados reconstruidos
-    mesas_reconstruidas = []
-    for mesa_id, datos in mesas_por_id.items():
-        if len(datos['parejas']) > 0:
-            pareja1 = datos['parejas'][0] if len(datos['parejas']) > 0 else None
-            pareja2 = datos['parejas'][1] if len(datos['parejas']) > 1 else None
-            
-            # Crear una nueva mesa sin guardarla en la base de datos
-            mesa = Mesa(
-                id=mesa_id,
-                partida=partida,
-                pareja1_id=pareja1.id if pareja1 else None,
-                pareja2_id=pareja2.id if pareja2 else None,
-                campeonato_id=campeonato_id
-            )
-            
-            # Asignar manualmente las relaciones
-            mesa.pareja1 = pareja1
-            mesa.pareja2 = pareja2
-            
-            mesas_reconstruidas.append(mesa)
-    
-    # Ordenar mesas por id
-    mesas_reconstruidas.sort(key=lambda m: m.id)
-    print(f"Se reconstruyeron {len(mesas_reconstruidas)} mesas desde los resultados.")
-    
-    return mesas_reconstruidas
+    # Las mesas de todas las partidas se conservan: una consulta por la clave primaria
+    try:
+        mesas, siguiente, directo = listar_mesas(db, campeonato_id, partida, after, limit, fields)
+    except ErrorPaginacion as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return responder(mesas, response, siguiente, directo)
 
 @router.get("/{mesa_id}", response_model=MesaSchema)
-def get_mesa(mesa_id: int, db: Session = Depends(get_db)):
-    mesa = db.query(Mesa).filter(Mesa.id == mesa_id).first()
+def get_mesa(
+    mesa_id: int,
+    campeonato_id: Optional[int] = None,
+    partida: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Mesa de una partida. El número de mesa solo es único dentro de la partida
+    de un campeonato; sin `campeonato_id` se usa el campeonato activo y sin
+    `partida` su partida actual, como antes de conservar todas las mesas.
+    """
+    if campeonato_id is None or partida is None:
+        if campeonato_id is None:
+            campeonato = leer_campeonato_actual(db)
+        else:
+            campeonato = leer_campeonato(db, campeonato_id)
+        if not campeonato:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Campeonato no encontrado"
+            )
+        campeonato_id = campeonato.id
+        if partida is None:
+            partida = campeonato.partida_actual
+    
+    mesa = db.get(Mesa, (campeonato_id, partida, mesa_id))
     if not mesa:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -320,9 +317,15 @@ def eliminar_mesas_campeonato(campeonato_id: int, db: Session = Depends(get_db))
         
         # Eliminar todas las mesas del campeonato
         db.query(Mesa).filter(Mesa.campeonato_id == campeonato_id).delete()
+        recontar_partidas(db, campeonato_id)
+        reiniciar_orden_sorteo(db, campeonato_id)
+        borrar_rankings_partida(db, campeonato_id)
         
-        # Reiniciar la partida actual a 0
+        # Reiniciar la partida actual a 0; los resultados que queden ya no cuentan
         campeonato.partida_actual = 0
+        reconstruir_clasificacion(db, campeonato_id)
+        incrementar_version(db, campeonato_id)
+        publicar_evento(db, CAMPEONATO_ACTUALIZADO, campeonato_id)
         
         db.commit()
         return {"message": "Mesas eliminadas exitosamente"}
@@ -1,32 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Response
 from sqlalchemy.orm import Session, joinedload
-from typing import List
+from typing import List, Optional
 from ..database import get_db
 from ..models import Pareja, Jugador, Campeonato, Resultado
-from ..schemas import ParejaCreate, Pareja as ParejaSchema
-from sqlalchemy import desc
+from ..schemas import ParejaCreate, Pareja as ParejaSchema, ImportacionParejasRespuesta
+from ..services.version import incrementar_version
+from ..services.eventos import publicar_evento, PAREJA_ACTUALIZADA
+from ..services.importacion import leer_filas, validar_filas, ErrorFormato
+from ..services.listados import listar_parejas
+from ..services.paginacion import ErrorPaginacion, responder
+from sqlalchemy import desc, insert, tuple_
 
 router = APIRouter(prefix="/parejas", tags=["parejas"])
 
 def verificar_nombres_duplicados(db: Session, jugadores_data: List[dict], campeonato_id: int, pareja_id: int = None):
     """Verifica que no haya jugadores con el mismo nombre y apellido en el campeonato"""
-    for jugador in jugadores_data:
-        nombre = jugador["nombre"]
-        apellido = jugador["apellido"]
-        
-        # Construir la consulta base
-        query = db.query(Jugador).join(Pareja).filter(
-            Jugador.nombre == nombre,
-            Jugador.apellido == apellido,
-            Pareja.campeonato_id == campeonato_id
-        )
-        
-        # Si estamos actualizando, excluir la pareja actual
-        if pareja_id:
-            query = query.filter(Pareja.id != pareja_id)
-        
-        # Verificar si existe un jugador con el mismo nombre y apellido
-        if query.first():
+    claves = [(jugador["nombre"], jugador["apellido"]) for jugador in jugadores_data]
+    if not claves:
+        return
+    
+    # Una sola consulta para todos los jugadores
+    query = db.query(Jugador.nombre, Jugador.apellido).join(Pareja).filter(
+        tuple_(Jugador.nombre, Jugador.apellido).in_(claves),
+        Pareja.campeonato_id == campeonato_id
+    )
+    
+    # Si estamos actualizando, excluir la pareja actual
+    if pareja_id:
+        query = query.filter(Pareja.id != pareja_id)
+    
+    # Verificar si existe un jugador con el mismo nombre y apellido
+    existentes = {tuple(fila) for fila in query.all()}
+    for nombre, apellido in claves:
+        if (nombre, apellido) in existentes:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Ya existe un jugador con nombre {nombre} {apellido} en el campeonato"
@@ -80,6 +86,8 @@ def create_pareja(pareja: ParejaCreate, db: Session = Depends(get_db)):
             )
             db.add(db_jugador)
         
+        incrementar_version(db, pareja.campeonato_id)
+        publicar_evento(db, PAREJA_ACTUALIZADA, pareja.campeonato_id, pareja=db_pareja.id, activa=db_pareja.activa)
         db.commit()
         db.refresh(db_pareja)
         return db_pareja
@@ -90,12 +98,82 @@ def create_pareja(pareja: ParejaCreate, db: Session = Depends(get_db)):
             detail=f"Error al crear la pareja: {str(e)}"
         )
 
+@router.post("/import", response_model=ImportacionParejasRespuesta)
+def importar_parejas(campeonato_id: int, archivo: UploadFile = File(...), db: Session = Depends(get_db)):
+    """
+    Inscribe las parejas de un fichero CSV o XLSX (ver services/importacion.py)
+    en una sola transacción. Las filas con errores se devuelven en `errores`
+    y no impiden guardar las demás.
+    """
+    campeonato = db.query(Campeonato).filter(Campeonato.id == campeonato_id).first()
+    if not campeonato:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Campeonato no encontrado"
+        )
+    
+    if campeonato.partida_actual > 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No se pueden crear parejas una vez iniciado el campeonato"
+        )
+    
+    try:
+        parejas, errores = validar_filas(db, leer_filas(archivo.file, archivo.filename), campeonato_id)
+    except ErrorFormato as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    if not parejas:
+        return {"creadas": 0, "errores": errores}
+    
+    try:
+        # Inserción en bloque; los ids vuelven en el orden de las filas
+        pareja_ids = db.scalars(
+            insert(Pareja).returning(Pareja.id, sort_by_parameter_order=True),
+            [
+                dict(nombre=p["nombre"], club_pertenencia=p["club_pertenencia"],
+                     activa=p["activa"], gb=False, campeonato_id=campeonato_id)
+                for p in parejas
+            ]
+        ).all()
+        db.execute(insert(Jugador), [
+            dict(nombre=nombre, apellido=apellido, pareja_id=pareja_id, campeonato_id=campeonato_id)
+            for pareja_id, pareja in zip(pareja_ids, parejas)
+            for nombre, apellido in pareja["jugadores"]
+        ])
+        
+        incrementar_version(db, campeonato_id)
+        publicar_evento(db, PAREJA_ACTUALIZADA, campeonato_id, importadas=len(pareja_ids))
+        db.commit()
+        return {"creadas": len(pareja_ids), "errores": errores}
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al importar las parejas: {str(e)}"
+        )
+
 @router.get("/", response_model=List[ParejaSchema])
-def get_parejas(campeonato_id: int, db: Session = Depends(get_db)):
-    return db.query(Pareja)\
-             .filter(Pareja.campeonato_id == campeonato_id)\
-             .order_by(desc(Pareja.id))\
-             .all()
+def get_parejas(
+    campeonato_id: int,
+    response: Response,
+    after: Optional[str] = None,
+    limit: Optional[int] = None,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Parejas del campeonato por id descendente. Admite paginación por clave
+    (`after`, `limit`) y selección de campos (`fields`).
+    """
+    try:
+        parejas, siguiente, directo = listar_parejas(db, campeonato_id, after, limit, fields)
+    except ErrorPaginacion as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return responder(parejas, response, siguiente, directo)
 
 @router.get("/{pareja_id}", response_model=ParejaSchema)
 def get_pareja(pareja_id: int, db: Session = Depends(get_db)):
@@ -165,6 +243,8 @@ def update_pareja(pareja_id: int, pareja_update: ParejaCreate, db: Session = Dep
             )
             db.add(db_jugador)
         
+        incrementar_version(db, pareja.campeonato_id)
+        publicar_evento(db, PAREJA_ACTUALIZADA, pareja.campeonato_id, pareja=pareja_id, activa=pareja.activa)
         db.commit()
         db.refresh(pareja)
         return pareja
@@ -189,6 +269,8 @@ def toggle_pareja_activa(pareja_id: int, db: Session = Depends(get_db)):
             )
         
         pareja.activa = not pareja.activa
+        incrementar_version(db, pareja.campeonato_id)
+        publicar_evento(db, PAREJA_ACTUALIZADA, pareja.campeonato_id, pareja=pareja_id, activa=pareja.activa)
         db.commit()
         db.refresh(pareja)
         return pareja
@@ -230,6 +312,8 @@ def delete_pareja(pareja_id: int, db: Session = Depends(get_db)):
         
         # Eliminar la pareja
         db.delete(pareja)
+        incrementar_version(db, pareja.campeonato_id)
+        publicar_evento(db, PAREJA_ACTUALIZADA, pareja.campeonato_id, pareja=pareja_id, activa=False)
         db.commit()
         
         return {"message": "Pareja eliminada correctamente"}
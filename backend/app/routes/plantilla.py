@@ -1,11 +1,15 @@
-from fastapi import APIRouter, File, UploadFile, HTTPException, status, Request
+from fastapi import APIRouter, File, UploadFile, HTTPException, status, Request, BackgroundTasks
 from fastapi.responses import FileResponse
+from starlette.concurrency import run_in_threadpool
 import os
 import random
-import shutil
 import logging
 import pathlib
 from typing import Optional
+from ..estaticos import version_archivo
+from ..services.subidas import (
+    ErrorSubida, SubidaDemasiadoGrande, extension_imagen, guardar_subida, generar_variantes, urls_subida
+)
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -20,43 +24,75 @@ PLANTILLAS_DIR = BASE_DIR / "static" / "plantillas"
 # Crear el directorio si no existe
 os.makedirs(PLANTILLAS_DIR, exist_ok=True)
 
-# Nombre fijo para la plantilla de mesas
+# Nombre fijo con el que se guardaba la plantilla de mesas antes de guardarlas
+# por contenido. Se sigue sirviendo si no se ha subido ninguna desde entonces
 PLANTILLA_MESAS_FILENAME = "plantilla_mesas.png"
 
+# Fichero con el nombre de la plantilla de mesas actual
+PLANTILLA_MESAS_ACTUAL = PLANTILLAS_DIR / "plantilla_mesas.actual"
+
+def plantilla_mesas_actual() -> Optional[str]:
+    """Nombre del fichero de la plantilla de mesas actual, o None si no hay"""
+    try:
+        nombre = PLANTILLA_MESAS_ACTUAL.read_text().strip()
+        if nombre and (PLANTILLAS_DIR / nombre).exists():
+            return nombre
+    except FileNotFoundError:
+        pass
+    if (PLANTILLAS_DIR / PLANTILLA_MESAS_FILENAME).exists():
+        return PLANTILLA_MESAS_FILENAME
+    return None
+
+def guardar_plantilla_mesas_actual(nombre: str):
+    """Cambia la plantilla actual de forma atómica (escritura y os.replace)"""
+    temporal = PLANTILLA_MESAS_ACTUAL.with_name(PLANTILLA_MESAS_ACTUAL.name + ".tmp")
+    temporal.write_text(nombre)
+    os.replace(temporal, PLANTILLA_MESAS_ACTUAL)
+
+def urls_plantilla(base_url: str, nombre: str) -> dict:
+    prefijo = f"{base_url}/static/plantillas"
+    if nombre == PLANTILLA_MESAS_FILENAME:
+        # Nombre fijo: la versión depende de la fecha de modificación
+        version = version_archivo(PLANTILLAS_DIR / nombre)
+    else:
+        version = nombre[:12]
+    return urls_subida(prefijo, nombre, version)
+
 @router.post("/mesas", status_code=status.HTTP_201_CREATED)
-async def upload_plantilla_mesas(request: Request, file: UploadFile = File(...)):
+async def upload_plantilla_mesas(request: Request, background_tasks: BackgroundTasks, file: UploadFile = File(...)):
     """
-    Sube una imagen de plantilla para las mesas y la guarda con un nombre fijo
+    Sube una imagen de plantilla para las mesas y la marca como la actual.
+    Devuelve su URL y las de sus variantes reducidas, que se generan en
+    segundo plano.
     """
     try:
         logger.info(f"Subiendo plantilla de mesas: {file.filename}")
         
         # Validar el tipo de archivo
-        if not file.content_type.startswith("image/"):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="El archivo debe ser una imagen"
-            )
-        
-        # Definir la ruta completa del archivo
-        file_path = PLANTILLAS_DIR / PLANTILLA_MESAS_FILENAME
+        extension = extension_imagen(file)
         
-        # Guardar el archivo
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        # Guardar el archivo por bloques, con su sha256 como nombre
+        subida = await guardar_subida(file, PLANTILLAS_DIR, extension)
+        await run_in_threadpool(guardar_plantilla_mesas_actual, subida.nombre)
+        background_tasks.add_task(generar_variantes, subida.ruta)
         
         # Obtener la URL base del servidor
         base_url = str(request.base_url).rstrip('/')
         
-        # Construir URL completa
-        full_url = f"{base_url}/static/plantillas/{PLANTILLA_MESAS_FILENAME}"
+        # Construir URL completa, con la versión del fichero para que los
+        # navegadores no sigan mostrando la plantilla anterior
+        urls = urls_plantilla(base_url, subida.nombre)
         
         # Log para depuración
-        logger.info(f"URL completa generada: {full_url}")
+        logger.info(f"URL completa generada: {urls['url']}")
         
         # Devolver la URL completa para acceder al archivo
-        return {"url": full_url}
+        return urls
     
+    except SubidaDemasiadoGrande as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except ErrorSubida as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(f"Error al subir plantilla de mesas: {str(e)}")
         raise HTTPException(
@@ -67,11 +103,11 @@ async def upload_plantilla_mesas(request: Request, file: UploadFile = File(...))
 @router.get("/mesas")
 async def get_plantilla_mesas(request: Request):
     """
-    Devuelve la URL de la plantilla de mesas si existe
+    Devuelve la URL de la plantilla de mesas y de sus variantes si existe
     """
-    file_path = PLANTILLAS_DIR / PLANTILLA_MESAS_FILENAME
+    nombre = plantilla_mesas_actual()
     
-    if not os.path.exists(file_path):
+    if nombre is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No existe una plantilla de mesas"
@@ -80,10 +116,10 @@ async def get_plantilla_mesas(request: Request):
     # Obtener la URL base del servidor
     base_url = str(request.base_url).rstrip('/')
     
-    # Construir URL completa
-    full_url = f"{base_url}/static/plantillas/{PLANTILLA_MESAS_FILENAME}"
+    # Construir URL completa, con la versión del fichero
+    urls = urls_plantilla(base_url, nombre)
     
     # Log para depuración
-    logger.info(f"URL completa recuperada: {full_url}")
+    logger.info(f"URL completa recuperada: {urls['url']}")
     
-    return {"url": full_url} 
\ No newline at end of file
+    return urls
@@ -1,109 +1,76 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func, text, desc, asc, case
-from typing import List
-from ..database import get_db
-from ..models import Pareja, Resultado, Mesa, Campeonato
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
+from typing import List, Optional
+from ..database import get_async_db
+from ..models import Pareja, Clasificacion, RankingPartida
 from ..schemas.ranking import RankingPareja
+from ..services.version import calcular_etag, comprobar_etag
+from ..cache import leer_campeonato
+from ..services.serializacion import respuesta_json
+from ..services.ranking_partida import orden_ranking, consulta_ranking_historico, existe_ranking_partida
 
 router = APIRouter(prefix="/resultados", tags=["resultados"])
 
-@router.get("/ranking", response_model=List[RankingPareja])
-async def obtener_ranking(campeonato_id: int, db: Session = Depends(get_db)):
+def consulta_ranking(campeonato_id: int, partida_anterior: Optional[int] = None):
     """
-    Obtiene el ranking actual del campeonato.
-    Para la primera partida y siguientes, ordena según los criterios establecidos:
-    - GB ascendente (grupo A antes que B)
-    - PG como sumatorio descendente
-    - PP como sumatorio descendente (Diferencia)
-    - RT como sumatorio descendente (Puntos Totales)
-    - MG como sumatorio ascendente (Manos Ganadas)
+    Construye la consulta del ranking de un campeonato a partir de la tabla
+    de clasificación, con la posición de cada pareja en la clasificación
+    guardada de partida_anterior. Se usa también en scripts/explain_indices.py
+    para comprobar el plan de ejecución.
     """
-    # Primero obtener el campeonato para saber en qué partida estamos
-    campeonato = db.query(Campeonato).filter(Campeonato.id == campeonato_id).first()
-    if not campeonato:
-        raise HTTPException(status_code=404, detail="Campeonato no encontrado")
-
-    # Obtener el orden del sorteo inicial
-    orden_sorteo_subquery = db.query(
-        Mesa.pareja1_id.label('pareja_id'),
-        (Mesa.id * 2 - 1).label('orden')
-    ).filter(
-        Mesa.campeonato_id == campeonato_id,
-        Mesa.partida == 1
-    ).union(
-        db.query(
-            Mesa.pareja2_id.label('pareja_id'),
-            (Mesa.id * 2).label('orden')
-        ).filter(
-            Mesa.campeonato_id == campeonato_id,
-            Mesa.partida == 1,
-            Mesa.pareja2_id != None
-        )
-    ).subquery()
-
-    # Calcular sumatorios hasta la partida actual
-    resultados_subquery = db.query(
-        Resultado.pareja_id,
-        func.sum(Resultado.rt).label('rt'),
-        func.sum(Resultado.mg).label('mg'),
-        func.sum(Resultado.pp).label('pp'),
-        func.sum(Resultado.pg).label('pg'),
-        func.max(Resultado.partida).label('ultima_partida'),
-        func.count(Resultado.id).label('partidas_jugadas')
-    ).filter(
-        Resultado.campeonato_id == campeonato_id,
-        Resultado.partida <= campeonato.partida_actual  # Solo hasta la partida actual
-    ).group_by(
-        Resultado.pareja_id
-    ).subquery()
-
-    # Consulta principal
-    ranking_query = db.query(
+    ranking_query = select(
         Pareja.id.label('numero'),
         Pareja.nombre.label('nombre'),
         Pareja.club_pertenencia.label('club'),
         Pareja.gb.label('gb'),
-        func.coalesce(resultados_subquery.c.pp, 0).label('pp'),
-        func.coalesce(resultados_subquery.c.rt, 0).label('rt'),
-        func.coalesce(resultados_subquery.c.mg, 0).label('mg'),
-        func.coalesce(resultados_subquery.c.pg, 0).label('pg'),
-        func.coalesce(resultados_subquery.c.ultima_partida, 0).label('ultima_partida'),
-        func.coalesce(resultados_subquery.c.partidas_jugadas, 0).label('partidas_jugadas'),
-        orden_sorteo_subquery.c.orden.label('ordenSorteo')
+        func.coalesce(Clasificacion.pp, 0).label('pp'),
+        func.coalesce(Clasificacion.rt, 0).label('rt'),
+        func.coalesce(Clasificacion.mg, 0).label('mg'),
+        func.coalesce(Clasificacion.pg, 0).label('pg'),
+        func.coalesce(Clasificacion.ultima_partida, 0).label('ultima_partida'),
+        func.coalesce(Clasificacion.partidas_jugadas, 0).label('partidas_jugadas'),
+        Clasificacion.orden_sorteo.label('ordenSorteo'),
+        RankingPartida.posicion.label('posicion_anterior')
+    ).select_from(
+        Pareja
     ).outerjoin(
-        resultados_subquery,
-        Pareja.id == resultados_subquery.c.pareja_id
+        Clasificacion,
+        # Filtrar también por campeonato permite usar el índice de
+        # clasificaciones en lugar de recorrer la tabla completa
+        (Pareja.id == Clasificacion.pareja_id) &
+        (Clasificacion.campeonato_id == campeonato_id)
     ).outerjoin(
-        orden_sorteo_subquery,
-        Pareja.id == orden_sorteo_subquery.c.pareja_id
-    ).filter(
+        RankingPartida,
+        (Pareja.id == RankingPartida.pareja_id) &
+        (RankingPartida.campeonato_id == campeonato_id) &
+        (RankingPartida.partida == partida_anterior)
+    ).where(
         Pareja.campeonato_id == campeonato_id,
         Pareja.activa == True
     )
 
-    # Aplicar siempre los criterios de ordenación
-    # 1. GB ascendente (grupo A antes que B)
-    # 2. PG sumatorio descendente
-    # 3. PP (Diferencia) sumatorio descendente
-    # 4. RT (Puntos Totales) sumatorio descendente
-    # 5. MG (Manos Ganadas) sumatorio ascendente
-    # 6. Si todo es igual, usar el orden del sorteo inicial como desempate
-    ranking_query = ranking_query.order_by(
-        asc(Pareja.gb),  # GB ascendente (grupo A antes que B)
-        desc(func.coalesce(resultados_subquery.c.pg, 0)),  # PG descendente
-        desc(func.coalesce(resultados_subquery.c.pp, 0)),  # PP/Dif descendente
-        desc(func.coalesce(resultados_subquery.c.rt, 0)),  # RT/PT descendente
-        asc(func.coalesce(resultados_subquery.c.mg, 0)),   # MG ascendente
-        asc(orden_sorteo_subquery.c.orden)                # Sorteo inicial como desempate final
-    )
-
-    ranking = ranking_query.all()
+    # Mismos criterios que la clasificación guardada de cada partida
+    return ranking_query.order_by(*orden_ranking(
+        Pareja.gb,
+        func.coalesce(Clasificacion.pg, 0),
+        func.coalesce(Clasificacion.pp, 0),
+        func.coalesce(Clasificacion.rt, 0),
+        func.coalesce(Clasificacion.mg, 0),
+        Clasificacion.orden_sorteo
+    ))
 
-    # Convertir los resultados a diccionarios
+def ranking_a_diccionarios(ranking) -> List[dict]:
+    """
+    Convierte las filas de consulta_ranking o consulta_ranking_historico en
+    los diccionarios de RankingPareja, numerando las posiciones
+    """
     result = []
-    for r in ranking:
+    for posicion, r in enumerate(ranking, start=1):
         values = r._asdict()
+        posicion_anterior = values['posicion_anterior']
+        if posicion_anterior is not None:
+            posicion_anterior = int(posicion_anterior)
         pareja_dict = {
             'numero': int(values['numero']),
             'pareja_id': int(values['numero']),
@@ -116,8 +83,60 @@ async def obtener_ranking(campeonato_id: int, db: Session = Depends(get_db)):
             'pg': int(values['pg']),
             'rt': int(values['rt']),
             'mg': int(values['mg']),
-            'ordenSorteo': int(values['ordenSorteo'] or 0)
+            'ordenSorteo': int(values['ordenSorteo'] or 0),
+            'posicion': posicion,
+            'posicion_anterior': posicion_anterior,
+            'movimiento': posicion_anterior - posicion if posicion_anterior else 0
         }
         result.append(pareja_dict)
 
-    return result 
\ No newline at end of file
+    return result
+
+@router.get("/ranking", response_model=List[RankingPareja])
+async def obtener_ranking(
+    campeonato_id: int,
+    request: Request,
+    response: Response,
+    partida: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Obtiene el ranking actual del campeonato o, con `partida`, el de una
+    partida ya cerrada tal como quedó al cerrarla.
+    Para la primera partida y siguientes, ordena según los criterios establecidos:
+    - GB ascendente (grupo A antes que B)
+    - PG como sumatorio descendente
+    - PP como sumatorio descendente (Diferencia)
+    - RT como sumatorio descendente (Puntos Totales)
+    - MG como sumatorio ascendente (Manos Ganadas)
+    Cada pareja incluye su posición, la que tenía al cerrar la partida
+    anterior y el movimiento (positivo si sube).
+    """
+    # Primero obtener el campeonato para saber en qué partida estamos
+    campeonato = await db.run_sync(leer_campeonato, campeonato_id)
+    if not campeonato:
+        raise HTTPException(status_code=404, detail="Campeonato no encontrado")
+    if partida is not None and not 1 <= partida <= campeonato.partida_actual:
+        raise HTTPException(status_code=404, detail=f"La partida {partida} no se ha jugado en el campeonato")
+
+    # Si los datos no han cambiado desde la última petición del cliente,
+    # responder 304 sin ejecutar la consulta del ranking
+    etag = calcular_etag("ranking", campeonato.id, campeonato.version, partida)
+    no_modificado = comprobar_etag(request, response, etag)
+    if no_modificado:
+        return no_modificado
+
+    guardado = partida is not None and await db.run_sync(existe_ranking_partida, campeonato_id, partida)
+    if partida is None or (partida == campeonato.partida_actual and not guardado):
+        # Los totales se mantienen en la tabla de clasificación al guardar cada resultado,
+        # por lo que el ranking es una única lectura sin agregaciones
+        consulta = consulta_ranking(campeonato_id, partida_anterior=campeonato.partida_actual - 1)
+    else:
+        # Partidas cerradas: clasificación guardada al cerrarlas, o calculada
+        # desde los resultados si es anterior a las clasificaciones guardadas
+        consulta = consulta_ranking_historico(campeonato, partida, guardado=guardado)
+    ranking = (await db.execute(consulta)).all()
+
+    # Las filas se convierten directamente en diccionarios de tipos básicos y
+    # se serializan con orjson, sin volver a validarlas contra RankingPareja
+    return respuesta_json(ranking_a_diccionarios(ranking), response)
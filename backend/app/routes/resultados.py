@@ -1,22 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import insert, select
 from typing import List, Optional
-from ..database import get_db
-from ..models import Resultado, Campeonato
-from ..schemas.resultado import ResultadoCreate
+from ..database import get_async_db
+from ..models import Resultado, Campeonato, Mesa
+from ..schemas.resultado import ResultadoCreate, ResultadoMesa, ResultadosPartidaRespuesta
+from ..services.clasificacion import actualizar_clasificacion, reconstruir_clasificacion
+from ..services.estado_partida import registrar_resultados_mesas
+from ..services.version import incrementar_version, obtener_version, calcular_etag, comprobar_etag
+from ..cache import leer_campeonato
+from ..services.eventos import publicar_evento, RESULTADO_GUARDADO, RANKING_ACTUALIZADO
+from ..services.listados import listar_resultados
+from ..services.paginacion import ErrorPaginacion, responder
 
 router = APIRouter(prefix="/resultados", tags=["resultados"])
 
 @router.post("/recalcular/{campeonato_id}")
-async def recalcular_valores(campeonato_id: int, db: Session = Depends(get_db)):
+async def recalcular_valores(campeonato_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Recalcula RT y MG para todos los resultados del campeonato
     """
     try:
         # Obtener todos los resultados del campeonato
-        resultados = db.query(Resultado).filter(
-            Resultado.campeonato_id == campeonato_id
-        ).all()
+        resultados = (await db.scalars(
+            select(Resultado).where(Resultado.campeonato_id == campeonato_id)
+        )).all()
 
         actualizados = 0
         # Actualizar cada resultado
@@ -26,18 +34,24 @@ async def recalcular_valores(campeonato_id: int, db: Session = Depends(get_db)):
                 resultado.mg = 1 if resultado.rp >= 150 else 0  # MG es 1 si ganó la mano
                 actualizados += 1
 
-        db.commit()
+        # Los totales de la clasificación dependen de RT y MG
+        await db.run_sync(reconstruir_clasificacion, campeonato_id)
+        await db.run_sync(incrementar_version, campeonato_id)
+        await db.run_sync(publicar_evento, RANKING_ACTUALIZADO, campeonato_id)
+
+        await db.commit()
         return {"message": f"Recalculados RT y MG para {actualizados} resultados"}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.put("/mesa/{mesa_id}")
 async def actualizar_resultados_mesa(
     mesa_id: int,
+    campeonato_id: int,
     resultado1: ResultadoCreate,
     resultado2: Optional[ResultadoCreate] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Actualiza los resultados de una mesa, calculando automáticamente los campos derivados:
@@ -46,17 +60,22 @@ async def actualizar_resultados_mesa(
     - MG: Se mantiene el valor del input
     - PP: Es RP de la pareja - RP de la pareja contraria
     - PG: Se determina según RT (no RP)
+    El número de mesa solo es único dentro de la partida de un campeonato.
     """
-    # Buscar resultados existentes para la mesa y partida
-    resultados_existentes = db.query(Resultado).filter(
-        Resultado.mesa_id == mesa_id,
-        Resultado.partida == resultado1.partida
-    ).all()
+    if any(r is not None and r.campeonato_id != campeonato_id for r in (resultado1, resultado2)):
+        raise HTTPException(status_code=400, detail="Los resultados no son del campeonato indicado")
+
+    # Buscar resultados existentes para la mesa y partida del campeonato
+    resultados_existentes = (await db.scalars(
+        select(Resultado).where(
+            Resultado.campeonato_id == campeonato_id,
+            Resultado.mesa_id == mesa_id,
+            Resultado.partida == resultado1.partida
+        )
+    )).all()
 
     # Obtener el campeonato para acceder a su PM
-    campeonato = db.query(Campeonato).filter(
-        Campeonato.id == resultado1.campeonato_id
-    ).first()
+    campeonato = await db.run_sync(leer_campeonato, campeonato_id)
     if not campeonato:
         raise HTTPException(status_code=404, detail="Campeonato no encontrado")
     
@@ -127,17 +146,98 @@ async def actualizar_resultados_mesa(
             actualizar_resultado(resultado_2_existente, resultado2, rp1)
 
     try:
-        db.commit()
+        # Actualizar la clasificación en la misma transacción
+        await db.run_sync(
+            actualizar_clasificacion,
+            campeonato.id,
+            [resultado1.pareja_id, resultado2.pareja_id if resultado2 else None]
+        )
+        await db.run_sync(incrementar_version, campeonato.id)
+        await db.run_sync(publicar_evento, RESULTADO_GUARDADO, campeonato.id, mesa=mesa_id, partida=resultado1.partida)
+        await db.run_sync(publicar_evento, RANKING_ACTUALIZADO, campeonato.id)
+        await db.commit()
         return {"message": "Resultados actualizados correctamente"}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
+def calcular_resultados_mesa(
+    campeonato: Campeonato,
+    resultado1: ResultadoCreate,
+    resultado2: Optional[ResultadoCreate] = None
+) -> List[dict]:
+    """
+    Calcula los valores a guardar para los resultados de una mesa según el PM
+    del campeonato. Devuelve una fila (dict) por pareja.
+    """
+    # Si solo hay una pareja, valores calculados en base al PM
+    if resultado2 is None:
+        # Cálculo del RT exacto como PM/2
+        rt_valor = campeonato.pm / 2
+        return [dict(
+            pareja_id=resultado1.pareja_id,
+            mesa_id=resultado1.mesa_id,
+            partida=resultado1.partida,
+            campeonato_id=resultado1.campeonato_id,
+            rt=rt_valor,  # RT = PM/2
+            mg=resultado1.mg,
+            rp=rt_valor,  # RP = RT
+            pg=1,         # PG fijo de 1
+            pp=rt_valor,  # PP = RT
+            gb=resultado1.gb
+        )]
+
+    # Límite de RT (PM+129)
+    limite_rt = campeonato.pm + 129
+    
+    # RT debe mantener su valor original (limitado a PM+129)
+    rt1 = min(resultado1.rt, limite_rt)
+    rt2 = min(resultado2.rt, limite_rt)
+    
+    # RP está limitado por PM
+    rp1 = min(resultado1.rt, campeonato.pm)
+    rp2 = min(resultado2.rt, campeonato.pm)
+    
+    # PP basado en RP
+    pp1 = rp1 - rp2
+    pp2 = rp2 - rp1
+    
+    # PG basado en RP (no en RT)
+    pg1 = 1 if rp1 > rp2 else 0
+    pg2 = 1 if rp2 > rp1 else 0
+
+    return [
+        dict(
+            pareja_id=resultado1.pareja_id,
+            mesa_id=resultado1.mesa_id,
+            partida=resultado1.partida,
+            campeonato_id=resultado1.campeonato_id,
+            rt=rt1,      # RT conserva valor original (limitado a PM+129)
+            mg=resultado1.mg,
+            rp=rp1,      # RP limitado a PM
+            pg=pg1,      # PG basado en RT
+            pp=pp1,      # PP basado en RP
+            gb=resultado1.gb
+        ),
+        dict(
+            pareja_id=resultado2.pareja_id,
+            mesa_id=resultado2.mesa_id,
+            partida=resultado2.partida,
+            campeonato_id=resultado2.campeonato_id,
+            rt=rt2,      # RT conserva valor original (limitado a PM+129)
+            mg=resultado2.mg,
+            rp=rp2,      # RP limitado a PM
+            pg=pg2,      # PG basado en RT
+            pp=pp2,      # PP basado en RP
+            gb=resultado2.gb
+        )
+    ]
+
 @router.post("")
 async def crear_resultados(
     resultado1: ResultadoCreate,
     resultado2: Optional[ResultadoCreate] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Crea nuevos resultados para una mesa.
@@ -154,110 +254,171 @@ async def crear_resultados(
     """
     try:
         # Obtener el campeonato para acceder a su PM
-        campeonato = db.query(Campeonato).filter(
-            Campeonato.id == resultado1.campeonato_id
-        ).first()
+        campeonato = await db.run_sync(leer_campeonato, resultado1.campeonato_id)
         if not campeonato:
             raise HTTPException(status_code=404, detail="Campeonato no encontrado")
 
-        # Si solo hay una pareja, valores calculados en base al PM
-        if resultado2 is None:
-            # Cálculo del RT exacto como PM/2
-            rt_valor = campeonato.pm / 2
-            nuevo_resultado1 = Resultado(
-                pareja_id=resultado1.pareja_id,
-                mesa_id=resultado1.mesa_id,
-                partida=resultado1.partida,
-                campeonato_id=resultado1.campeonato_id,
-                rt=rt_valor,  # RT = PM/2
-                mg=resultado1.mg,
-                rp=rt_valor,  # RP = RT
-                pg=1,         # PG fijo de 1
-                pp=rt_valor,  # PP = RT
-                gb=resultado1.gb
-            )
-            db.add(nuevo_resultado1)
-        else:
-            # Límite de RT (PM+129)
-            limite_rt = campeonato.pm + 129
-            
-            # RT debe mantener su valor original (limitado a PM+129)
-            rt1 = min(resultado1.rt, limite_rt)
-            rt2 = min(resultado2.rt, limite_rt)
-            
-            # RP está limitado por PM
-            rp1 = min(resultado1.rt, campeonato.pm)
-            rp2 = min(resultado2.rt, campeonato.pm)
-            
-            # PP basado en RP
-            pp1 = rp1 - rp2
-            pp2 = rp2 - rp1
-            
-            # PG basado en RP (no en RT)
-            pg1 = 1 if rp1 > rp2 else 0
-            pg2 = 1 if rp2 > rp1 else 0
+        for fila in calcular_resultados_mesa(campeonato, resultado1, resultado2):
+            db.add(Resultado(**fila))
+        await db.run_sync(registrar_resultados_mesas, campeonato.id, resultado1.partida, [resultado1.mesa_id])
 
-            nuevo_resultado1 = Resultado(
-                pareja_id=resultado1.pareja_id,
-                mesa_id=resultado1.mesa_id,
-                partida=resultado1.partida,
-                campeonato_id=resultado1.campeonato_id,
-                rt=rt1,      # RT conserva valor original (limitado a PM+129)
-                mg=resultado1.mg,
-                rp=rp1,      # RP limitado a PM
-                pg=pg1,      # PG basado en RT
-                pp=pp1,      # PP basado en RP
-                gb=resultado1.gb
-            )
-            db.add(nuevo_resultado1)
+        # Actualizar la clasificación en la misma transacción
+        await db.run_sync(
+            actualizar_clasificacion,
+            campeonato.id,
+            [resultado1.pareja_id, resultado2.pareja_id if resultado2 else None]
+        )
+        await db.run_sync(incrementar_version, campeonato.id)
+        await db.run_sync(publicar_evento, RESULTADO_GUARDADO, campeonato.id, mesa=resultado1.mesa_id, partida=resultado1.partida)
+        await db.run_sync(publicar_evento, RANKING_ACTUALIZADO, campeonato.id)
 
-            nuevo_resultado2 = Resultado(
-                pareja_id=resultado2.pareja_id,
-                mesa_id=resultado2.mesa_id,
-                partida=resultado2.partida,
-                campeonato_id=resultado2.campeonato_id,
-                rt=rt2,      # RT conserva valor original (limitado a PM+129)
-                mg=resultado2.mg,
-                rp=rp2,      # RP limitado a PM
-                pg=pg2,      # PG basado en RT
-                pp=pp2,      # PP basado en RP
-                gb=resultado2.gb
+        await db.commit()
+        return {"message": "Resultados creados correctamente"}
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/partida/{partida}/bulk", response_model=ResultadosPartidaRespuesta)
+async def crear_resultados_partida(
+    partida: int,
+    campeonato_id: int,
+    mesas: List[ResultadoMesa],
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Crea los resultados de varias mesas de una partida en una sola transacción.
+    Aplica las mismas reglas que POST /resultados. Las mesas con errores de
+    validación se devuelven en `errores` y no impiden guardar las demás.
+    """
+    try:
+        campeonato = await db.run_sync(leer_campeonato, campeonato_id)
+        if not campeonato:
+            raise HTTPException(status_code=404, detail="Campeonato no encontrado")
+
+        # Mesas de la partida y resultados ya guardados, en una consulta cada uno
+        mesas_partida = {
+            mesa.id: mesa
+            for mesa in (await db.scalars(
+                select(Mesa).where(
+                    Mesa.campeonato_id == campeonato_id,
+                    Mesa.partida == partida
+                )
+            )).all()
+        }
+        existentes = (await db.execute(
+            select(Resultado.mesa_id, Resultado.pareja_id).where(
+                Resultado.campeonato_id == campeonato_id,
+                Resultado.partida == partida
             )
-            db.add(nuevo_resultado2)
+        )).all()
+        mesas_con_resultado = {r.mesa_id for r in existentes}
+        parejas_con_resultado = {r.pareja_id for r in existentes}
 
-        db.commit()
-        return {"message": "Resultados creados correctamente"}
+        errores = []
+        filas = []
+        mesas_validas = []
+        for indice, item in enumerate(mesas):
+            r1, r2 = item.resultado1, item.resultado2
+            mesa_id = r1.mesa_id
+
+            def error(detalle):
+                errores.append({"indice": indice, "mesa_id": mesa_id, "detalle": detalle})
+
+            resultados_item = [r for r in (r1, r2) if r is not None]
+            if mesa_id is None or any(r.mesa_id != mesa_id for r in resultados_item):
+                error("Los resultados deben indicar la misma mesa")
+                continue
+            if any(r.campeonato_id != campeonato_id or r.partida != partida for r in resultados_item):
+                error(f"Los resultados deben ser del campeonato {campeonato_id} y la partida {partida}")
+                continue
+
+            mesa = mesas_partida.get(mesa_id)
+            if mesa is None:
+                error(f"La mesa {mesa_id} no existe en la partida {partida}")
+                continue
+            parejas_mesa = {mesa.pareja1_id, mesa.pareja2_id} - {None}
+            parejas_item = {r.pareja_id for r in resultados_item}
+            if parejas_item != parejas_mesa:
+                error(f"Las parejas no coinciden con las de la mesa {mesa_id}")
+                continue
+            if mesa_id in mesas_con_resultado or parejas_item & parejas_con_resultado:
+                error(f"La mesa {mesa_id} ya tiene resultados en la partida {partida}")
+                continue
+
+            filas.extend(calcular_resultados_mesa(campeonato, r1, r2))
+            mesas_con_resultado.add(mesa_id)
+            parejas_con_resultado.update(parejas_item)
+            mesas_validas.append(mesa_id)
+
+        if filas:
+            # Inserción en bloque de todas las mesas válidas
+            await db.execute(insert(Resultado), filas)
+            await db.run_sync(registrar_resultados_mesas, campeonato_id, partida, mesas_validas)
+
+            await db.run_sync(actualizar_clasificacion, campeonato_id, [f["pareja_id"] for f in filas])
+            await db.run_sync(incrementar_version, campeonato_id)
+            await db.run_sync(publicar_evento, RESULTADO_GUARDADO, campeonato_id, partida=partida, mesas=mesas_validas)
+            await db.run_sync(publicar_evento, RANKING_ACTUALIZADO, campeonato_id)
+            await db.commit()
+
+        return {"creados": len(mesas_validas), "errores": errores}
+    except HTTPException:
+        raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/campeonato/{campeonato_id}", response_model=List[ResultadoCreate])
-async def obtener_resultados_campeonato(campeonato_id: int, db: Session = Depends(get_db)):
+async def obtener_resultados_campeonato(
+    campeonato_id: int,
+    request: Request,
+    response: Response,
+    after: Optional[str] = None,
+    limit: Optional[int] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
     """
-    Obtiene todos los resultados de un campeonato
+    Obtiene los resultados de un campeonato por partida y pareja. Admite
+    paginación por clave (`after` = `partida:pareja_id`, `limit`) y selección
+    de campos (`fields`).
     """
     try:
-        resultados = db.query(Resultado).filter(
-            Resultado.campeonato_id == campeonato_id
-        ).all()
-        return resultados
+        # Responder 304 si el cliente ya tiene la versión actual de los datos
+        version = await db.run_sync(obtener_version, campeonato_id)
+        if version is not None:
+            etag = calcular_etag("resultados", campeonato_id, version, after, limit, fields)
+            no_modificado = comprobar_etag(request, response, etag)
+            if no_modificado:
+                return no_modificado
+
+        resultados, siguiente, directo = await db.run_sync(
+            listar_resultados, campeonato_id, after, limit, fields
+        )
+        return responder(resultados, response, siguiente, directo)
+    except ErrorPaginacion as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/mesa/{mesa_id}")
 async def obtener_resultados_mesa(
     mesa_id: int,
+    campeonato_id: int,
     partida: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Obtiene los resultados de una mesa específica para una partida
+    Obtiene los resultados de una mesa específica para una partida de un campeonato
     """
     try:
-        resultados = db.query(Resultado).filter(
-            Resultado.mesa_id == mesa_id,
-            Resultado.partida == partida
-        ).all()
+        resultados = (await db.scalars(
+            select(Resultado).where(
+                Resultado.campeonato_id == campeonato_id,
+                Resultado.mesa_id == mesa_id,
+                Resultado.partida == partida
+            )
+        )).all()
         return resultados
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
@@ -1,13 +1,15 @@
 from .campeonato import CampeonatoBase, CampeonatoCreate, CampeonatoResponse
 from .jugador import JugadorBase, JugadorCreate, Jugador
 from .mesa import MesaBase, MesaCreate, Mesa
-from .pareja import ParejaBase, ParejaCreate, Pareja
-from .resultado import ResultadoBase, ResultadoCreate, Resultado
+from .pareja import ParejaBase, ParejaCreate, Pareja, ImportacionParejasRespuesta
+from .resultado import ResultadoBase, ResultadoCreate, Resultado, ResultadoMesa, ResultadosPartidaRespuesta
+from .dashboard import EstadoPartida, Dashboard
 
 __all__ = [
     "CampeonatoBase", "CampeonatoCreate", "CampeonatoResponse",
     "JugadorBase", "JugadorCreate", "Jugador",
     "MesaBase", "MesaCreate", "Mesa",
-    "ParejaBase", "ParejaCreate", "Pareja",
-    "ResultadoBase", "ResultadoCreate", "Resultado"
+    "ParejaBase", "ParejaCreate", "Pareja", "ImportacionParejasRespuesta",
+    "ResultadoBase", "ResultadoCreate", "Resultado", "ResultadoMesa", "ResultadosPartidaRespuesta",
+    "EstadoPartida", "Dashboard"
 ]
@@ -29,6 +29,7 @@ class CampeonatoResponse(CampeonatoBase):
     id: int
     activo: bool
     partida_actual: int
+    version: int = 0
 
     class Config:
         from_attributes = True
\ No newline at end of file
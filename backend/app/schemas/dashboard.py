@@ -0,0 +1,19 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List
+from .campeonato import CampeonatoResponse
+from .ranking import RankingPareja
+
+class EstadoPartida(BaseModel):
+    partida: int
+    mesas: int = Field(description="Mesas de la partida")
+    mesas_con_resultado: int = Field(description="Mesas con el resultado guardado")
+    completa: bool = Field(description="Todas las mesas tienen resultado")
+
+class Dashboard(BaseModel):
+    version: int = Field(description="Versión de datos del campeonato en la que se han leído todos los datos")
+    campeonato: CampeonatoResponse
+    partida: int = Field(description="Partida actual")
+    mesas: List[Dict[str, Any]] = Field(description="Mesas de la partida actual (id, partida, pareja1_id, pareja2_id)")
+    resultados: List[Dict[str, Any]] = Field(description="Resultados de la partida actual")
+    ranking: List[RankingPareja]
+    estado_partida: EstadoPartida
@@ -18,4 +18,12 @@ class Pareja(ParejaBase):
     jugadores: List[Jugador] = []
     
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True 
+
+class ErrorImportacionFila(BaseModel):
+    fila: int
+    detalle: str
+
+class ImportacionParejasRespuesta(BaseModel):
+    creadas: int
+    errores: List[ErrorImportacionFila] = []
@@ -1,4 +1,5 @@
 from pydantic import BaseModel, Field
+from typing import Optional
 
 class RankingPareja(BaseModel):
     numero: int
@@ -13,6 +14,9 @@ class RankingPareja(BaseModel):
     rt: int = Field(default=0, description="Resultado Total (suma de todos los RT)")
     mg: int = Field(default=0, description="Manos Ganadas (suma de todos los MG)")
     ordenSorteo: int = Field(default=0, description="Orden del sorteo inicial para la primera partida")
+    posicion: int = Field(default=0, description="Posición en el ranking")
+    posicion_anterior: Optional[int] = Field(default=None, description="Posición al cerrar la partida anterior")
+    movimiento: int = Field(default=0, description="Puestos ganados (positivo) o perdidos (negativo) respecto a la partida anterior")
     
     class Config:
         from_attributes = True
@@ -29,6 +33,9 @@ class RankingPareja(BaseModel):
                 "pg": 1,
                 "rt": 150,
                 "mg": 1,
-                "ordenSorteo": 1
+                "ordenSorteo": 1,
+                "posicion": 1,
+                "posicion_anterior": 3,
+                "movimiento": 2
             }
         } 
\ No newline at end of file
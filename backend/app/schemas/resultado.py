@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 
 class ResultadoBase(BaseModel):
     rp: int = Field(ge=0)
@@ -23,4 +23,18 @@ class Resultado(ResultadoBase):
     campeonato_id: int
     
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True
+
+class ResultadoMesa(BaseModel):
+    """Resultados de una mesa dentro de un envío masivo de la partida"""
+    resultado1: ResultadoCreate
+    resultado2: Optional[ResultadoCreate] = None
+
+class ErrorResultadoMesa(BaseModel):
+    indice: int
+    mesa_id: Optional[int] = None
+    detalle: str
+
+class ResultadosPartidaRespuesta(BaseModel):
+    creados: int
+    errores: List[ErrorResultadoMesa] = []
@@ -0,0 +1,199 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func, insert, update
+from typing import Iterable, List, Optional
+from ..models import Campeonato, Clasificacion, Mesa, Pareja, Resultado
+
+# Columnas acumuladas que se comparan con los resultados originales
+CAMPOS_TOTALES = ["rt", "mg", "pp", "pg", "partidas_jugadas", "ultima_partida"]
+
+def _totales_resultados(db: Session, campeonato_id: int, pareja_ids: Optional[List[int]] = None):
+    """
+    Agrega por pareja los resultados hasta la partida actual del campeonato
+    (opcionalmente solo para algunas parejas). Los de partidas posteriores,
+    que quedan al reiniciar el campeonato, no cuentan.
+    """
+    query = db.query(
+        Resultado.pareja_id,
+        func.coalesce(func.sum(Resultado.rt), 0).label('rt'),
+        func.coalesce(func.sum(Resultado.mg), 0).label('mg'),
+        func.coalesce(func.sum(Resultado.pp), 0).label('pp'),
+        func.coalesce(func.sum(Resultado.pg), 0).label('pg'),
+        func.count(Resultado.id).label('partidas_jugadas'),
+        func.coalesce(func.max(Resultado.partida), 0).label('ultima_partida')
+    ).join(
+        Campeonato, Campeonato.id == Resultado.campeonato_id
+    ).filter(
+        Resultado.campeonato_id == campeonato_id,
+        Resultado.partida <= Campeonato.partida_actual
+    )
+    if pareja_ids is not None:
+        query = query.filter(Resultado.pareja_id.in_(pareja_ids))
+    
+    return {
+        fila.pareja_id: {campo: int(getattr(fila, campo)) for campo in CAMPOS_TOTALES}
+        for fila in query.group_by(Resultado.pareja_id).all()
+    }
+
+def _orden_sorteo(db: Session, campeonato_id: int):
+    """Orden del sorteo inicial a partir de las mesas de la primera partida"""
+    mesas = db.query(Mesa.numero, Mesa.pareja1_id, Mesa.pareja2_id).filter(
+        Mesa.campeonato_id == campeonato_id,
+        Mesa.partida == 1
+    ).all()
+    
+    orden = {}
+    for mesa in mesas:
+        orden[mesa.pareja1_id] = mesa.numero * 2 - 1
+        if mesa.pareja2_id is not None:
+            orden[mesa.pareja2_id] = mesa.numero * 2
+    return orden
+
+def actualizar_clasificacion(db: Session, campeonato_id: int, pareja_ids: Iterable[int]):
+    """
+    Recalcula la clasificación de las parejas indicadas a partir de sus resultados.
+    No hace commit: se ejecuta dentro de la transacción del resultado que la provoca.
+    """
+    pareja_ids = sorted({p for p in pareja_ids if p is not None})
+    if not pareja_ids:
+        return
+    
+    # Asegurar que los resultados pendientes de la sesión entran en el cálculo
+    db.flush()
+    
+    totales = _totales_resultados(db, campeonato_id, pareja_ids)
+    existentes = {
+        fila.pareja_id
+        for fila in db.query(Clasificacion.pareja_id).filter(Clasificacion.pareja_id.in_(pareja_ids)).all()
+    }
+    filas = [
+        {"pareja_id": pareja_id, **{campo: totales.get(pareja_id, {}).get(campo, 0) for campo in CAMPOS_TOTALES}}
+        for pareja_id in pareja_ids
+    ]
+    
+    # Una sentencia (executemany) para todas las filas: el flush de objetos
+    # haría un UPDATE por pareja en los motores sin rowcount de executemany
+    actualizadas = [fila for fila in filas if fila["pareja_id"] in existentes]
+    if actualizadas:
+        db.execute(update(Clasificacion), actualizadas)
+    nuevas = [
+        {**fila, "campeonato_id": campeonato_id, "orden_sorteo": 0}
+        for fila in filas if fila["pareja_id"] not in existentes
+    ]
+    if nuevas:
+        db.execute(insert(Clasificacion), nuevas)
+
+def registrar_orden_sorteo(db: Session, campeonato_id: int, mesas: Iterable[Mesa]):
+    """Guarda en la clasificación el orden del sorteo de las mesas de la primera partida"""
+    orden = {}
+    for mesa in mesas:
+        orden[mesa.pareja1_id] = mesa.numero * 2 - 1
+        if mesa.pareja2_id is not None:
+            orden[mesa.pareja2_id] = mesa.numero * 2
+    
+    filas = {
+        fila.pareja_id: fila
+        for fila in db.query(Clasificacion).filter(Clasificacion.campeonato_id == campeonato_id).all()
+    }
+    for pareja_id, posicion in orden.items():
+        fila = filas.get(pareja_id)
+        if fila is None:
+            fila = Clasificacion(
+                pareja_id=pareja_id,
+                campeonato_id=campeonato_id,
+                **{campo: 0 for campo in CAMPOS_TOTALES}
+            )
+            db.add(fila)
+        fila.orden_sorteo = posicion
+    
+    # Las parejas que no están en el sorteo (inactivas) pierden el orden anterior
+    for pareja_id, fila in filas.items():
+        if pareja_id not in orden:
+            fila.orden_sorteo = 0
+
+def reiniciar_orden_sorteo(db: Session, campeonato_id: int):
+    """Elimina el orden del sorteo cuando se borran las mesas del campeonato"""
+    db.query(Clasificacion).filter(
+        Clasificacion.campeonato_id == campeonato_id
+    ).update({"orden_sorteo": 0}, synchronize_session=False)
+
+def reconstruir_clasificacion(db: Session, campeonato_id: int) -> int:
+    """
+    Reconstruye desde cero la clasificación de un campeonato a partir de los
+    resultados. Hay que llamarla cuando cambia la partida actual de forma que
+    entran o salen resultados ya guardados (al reiniciar o borrar las mesas).
+    Si ya no quedan mesas de la primera partida se conserva el orden del sorteo guardado.
+    Devuelve el número de parejas reconstruidas. No hace commit.
+    """
+    db.flush()
+    
+    orden = _orden_sorteo(db, campeonato_id)
+    if not orden:
+        orden = {
+            fila.pareja_id: fila.orden_sorteo
+            for fila in db.query(Clasificacion.pareja_id, Clasificacion.orden_sorteo).filter(
+                Clasificacion.campeonato_id == campeonato_id
+            ).all()
+        }
+    
+    totales = _totales_resultados(db, campeonato_id)
+    pareja_ids = [
+        fila.id for fila in db.query(Pareja.id).filter(Pareja.campeonato_id == campeonato_id).all()
+    ]
+    
+    db.query(Clasificacion).filter(
+        Clasificacion.campeonato_id == campeonato_id
+    ).delete(synchronize_session=False)
+    
+    for pareja_id in pareja_ids:
+        valores = totales.get(pareja_id, {})
+        db.add(Clasificacion(
+            pareja_id=pareja_id,
+            campeonato_id=campeonato_id,
+            orden_sorteo=orden.get(pareja_id, 0),
+            **{campo: valores.get(campo, 0) for campo in CAMPOS_TOTALES}
+        ))
+    
+    db.flush()
+    return len(pareja_ids)
+
+def verificar_clasificacion(db: Session, campeonato_id: int) -> List[dict]:
+    """
+    Compara la clasificación guardada con los resultados originales.
+    Devuelve una lista con las diferencias encontradas (vacía si es coherente).
+    """
+    totales = _totales_resultados(db, campeonato_id)
+    orden = _orden_sorteo(db, campeonato_id)
+    filas = {
+        fila.pareja_id: fila
+        for fila in db.query(Clasificacion).filter(Clasificacion.campeonato_id == campeonato_id).all()
+    }
+    pareja_ids = [
+        fila.id for fila in db.query(Pareja.id).filter(Pareja.campeonato_id == campeonato_id).all()
+    ]
+    
+    diferencias = []
+    for pareja_id in pareja_ids:
+        esperado = totales.get(pareja_id, {})
+        fila = filas.get(pareja_id)
+        
+        for campo in CAMPOS_TOTALES:
+            valor_esperado = esperado.get(campo, 0)
+            valor_guardado = getattr(fila, campo) if fila else 0
+            if valor_guardado != valor_esperado:
+                diferencias.append({
+                    "pareja_id": pareja_id,
+                    "campo": campo,
+                    "guardado": valor_guardado,
+                    "esperado": valor_esperado
+                })
+        
+        # El orden del sorteo solo se puede comprobar mientras existan las mesas de la partida 1
+        if orden and (fila.orden_sorteo if fila else 0) != orden.get(pareja_id, 0):
+            diferencias.append({
+                "pareja_id": pareja_id,
+                "campo": "orden_sorteo",
+                "guardado": fila.orden_sorteo if fila else 0,
+                "esperado": orden.get(pareja_id, 0)
+            })
+    
+    return diferencias
@@ -0,0 +1,52 @@
+"""
+Datos de las pantallas del campeonato en una sola respuesta.
+
+Las pantallas de resultados y la cabecera necesitaban el campeonato activo,
+las mesas de la partida, el ranking y si faltan resultados, con cuatro o más
+peticiones que podían leer unas antes y otras después de una escritura.
+datos_dashboard lo lee todo en una transacción con lectura consistente
+(database.lectura_consistente), de modo que la versión devuelta corresponde
+exactamente a los datos.
+"""
+from typing import Optional
+from sqlalchemy.orm import Session
+from ..cache import DatosCampeonato
+from ..database import lectura_consistente
+from ..models import Campeonato, Resultado
+from .estado_partida import leer_estado_partida
+from .listados import CAMPOS_RESULTADO, listar_mesas
+from .paginacion import filas_a_diccionarios
+
+# Las parejas están en el ranking: las mesas solo llevan sus ids
+CAMPOS_MESA_DASHBOARD = "id,partida,pareja1_id,pareja2_id"
+
+def datos_dashboard(db: Session, campeonato_id: int) -> Optional[dict]:
+    """Contenido de GET /campeonatos/{id}/dashboard, o None si el campeonato no existe"""
+    # routes.campeonato importa este módulo: importarlo arriba sería circular
+    from ..routes.ranking import consulta_ranking, ranking_a_diccionarios
+    lectura_consistente(db)
+    fila = db.query(Campeonato).filter(Campeonato.id == campeonato_id).first()
+    if fila is None:
+        return None
+    campeonato = DatosCampeonato.desde_modelo(fila)
+    partida = campeonato.partida_actual
+
+    mesas, _, _ = listar_mesas(db, campeonato_id, partida, fields=CAMPOS_MESA_DASHBOARD)
+    resultados = filas_a_diccionarios(
+        db.query(*[getattr(Resultado, c) for c in CAMPOS_RESULTADO]).filter(
+            Resultado.campeonato_id == campeonato_id,
+            Resultado.partida == partida
+        ).order_by(Resultado.pareja_id),
+        CAMPOS_RESULTADO
+    )
+    ranking = db.execute(consulta_ranking(campeonato_id, partida_anterior=partida - 1)).all()
+
+    return {
+        "version": campeonato.version,
+        "campeonato": campeonato.a_diccionario(),
+        "partida": partida,
+        "mesas": mesas,
+        "resultados": resultados,
+        "ranking": ranking_a_diccionarios(ranking),
+        "estado_partida": leer_estado_partida(db, campeonato_id, partida)
+    }
@@ -0,0 +1,183 @@
+"""
+Estrategias de emparejamiento de las mesas de una partida.
+
+Cada estrategia recibe las parejas agrupadas por grupo GB y ordenadas por
+ranking, el historial de rivales y las parejas que ya descansaron, y devuelve
+las mesas como tuplas (pareja1_id, pareja2_id) con la pareja de mejor ranking
+a la izquierda. Una mesa con pareja2_id None es la pareja que descansa.
+
+- consecutivo: 1ª con 2ª, 3ª con 4ª... sin mirar el historial (por defecto).
+- suizo: empareja en orden de ranking evitando rivales repetidos.
+
+Las funciones de cálculo no tocan la base de datos, de modo que con muchas
+parejas se ejecutan en un proceso aparte y no bloquean el servidor.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+from sqlalchemy.orm import Session
+from ..models import Mesa
+from .emparejamiento_maximo import emparejamiento_peso_maximo
+
+Mesas = List[Tuple[int, Optional[int]]]
+
+ESTRATEGIA_POR_DEFECTO = os.getenv("EMPAREJAMIENTO_ESTRATEGIA", "consecutivo")
+
+# A partir de este número de parejas el cálculo se hace en el proceso auxiliar
+UMBRAL_PROCESO = int(os.getenv("EMPAREJAMIENTO_UMBRAL_PROCESO", "500"))
+
+# Mesas a cada lado de una repetición que se vuelven a emparejar en el sistema suizo
+RADIO_TRAMO = 4
+
+def historial_enfrentamientos(db: Session, campeonato_id: int, hasta_partida: int) -> Tuple[Dict[int, Set[int]], Set[int]]:
+    """
+    Rivales de cada pareja y parejas que ya han descansado, a partir de las
+    mesas guardadas de las partidas hasta `hasta_partida`: una pareja descansó
+    si estuvo sola en su mesa.
+    """
+    filas = db.query(Mesa.pareja1_id, Mesa.pareja2_id).filter(
+        Mesa.campeonato_id == campeonato_id,
+        Mesa.partida <= hasta_partida
+    ).all()
+
+    rivales: Dict[int, Set[int]] = {}
+    descansos: Set[int] = set()
+    for pareja1_id, pareja2_id in filas:
+        if pareja2_id is None:
+            descansos.add(pareja1_id)
+            continue
+        rivales.setdefault(pareja1_id, set()).add(pareja2_id)
+        rivales.setdefault(pareja2_id, set()).add(pareja1_id)
+    return rivales, descansos
+
+def contar_repetidos(mesas: Mesas, rivales: Dict[int, Set[int]]) -> int:
+    """Número de mesas cuyas parejas ya se habían enfrentado"""
+    return sum(1 for p1, p2 in mesas if p2 is not None and p2 in rivales.get(p1, ()))
+
+def emparejar_consecutivo(grupos: List[List[int]], rivales: Dict[int, Set[int]], descansos: Set[int]) -> Mesas:
+    """Parejas consecutivas del ranking; la última queda sola si son impares"""
+    orden = [p for grupo in grupos for p in grupo]
+    return [
+        (orden[i], orden[i + 1] if i + 1 < len(orden) else None)
+        for i in range(0, len(orden), 2)
+    ]
+
+def _emparejar_tramo(orden: List[int], rivales: Dict[int, Set[int]]) -> Mesas:
+    """
+    Empareja todas las parejas de `orden` (un número par, en orden de ranking)
+    con el mínimo de rivales repetidos y, entre esas soluciones, la menor
+    suma de los cuadrados de las distancias de ranking entre rivales. Es un
+    emparejamiento perfecto de peso máximo sobre el grafo completo.
+    """
+    n = len(orden)
+    # Una repetición pesa más que cualquier suma de distancias posible
+    repeticion = (n // 2) * (n - 1) ** 2 + 1
+    base = repeticion + (n - 1) ** 2 + 1
+    aristas = [
+        (i, j, base - (j - i) ** 2 - (repeticion if orden[j] in rivales.get(orden[i], ()) else 0))
+        for i in range(n) for j in range(i + 1, n)
+    ]
+    companero = emparejamiento_peso_maximo(aristas, cardinalidad_maxima=True)
+    return [(orden[i], orden[j]) for i, j in enumerate(companero) if i < j]
+
+def _emparejar_sin_repetir(orden: List[int], rivales: Dict[int, Set[int]]) -> Mesas:
+    """
+    Parte de las parejas consecutivas del ranking y vuelve a emparejar, de
+    forma exacta, un tramo de mesas alrededor de cada rival repetido. Si en
+    el tramo no hay solución sin repeticiones, se amplía al doble, hasta
+    abarcar el grupo entero: entonces el resultado tiene el mínimo posible
+    de repeticiones. `orden` debe tener un número par de parejas.
+    """
+    total = len(orden) // 2
+    mesas = [(orden[2 * m], orden[2 * m + 1]) for m in range(total)]
+    radio = RADIO_TRAMO
+    tramos: List[Tuple[int, int]] = []
+    while True:
+        repetidas = [m for m, (p1, p2) in enumerate(mesas) if p2 in rivales.get(p1, ())]
+        if not repetidas:
+            return mesas
+
+        # Tramos [inicio, fin) de mesas alrededor de las repeticiones, unidos
+        # con los ya resueltos que solapan para no partir ninguno
+        intervalos = sorted(
+            [(max(0, m - radio), min(total, m + radio + 1)) for m in repetidas] + tramos
+        )
+        unidos: List[List[int]] = []
+        for inicio, fin in intervalos:
+            if unidos and inicio < unidos[-1][1]:
+                unidos[-1][1] = max(unidos[-1][1], fin)
+            else:
+                unidos.append([inicio, fin])
+        tramos = [
+            (inicio, fin) for inicio, fin in unidos
+            if any(inicio <= m < fin for m in repetidas)
+        ]
+
+        for inicio, fin in tramos:
+            mesas[inicio:fin] = _emparejar_tramo(orden[2 * inicio:2 * fin], rivales)
+        if tramos == [(0, total)]:
+            return mesas
+        radio *= 2
+
+def emparejar_suizo(grupos: List[List[int]], rivales: Dict[int, Set[int]], descansos: Set[int]) -> Mesas:
+    """
+    Sistema suizo: cada grupo GB se empareja por separado en orden de ranking
+    sin repetir rivales. Si un grupo es impar, su última pareja baja a jugar
+    en el siguiente. Si el total es impar descansa la pareja peor clasificada
+    que todavía no haya descansado. Solo se repiten rivales si no hay ningún
+    emparejamiento del grupo que lo evite, y entonces los mínimos posibles.
+    """
+    grupos = [list(g) for g in grupos if g]
+    for k in range(len(grupos) - 1):
+        if len(grupos[k]) % 2:
+            grupos[k + 1].insert(0, grupos[k].pop())
+
+    descansa = None
+    if grupos and len(grupos[-1]) % 2:
+        ultimo = grupos[-1]
+        indice = next((k for k in range(len(ultimo) - 1, -1, -1) if ultimo[k] not in descansos), len(ultimo) - 1)
+        descansa = ultimo.pop(indice)
+
+    mesas = []
+    for grupo in grupos:
+        mesas.extend(_emparejar_sin_repetir(grupo, rivales))
+    if descansa is not None:
+        mesas.append((descansa, None))
+    return mesas
+
+ESTRATEGIAS = {
+    "consecutivo": emparejar_consecutivo,
+    "suizo": emparejar_suizo,
+}
+
+_ejecutor: Optional[ProcessPoolExecutor] = None
+_ejecutor_lock = threading.Lock()
+
+def _obtener_ejecutor() -> ProcessPoolExecutor:
+    global _ejecutor
+    with _ejecutor_lock:
+        if _ejecutor is None:
+            # spawn: hacer fork de un worker con hilos y conexiones abiertas no es seguro
+            _ejecutor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+        return _ejecutor
+
+def cerrar_ejecutor():
+    """Detiene el proceso auxiliar de emparejamiento, si se llegó a crear"""
+    global _ejecutor
+    with _ejecutor_lock:
+        if _ejecutor is not None:
+            _ejecutor.shutdown(wait=False, cancel_futures=True)
+            _ejecutor = None
+
+def calcular_mesas(estrategia: str, grupos: List[List[int]], rivales: Dict[int, Set[int]], descansos: Set[int]) -> Mesas:
+    """
+    Calcula las mesas con la estrategia indicada. Con muchas parejas el cálculo
+    se hace en el proceso auxiliar para no retener el GIL del worker.
+    """
+    funcion = ESTRATEGIAS[estrategia]
+    total = sum(len(g) for g in grupos)
+    if estrategia == "consecutivo" or total < UMBRAL_PROCESO:
+        return funcion(grupos, rivales, descansos)
+    return _obtener_ejecutor().submit(funcion, grupos, rivales, descansos).result()
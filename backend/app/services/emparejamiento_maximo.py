@@ -0,0 +1,391 @@
+"""
+Emparejamiento de peso máximo en un grafo general (algoritmo de las flores de
+Edmonds, con variables duales, en O(n³)).
+
+Es la implementación clásica de Galil ("Efficient algorithms for finding
+maximum matching in graphs", 1986): en cada etapa se busca un camino de
+aumento entre vértices libres a través de las aristas con holgura cero,
+contrayendo los ciclos impares (flores) que aparecen, y si no lo hay se
+ajustan las variables duales. Los pesos deben ser enteros.
+
+Lo usa el sistema suizo (services/emparejamiento.py) para encontrar las
+mesas con el mínimo de rivales repetidos. No depende de la base de datos.
+"""
+from typing import List, Sequence, Tuple
+
+Arista = Tuple[int, int, int]
+
+def emparejamiento_peso_maximo(aristas: Sequence[Arista], cardinalidad_maxima: bool = False) -> List[int]:
+    """
+    Emparejamiento de peso máximo del grafo con las aristas (i, j, peso), con
+    los vértices numerados desde 0. Con cardinalidad_maxima=True se busca el
+    de más peso entre los que tienen el máximo número de aristas. Devuelve
+    para cada vértice el vértice con el que queda emparejado, o -1.
+    """
+    if not aristas:
+        return []
+
+    # Con los pesos pares las holguras entre vértices S también lo son y
+    # los ajustes de las duales siguen siendo enteros
+    aristas = [(i, j, 2 * peso) for i, j, peso in aristas]
+    n_aristas = len(aristas)
+    n = 1 + max(max(i, j) for i, j, _ in aristas)
+    peso_maximo = max(0, max(peso for _, _, peso in aristas))
+
+    # extremo[p]: vértice del extremo p; la arista k tiene los extremos 2k y 2k+1
+    extremo = [aristas[p // 2][p % 2] for p in range(2 * n_aristas)]
+    # vecinos[v]: extremos remotos de las aristas de v
+    vecinos: List[List[int]] = [[] for _ in range(n)]
+    for k, (i, j, _) in enumerate(aristas):
+        vecinos[i].append(2 * k + 1)
+        vecinos[j].append(2 * k)
+
+    # pareja[v]: extremo remoto de la arista emparejada de v, o -1
+    pareja = [-1] * n
+    # Etiqueta de los vértices y flores superiores: 0 sin etiqueta, 1 S, 2 T
+    etiqueta = [0] * (2 * n)
+    # Extremo por el que se llegó al vértice o flor etiquetado
+    extremo_etiqueta = [-1] * (2 * n)
+    # Flor superior que contiene cada vértice
+    en_flor = list(range(n))
+    padre_flor = [-1] * (2 * n)
+    # Subflores de cada flor, empezando por la base, y aristas que las unen
+    hijos_flor: List = [None] * (2 * n)
+    extremos_flor: List = [None] * (2 * n)
+    base_flor = list(range(n)) + [-1] * n
+    # Arista de menor holgura hacia un vértice o flor S
+    mejor_arista = [-1] * (2 * n)
+    mejores_aristas_flor: List = [None] * (2 * n)
+    flores_libres = list(range(n, 2 * n))
+    dual = [peso_maximo] * n + [0] * n
+    permitida = [False] * n_aristas
+    cola: List[int] = []
+
+    def holgura(k: int) -> int:
+        i, j, peso = aristas[k]
+        return dual[i] + dual[j] - 2 * peso
+
+    def hojas_flor(b: int):
+        if b < n:
+            yield b
+        else:
+            for t in hijos_flor[b]:
+                if t < n:
+                    yield t
+                else:
+                    yield from hojas_flor(t)
+
+    def asignar_etiqueta(w: int, t: int, p: int):
+        b = en_flor[w]
+        etiqueta[w] = etiqueta[b] = t
+        extremo_etiqueta[w] = extremo_etiqueta[b] = p
+        mejor_arista[w] = mejor_arista[b] = -1
+        if t == 1:
+            cola.extend(hojas_flor(b))
+        elif t == 2:
+            base = base_flor[b]
+            asignar_etiqueta(extremo[pareja[base]], 1, pareja[base] ^ 1)
+
+    def buscar_flor(v: int, w: int) -> int:
+        """Base de la flor que cierra la arista v-w, o -1 si hay camino de aumento"""
+        camino = []
+        base = -1
+        while v != -1 or w != -1:
+            b = en_flor[v]
+            if etiqueta[b] & 4:
+                base = base_flor[b]
+                break
+            camino.append(b)
+            etiqueta[b] = 5
+            if extremo_etiqueta[b] == -1:
+                v = -1
+            else:
+                v = extremo[extremo_etiqueta[b]]
+                b = en_flor[v]
+                v = extremo[extremo_etiqueta[b]]
+            if w != -1:
+                v, w = w, v
+        for b in camino:
+            etiqueta[b] = 1
+        return base
+
+    def anadir_flor(base: int, k: int):
+        v, w, _ = aristas[k]
+        bb = en_flor[base]
+        bv = en_flor[v]
+        bw = en_flor[w]
+        b = flores_libres.pop()
+        base_flor[b] = base
+        padre_flor[b] = -1
+        padre_flor[bb] = b
+        hijos_flor[b] = camino = []
+        extremos_flor[b] = extremos = []
+        while bv != bb:
+            padre_flor[bv] = b
+            camino.append(bv)
+            extremos.append(extremo_etiqueta[bv])
+            v = extremo[extremo_etiqueta[bv]]
+            bv = en_flor[v]
+        camino.append(bb)
+        camino.reverse()
+        extremos.reverse()
+        extremos.append(2 * k)
+        while bw != bb:
+            padre_flor[bw] = b
+            camino.append(bw)
+            extremos.append(extremo_etiqueta[bw] ^ 1)
+            w = extremo[extremo_etiqueta[bw]]
+            bw = en_flor[w]
+        etiqueta[b] = 1
+        extremo_etiqueta[b] = extremo_etiqueta[bb]
+        dual[b] = 0
+        for v in hojas_flor(b):
+            if etiqueta[en_flor[v]] == 2:
+                # Los vértices T de la flor pasan a ser S
+                cola.append(v)
+            en_flor[v] = b
+
+        # Mejores aristas de la flor nueva hacia cada flor S vecina
+        mejor_hacia = [-1] * (2 * n)
+        for bv in camino:
+            if mejores_aristas_flor[bv] is None:
+                listas = [[p // 2 for p in vecinos[v]] for v in hojas_flor(bv)]
+            else:
+                listas = [mejores_aristas_flor[bv]]
+            for lista in listas:
+                for k in lista:
+                    i, j, _ = aristas[k]
+                    if en_flor[j] == b:
+                        i, j = j, i
+                    bj = en_flor[j]
+                    if bj != b and etiqueta[bj] == 1 and (
+                        mejor_hacia[bj] == -1 or holgura(k) < holgura(mejor_hacia[bj])
+                    ):
+                        mejor_hacia[bj] = k
+            mejores_aristas_flor[bv] = None
+            mejor_arista[bv] = -1
+        mejores_aristas_flor[b] = [k for k in mejor_hacia if k != -1]
+        mejor_arista[b] = -1
+        for k in mejores_aristas_flor[b]:
+            if mejor_arista[b] == -1 or holgura(k) < holgura(mejor_arista[b]):
+                mejor_arista[b] = k
+
+    def expandir_flor(b: int, final: bool):
+        for s in hijos_flor[b]:
+            padre_flor[s] = -1
+            if s < n:
+                en_flor[s] = s
+            elif final and dual[s] == 0:
+                expandir_flor(s, final)
+            else:
+                for v in hojas_flor(s):
+                    en_flor[v] = s
+
+        if not final and etiqueta[b] == 2:
+            # Reetiquetar el camino par de la flor T desde la subflor de
+            # entrada hasta la base
+            entrada = en_flor[extremo[extremo_etiqueta[b] ^ 1]]
+            j = hijos_flor[b].index(entrada)
+            if j & 1:
+                j -= len(hijos_flor[b])
+                paso = 1
+                truco = 0
+            else:
+                paso = -1
+                truco = 1
+            p = extremo_etiqueta[b]
+            while j != 0:
+                etiqueta[extremo[p ^ 1]] = 0
+                etiqueta[extremo[extremos_flor[b][j - truco] ^ truco ^ 1]] = 0
+                asignar_etiqueta(extremo[p ^ 1], 2, p)
+                permitida[extremos_flor[b][j - truco] // 2] = True
+                j += paso
+                p = extremos_flor[b][j - truco] ^ truco
+                permitida[p // 2] = True
+                j += paso
+            bv = hijos_flor[b][j]
+            etiqueta[extremo[p ^ 1]] = etiqueta[bv] = 2
+            extremo_etiqueta[extremo[p ^ 1]] = extremo_etiqueta[bv] = p
+            mejor_arista[bv] = -1
+            j += paso
+            while hijos_flor[b][j] != entrada:
+                bv = hijos_flor[b][j]
+                if etiqueta[bv] == 1:
+                    j += paso
+                    continue
+                for v in hojas_flor(bv):
+                    if etiqueta[v] != 0:
+                        break
+                if etiqueta[v] != 0:
+                    etiqueta[v] = 0
+                    etiqueta[extremo[pareja[base_flor[bv]]]] = 0
+                    asignar_etiqueta(v, 2, extremo_etiqueta[v])
+                j += paso
+
+        etiqueta[b] = extremo_etiqueta[b] = -1
+        hijos_flor[b] = extremos_flor[b] = None
+        base_flor[b] = -1
+        mejores_aristas_flor[b] = None
+        mejor_arista[b] = -1
+        flores_libres.append(b)
+
+    def aumentar_flor(b: int, v: int):
+        """Intercambia las aristas emparejadas de la flor para que v sea su base"""
+        t = v
+        while padre_flor[t] != b:
+            t = padre_flor[t]
+        if t >= n:
+            aumentar_flor(t, v)
+        i = j = hijos_flor[b].index(t)
+        if i & 1:
+            j -= len(hijos_flor[b])
+            paso = 1
+            truco = 0
+        else:
+            paso = -1
+            truco = 1
+        while j != 0:
+            j += paso
+            t = hijos_flor[b][j]
+            p = extremos_flor[b][j - truco] ^ truco
+            if t >= n:
+                aumentar_flor(t, extremo[p])
+            j += paso
+            t = hijos_flor[b][j]
+            if t >= n:
+                aumentar_flor(t, extremo[p ^ 1])
+            pareja[extremo[p]] = p ^ 1
+            pareja[extremo[p ^ 1]] = p
+        hijos_flor[b] = hijos_flor[b][i:] + hijos_flor[b][:i]
+        extremos_flor[b] = extremos_flor[b][i:] + extremos_flor[b][:i]
+        base_flor[b] = base_flor[hijos_flor[b][0]]
+
+    def aumentar_emparejamiento(k: int):
+        """Intercambia las aristas del camino de aumento que pasa por la arista k"""
+        v, w, _ = aristas[k]
+        for s, p in ((v, 2 * k + 1), (w, 2 * k)):
+            while True:
+                bs = en_flor[s]
+                if bs >= n:
+                    aumentar_flor(bs, s)
+                pareja[s] = p
+                if extremo_etiqueta[bs] == -1:
+                    break
+                t = extremo[extremo_etiqueta[bs]]
+                bt = en_flor[t]
+                s = extremo[extremo_etiqueta[bt]]
+                j = extremo[extremo_etiqueta[bt] ^ 1]
+                if bt >= n:
+                    aumentar_flor(bt, j)
+                pareja[j] = extremo_etiqueta[bt]
+                p = extremo_etiqueta[bt] ^ 1
+
+    # Cada etapa aumenta el emparejamiento en una arista o termina
+    for _ in range(n):
+        etiqueta[:] = [0] * (2 * n)
+        mejor_arista[:] = [-1] * (2 * n)
+        mejores_aristas_flor[n:] = [None] * n
+        permitida[:] = [False] * n_aristas
+        cola[:] = []
+        for v in range(n):
+            if pareja[v] == -1 and etiqueta[en_flor[v]] == 0:
+                asignar_etiqueta(v, 1, -1)
+
+        aumentado = False
+        while True:
+            while cola and not aumentado:
+                v = cola.pop()
+                for p in vecinos[v]:
+                    k = p // 2
+                    w = extremo[p]
+                    if en_flor[v] == en_flor[w]:
+                        continue
+                    if not permitida[k]:
+                        holgura_k = holgura(k)
+                        if holgura_k <= 0:
+                            permitida[k] = True
+                    if permitida[k]:
+                        if etiqueta[en_flor[w]] == 0:
+                            asignar_etiqueta(w, 2, p ^ 1)
+                        elif etiqueta[en_flor[w]] == 1:
+                            base = buscar_flor(v, w)
+                            if base >= 0:
+                                anadir_flor(base, k)
+                            else:
+                                aumentar_emparejamiento(k)
+                                aumentado = True
+                                break
+                        elif etiqueta[w] == 0:
+                            # w está dentro de una flor T sin etiqueta propia
+                            etiqueta[w] = 2
+                            extremo_etiqueta[w] = p ^ 1
+                    elif etiqueta[en_flor[w]] == 1:
+                        b = en_flor[v]
+                        if mejor_arista[b] == -1 or holgura_k < holgura(mejor_arista[b]):
+                            mejor_arista[b] = k
+                    elif etiqueta[w] == 0:
+                        if mejor_arista[w] == -1 or holgura_k < holgura(mejor_arista[w]):
+                            mejor_arista[w] = k
+            if aumentado:
+                break
+
+            # Sin camino de aumento: ajustar las duales con el menor delta posible
+            tipo = -1
+            delta = arista_delta = flor_delta = None
+            if not cardinalidad_maxima:
+                tipo = 1
+                delta = min(dual[:n])
+            for v in range(n):
+                if etiqueta[en_flor[v]] == 0 and mejor_arista[v] != -1:
+                    d = holgura(mejor_arista[v])
+                    if tipo == -1 or d < delta:
+                        delta, tipo, arista_delta = d, 2, mejor_arista[v]
+            for b in range(2 * n):
+                if padre_flor[b] == -1 and etiqueta[b] == 1 and mejor_arista[b] != -1:
+                    d = holgura(mejor_arista[b]) // 2
+                    if tipo == -1 or d < delta:
+                        delta, tipo, arista_delta = d, 3, mejor_arista[b]
+            for b in range(n, 2 * n):
+                if base_flor[b] >= 0 and padre_flor[b] == -1 and etiqueta[b] == 2 and (tipo == -1 or dual[b] < delta):
+                    delta, tipo, flor_delta = dual[b], 4, b
+            if tipo == -1:
+                # Solo con cardinalidad máxima: no queda ninguna mejora posible
+                tipo = 1
+                delta = max(0, min(dual[:n]))
+
+            for v in range(n):
+                if etiqueta[en_flor[v]] == 1:
+                    dual[v] -= delta
+                elif etiqueta[en_flor[v]] == 2:
+                    dual[v] += delta
+            for b in range(n, 2 * n):
+                if base_flor[b] >= 0 and padre_flor[b] == -1:
+                    if etiqueta[b] == 1:
+                        dual[b] += delta
+                    elif etiqueta[b] == 2:
+                        dual[b] -= delta
+
+            if tipo == 1:
+                break
+            elif tipo == 2:
+                permitida[arista_delta] = True
+                i, j, _ = aristas[arista_delta]
+                if etiqueta[en_flor[i]] == 0:
+                    i, j = j, i
+                cola.append(i)
+            elif tipo == 3:
+                permitida[arista_delta] = True
+                i, j, _ = aristas[arista_delta]
+                cola.append(i)
+            else:
+                expandir_flor(flor_delta, False)
+
+        if not aumentado:
+            break
+
+        # Deshacer las flores S con dual cero al terminar la etapa
+        for b in range(n, 2 * n):
+            if padre_flor[b] == -1 and base_flor[b] >= 0 and etiqueta[b] == 1 and dual[b] == 0:
+                expandir_flor(b, True)
+
+    return [extremo[p] if p >= 0 else -1 for p in pareja]
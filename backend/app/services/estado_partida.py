@@ -0,0 +1,75 @@
+"""
+Estado de cada partida: cuántas mesas tiene y cuántas tienen ya resultado.
+
+Todos los clientes preguntan a menudo si la partida actual está completa. En
+lugar de contar los resultados, cada (campeonato, partida) tiene una fila en
+contadores_partida que se mantiene en las mismas transacciones que crean o
+borran mesas (recontar_partidas) y guardan resultados
+(registrar_resultados_mesas). Mesa.con_resultado evita contar dos veces una
+mesa cuyos resultados se vuelven a guardar.
+"""
+from typing import Iterable
+from sqlalchemy import case, false, func, insert, select, update
+from sqlalchemy.orm import Session
+from ..models import ContadorPartida, Mesa
+
+def recontar_partidas(db: Session, campeonato_id: int, desde_partida: int = 1):
+    """
+    Vuelve a calcular desde las mesas los contadores de las partidas a partir
+    de `desde_partida`. Se llama después de crear o borrar mesas; lee solo las
+    mesas de esas partidas.
+    """
+    # Las mesas añadidas a la sesión tienen que estar en la base de datos
+    db.flush()
+    db.query(ContadorPartida).filter(
+        ContadorPartida.campeonato_id == campeonato_id,
+        ContadorPartida.partida >= desde_partida
+    ).delete(synchronize_session=False)
+    db.execute(insert(ContadorPartida).from_select(
+        ["campeonato_id", "partida", "mesas", "mesas_con_resultado"],
+        select(
+            Mesa.campeonato_id,
+            Mesa.partida,
+            func.count(),
+            func.sum(case((Mesa.con_resultado, 1), else_=0))
+        ).where(
+            Mesa.campeonato_id == campeonato_id,
+            Mesa.partida >= desde_partida
+        ).group_by(Mesa.campeonato_id, Mesa.partida)
+    ))
+
+def registrar_resultados_mesas(db: Session, campeonato_id: int, partida: int, mesas: Iterable[int]) -> int:
+    """
+    Marca las mesas como con resultado y suma al contador de la partida las que
+    aún no lo tenían. Devuelve cuántas se han sumado.
+    """
+    # La condición sobre con_resultado hace que dos transacciones que guardan
+    # la misma mesa a la vez solo la cuenten una vez
+    marcadas = db.execute(
+        update(Mesa).where(
+            Mesa.campeonato_id == campeonato_id,
+            Mesa.partida == partida,
+            Mesa.numero.in_(list(mesas)),
+            Mesa.con_resultado == false()
+        ).values(con_resultado=True).execution_options(synchronize_session=False)
+    ).rowcount
+    if marcadas:
+        db.execute(
+            update(ContadorPartida).where(
+                ContadorPartida.campeonato_id == campeonato_id,
+                ContadorPartida.partida == partida
+            ).values(mesas_con_resultado=ContadorPartida.mesas_con_resultado + marcadas)
+        )
+    return marcadas
+
+def leer_estado_partida(db: Session, campeonato_id: int, partida: int) -> dict:
+    """Estado de la partida leyendo solo su contador (una fila por clave primaria)"""
+    contador = db.get(ContadorPartida, (campeonato_id, partida))
+    mesas = contador.mesas if contador else 0
+    mesas_con_resultado = contador.mesas_con_resultado if contador else 0
+    return {
+        "partida": partida,
+        "mesas": mesas,
+        "mesas_con_resultado": mesas_con_resultado,
+        "completa": mesas > 0 and mesas_con_resultado >= mesas
+    }
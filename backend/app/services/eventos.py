@@ -0,0 +1,221 @@
+"""
+Eventos del campeonato en tiempo real.
+
+Las rutas de escritura publican los eventos con `publicar_evento` dentro de su
+transacción. En PostgreSQL se envían con `pg_notify`, que solo los entrega al
+hacer commit y los reparte a todos los workers; cada worker los recibe con una
+conexión en LISTEN y los difunde a sus clientes SSE conectados.
+
+Por el mismo canal viajan los avisos de invalidación de las cachés de cada
+worker (INVALIDAR_CACHE), que no se envían a los clientes.
+"""
+import asyncio
+import json
+import logging
+from typing import Callable, List, Optional, Set
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from .. import database
+
+logger = logging.getLogger(__name__)
+
+CANAL_EVENTOS = "domino_eventos"
+
+# Tipos de evento
+RESULTADO_GUARDADO = "resultado_guardado"
+PARTIDA_CREADA = "partida_creada"
+PAREJA_ACTUALIZADA = "pareja_actualizada"
+RANKING_ACTUALIZADO = "ranking_actualizado"
+CAMPEONATO_ACTUALIZADO = "campeonato_actualizado"
+# Se envía a un cliente cuando ha podido perder eventos y debe recargarlo todo
+SINCRONIZAR = "sincronizar"
+# Aviso interno entre workers: el campeonato ha cambiado y hay que borrarlo de
+# las cachés locales
+INVALIDAR_CACHE = "invalidar_cache"
+
+class Suscripcion:
+    """Cola de mensajes de un cliente conectado, con filtro opcional por campeonato"""
+    
+    def __init__(self, campeonato_id: Optional[int] = None, maximo: int = 100):
+        self.campeonato_id = campeonato_id
+        self.cola = asyncio.Queue(maxsize=maximo)
+    
+    def entregar(self, mensaje: str):
+        try:
+            self.cola.put_nowait(mensaje)
+        except asyncio.QueueFull:
+            # Cliente lento: se descartan los pendientes y se pide que recargue todo
+            while not self.cola.empty():
+                self.cola.get_nowait()
+            self.cola.put_nowait(formatear_sse(SINCRONIZAR, {}))
+
+class Difusor:
+    """
+    Reparte cada evento a las suscripciones del proceso. El mensaje SSE se
+    serializa una sola vez y se deja en la cola de cada cliente sin crear tareas.
+    """
+    
+    def __init__(self):
+        self.suscripciones: Set[Suscripcion] = set()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        # Funciones que reciben el id del campeonato modificado (None: todos)
+        self.invalidadores: List[Callable[[Optional[int]], None]] = []
+    
+    def suscribir(self, campeonato_id: Optional[int] = None) -> Suscripcion:
+        suscripcion = Suscripcion(campeonato_id)
+        self.suscripciones.add(suscripcion)
+        return suscripcion
+    
+    def cancelar(self, suscripcion: Suscripcion):
+        self.suscripciones.discard(suscripcion)
+    
+    def al_invalidar(self, funcion: Callable[[Optional[int]], None]):
+        """Registra una caché local que se invalida con los avisos INVALIDAR_CACHE"""
+        self.invalidadores.append(funcion)
+    
+    def invalidar_caches(self, campeonato_id: Optional[int]):
+        for funcion in self.invalidadores:
+            try:
+                funcion(campeonato_id)
+            except Exception as e:
+                logger.error(f"Error al invalidar la caché: {str(e)}")
+    
+    def difundir(self, payload: str):
+        """Difunde un evento recibido como JSON compacto. Debe llamarse desde el event loop."""
+        try:
+            datos = json.loads(payload)
+        except ValueError:
+            logger.warning(f"Evento con formato no válido descartado: {payload!r}")
+            return
+        
+        tipo = datos.pop("t", None)
+        if not tipo:
+            return
+        campeonato_id = datos.get("c")
+        if tipo == INVALIDAR_CACHE:
+            self.invalidar_caches(campeonato_id)
+            return
+        mensaje = formatear_sse(tipo, datos)
+        
+        for suscripcion in list(self.suscripciones):
+            if suscripcion.campeonato_id is None or suscripcion.campeonato_id == campeonato_id:
+                suscripcion.entregar(mensaje)
+    
+    def sincronizar_todos(self):
+        """Pide a todos los clientes que recarguen (p. ej. tras perder la conexión LISTEN)"""
+        mensaje = formatear_sse(SINCRONIZAR, {})
+        for suscripcion in list(self.suscripciones):
+            suscripcion.entregar(mensaje)
+    
+    def difundir_desde_hilo(self, payload: str):
+        """Difunde un evento desde un hilo del threadpool (rutas síncronas)"""
+        if self.loop is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.difundir, payload)
+
+difusor = Difusor()
+
+def formatear_sse(tipo: str, datos: dict) -> str:
+    return f"event: {tipo}\ndata: {json.dumps(datos, separators=(',', ':'))}\n\n"
+
+def publicar_evento(db: Session, tipo: str, campeonato_id: Optional[int], **datos):
+    """
+    Publica un evento dentro de la transacción de la sesión.
+    Solo se entrega a los clientes si la transacción hace commit.
+    """
+    payload = json.dumps({"t": tipo, "c": campeonato_id, **datos}, separators=(',', ':'))
+    
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SELECT pg_notify(:canal, :payload)"), {"canal": CANAL_EVENTOS, "payload": payload})
+    else:
+        # Sin NOTIFY (un único proceso): difundir localmente después del commit
+        db.info.setdefault("eventos_pendientes", []).append(payload)
+
+@event.listens_for(Session, "after_commit")
+def _difundir_eventos_pendientes(session):
+    for payload in session.info.pop("eventos_pendientes", []):
+        difusor.difundir_desde_hilo(payload)
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_eventos_pendientes(session):
+    session.info.pop("eventos_pendientes", None)
+
+class EscuchaNotificaciones:
+    """
+    Conexión dedicada en LISTEN integrada en el event loop con `add_reader`,
+    sin hilos ni consultas periódicas. Se reconecta si la conexión se pierde.
+    """
+    
+    REINTENTO_SEGUNDOS = 2
+    
+    def __init__(self, difusor: Difusor):
+        self.difusor = difusor
+        self.conexion = None
+        self.activa = False
+    
+    async def iniciar(self):
+        self.difusor.loop = asyncio.get_running_loop()
+        if database.engine is None or database.engine.dialect.name != "postgresql":
+            logger.info("Eventos en tiempo real sin LISTEN/NOTIFY (solo este proceso)")
+            return
+        self.activa = True
+        self._conectar()
+    
+    def _conectar(self):
+        loop = self.difusor.loop
+        try:
+            raw = database.engine.raw_connection()
+            # La conexión de LISTEN no vuelve al pool
+            raw.detach()
+            conexion = raw.dbapi_connection
+            conexion.autocommit = True
+            with conexion.cursor() as cursor:
+                cursor.execute(f"LISTEN {CANAL_EVENTOS}")
+            self.conexion = conexion
+            loop.add_reader(conexion.fileno(), self._leer)
+            logger.info(f"Escuchando eventos en el canal {CANAL_EVENTOS}")
+        except Exception as e:
+            logger.error(f"No se pudo iniciar LISTEN de eventos: {str(e)}")
+            self.conexion = None
+            loop.call_later(self.REINTENTO_SEGUNDOS, self._reconectar)
+    
+    def _leer(self):
+        try:
+            self.conexion.poll()
+        except Exception as e:
+            logger.error(f"Conexión LISTEN perdida: {str(e)}")
+            self._cerrar_conexion()
+            self.difusor.loop.call_later(self.REINTENTO_SEGUNDOS, self._reconectar)
+            return
+        
+        while self.conexion.notifies:
+            notificacion = self.conexion.notifies.pop(0)
+            self.difusor.difundir(notificacion.payload)
+    
+    def _reconectar(self):
+        if not self.activa:
+            return
+        self._conectar()
+        if self.conexion is not None:
+            # Los eventos y las invalidaciones emitidos mientras no había
+            # conexión se han perdido
+            self.difusor.invalidar_caches(None)
+            self.difusor.sincronizar_todos()
+    
+    def _cerrar_conexion(self):
+        if self.conexion is None:
+            return
+        try:
+            self.difusor.loop.remove_reader(self.conexion.fileno())
+        except Exception:
+            pass
+        try:
+            self.conexion.close()
+        except Exception:
+            pass
+        self.conexion = None
+    
+    async def detener(self):
+        self.activa = False
+        self._cerrar_conexion()
+
+escucha = EscuchaNotificaciones(difusor)
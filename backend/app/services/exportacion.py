@@ -0,0 +1,129 @@
+"""
+Exportación de los datos de un campeonato en CSV o NDJSON.
+
+Las filas se leen con un cursor del servidor en lotes de TAMANO_LOTE y se
+escriben según llegan, de modo que la memoria no crece con el tamaño del
+campeonato. La consulta se ejecuta en una sesión propia que se cierra al
+terminar la descarga, aunque el cliente la corte a medias.
+"""
+import csv
+import io
+import json
+import os
+from typing import Callable, Iterator, List, Optional
+from sqlalchemy import Select, select
+from sqlalchemy.orm import aliased
+from .. import database
+from ..models import Mesa, Pareja, Resultado
+
+TAMANO_LOTE = int(os.getenv("EXPORTACION_TAMANO_LOTE", "2000"))
+
+FORMATOS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+def consulta_resultados(campeonato_id: int) -> Select:
+    """Resultados del campeonato con el nombre de cada pareja, por partida y mesa"""
+    return select(
+        Resultado.partida,
+        Resultado.mesa_id.label('mesa'),
+        Resultado.pareja_id,
+        Pareja.nombre.label('pareja'),
+        Resultado.rp,
+        Resultado.pp,
+        Resultado.pg,
+        Resultado.rt,
+        Resultado.mg,
+        Resultado.gb
+    ).join(
+        Pareja, Pareja.id == Resultado.pareja_id
+    ).where(
+        Resultado.campeonato_id == campeonato_id
+    ).order_by(Resultado.partida, Resultado.mesa_id, Resultado.id)
+
+def consulta_mesas_exportacion(campeonato_id: int, partida: Optional[int] = None) -> Select:
+    """Mesas del campeonato, de una partida o de todas, con los nombres de las parejas"""
+    pareja1 = aliased(Pareja)
+    pareja2 = aliased(Pareja)
+    consulta = select(
+        Mesa.partida,
+        Mesa.numero.label('mesa'),
+        Mesa.pareja1_id,
+        pareja1.nombre.label('pareja1'),
+        Mesa.pareja2_id,
+        pareja2.nombre.label('pareja2')
+    ).join(
+        pareja1, pareja1.id == Mesa.pareja1_id
+    ).outerjoin(
+        pareja2, pareja2.id == Mesa.pareja2_id
+    ).where(
+        Mesa.campeonato_id == campeonato_id
+    )
+    if partida is not None:
+        consulta = consulta.where(Mesa.partida == partida)
+    return consulta.order_by(Mesa.partida, Mesa.numero)
+
+COLUMNAS_CLASIFICACION = [
+    "posicion", "pareja_id", "nombre", "club", "gb", "pg", "pp", "rt", "mg",
+    "partidas_jugadas", "posicion_anterior"
+]
+
+def numerar_clasificacion() -> Callable[[list], list]:
+    """
+    Convierte las filas del ranking (consulta_ranking o
+    consulta_ranking_historico) en las de COLUMNAS_CLASIFICACION, numerando
+    las posiciones a lo largo de todos los lotes
+    """
+    posicion = 0
+
+    def transformar(lote: list) -> list:
+        nonlocal posicion
+        filas = []
+        for fila in lote:
+            posicion += 1
+            filas.append([
+                posicion, fila.numero, fila.nombre, fila.club or "", bool(fila.gb),
+                fila.pg, fila.pp, fila.rt, fila.mg, fila.partidas_jugadas, fila.posicion_anterior
+            ])
+        return filas
+    return transformar
+
+def _escribir_csv(filas: list, columnas: List[str]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(filas)
+    return buffer.getvalue()
+
+def _escribir_ndjson(filas: list, columnas: List[str]) -> str:
+    return "".join(
+        json.dumps(dict(zip(columnas, fila)), ensure_ascii=False, default=str) + "\n"
+        for fila in filas
+    )
+
+ESCRITORES = {"csv": _escribir_csv, "ndjson": _escribir_ndjson}
+
+def exportar(
+    consulta: Select,
+    formato: str,
+    transformar: Optional[Callable[[list], list]] = None,
+    columnas: Optional[List[str]] = None
+) -> Iterator[bytes]:
+    """
+    Genera el fichero por bloques. `transformar` recibe cada lote de filas
+    y devuelve las filas a escribir, para calcular columnas en el servidor de
+    la aplicación (p. ej. la posición); en ese caso `columnas` indica sus
+    nombres. Se debe consumir desde un hilo, no desde el bucle de eventos.
+    """
+    db = database.SessionLocal()
+    try:
+        # yield_per activa stream_results: cursor con nombre en PostgreSQL
+        resultado = db.execute(consulta.execution_options(yield_per=TAMANO_LOTE))
+        columnas = columnas or list(resultado.keys())
+        escribir = ESCRITORES[formato]
+        if formato == "csv":
+            yield escribir([columnas], columnas).encode("utf-8")
+        for lote in resultado.partitions():
+            filas = transformar(lote) if transformar else lote
+            yield escribir(filas, columnas).encode("utf-8")
+    finally:
+        db.close()
@@ -0,0 +1,176 @@
+"""
+Lectura y validación de ficheros de inscripción de parejas (CSV o XLSX).
+
+Cada fila es una pareja con sus dos jugadores. La primera fila es la cabecera
+con estas columnas (sin distinguir mayúsculas ni el orden):
+
+    nombre, club, jugador1_nombre, jugador1_apellido, jugador2_nombre, jugador2_apellido
+
+Opcionalmente `activa` (si/no, 1/0, true/false). El fichero se recorre fila a
+fila sin cargarlo entero en memoria.
+"""
+import csv
+import io
+from typing import BinaryIO, Dict, Iterator, List, Optional, Set, Tuple
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+from ..models import Jugador, Pareja
+
+COLUMNAS_OBLIGATORIAS = [
+    "nombre", "club",
+    "jugador1_nombre", "jugador1_apellido",
+    "jugador2_nombre", "jugador2_apellido"
+]
+
+# Nombres alternativos aceptados en la cabecera
+ALIAS_COLUMNAS = {
+    "club_pertenencia": "club",
+    "pareja": "nombre",
+}
+
+VALORES_VERDADEROS = {"1", "si", "sí", "s", "true", "x"}
+VALORES_FALSOS = {"0", "no", "n", "false"}
+
+class ErrorFormato(ValueError):
+    """El fichero no se puede leer o le faltan columnas"""
+
+def _normalizar_cabecera(cabecera) -> List[str]:
+    columnas = [str(c or "").strip().lower().replace(" ", "_") for c in cabecera]
+    columnas = [ALIAS_COLUMNAS.get(c, c) for c in columnas]
+    faltan = [c for c in COLUMNAS_OBLIGATORIAS if c not in columnas]
+    if faltan:
+        raise ErrorFormato(f"Faltan columnas en la cabecera: {', '.join(faltan)}")
+    return columnas
+
+def _filas_csv(fichero: BinaryIO) -> Iterator[Tuple[int, Dict[str, str]]]:
+    texto = io.TextIOWrapper(fichero, encoding="utf-8-sig", newline="")
+    try:
+        # Las hojas de cálculo en español suelen exportar con punto y coma
+        muestra = texto.read(4096)
+        texto.seek(0)
+        try:
+            dialecto = csv.Sniffer().sniff(muestra, delimiters=",;\t")
+        except csv.Error:
+            dialecto = csv.excel
+        lector = csv.reader(texto, dialecto)
+        columnas = _normalizar_cabecera(next(lector, []))
+        for numero, valores in enumerate(lector, start=2):
+            if any(v.strip() for v in valores):
+                yield numero, dict(zip(columnas, valores))
+    except UnicodeDecodeError:
+        raise ErrorFormato("El fichero CSV debe estar codificado en UTF-8")
+    finally:
+        # No cerrar el fichero subido al liberar el envoltorio de texto
+        texto.detach()
+
+def _filas_xlsx(fichero: BinaryIO) -> Iterator[Tuple[int, Dict[str, str]]]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ErrorFormato("La importación de ficheros XLSX necesita el paquete openpyxl")
+    try:
+        libro = load_workbook(fichero, read_only=True, data_only=True)
+    except Exception:
+        raise ErrorFormato("El fichero XLSX no es válido")
+    try:
+        filas = libro.active.iter_rows(values_only=True)
+        columnas = _normalizar_cabecera(next(filas, ()))
+        for numero, valores in enumerate(filas, start=2):
+            valores = ["" if v is None else str(v) for v in valores]
+            if any(v.strip() for v in valores):
+                yield numero, dict(zip(columnas, valores))
+    finally:
+        libro.close()
+
+def leer_filas(fichero: BinaryIO, nombre_fichero: str) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """Devuelve (número de fila, valores por columna) para cada fila con datos"""
+    if (nombre_fichero or "").lower().endswith(".xlsx"):
+        return _filas_xlsx(fichero)
+    return _filas_csv(fichero)
+
+def _booleano(valor: str) -> Optional[bool]:
+    valor = (valor or "").strip().lower()
+    if not valor:
+        return True
+    if valor in VALORES_VERDADEROS:
+        return True
+    if valor in VALORES_FALSOS:
+        return False
+    return None
+
+def validar_filas(
+    db: Session,
+    filas: Iterator[Tuple[int, Dict[str, str]]],
+    campeonato_id: int
+) -> Tuple[List[dict], List[dict]]:
+    """
+    Valida las filas del fichero. Los jugadores repetidos se buscan en una sola
+    pasada: dentro del propio fichero y, con una única consulta, entre los
+    jugadores ya inscritos en el campeonato. Devuelve las parejas válidas
+    (con sus jugadores) y los errores por fila.
+    """
+    parejas: List[dict] = []
+    errores: List[dict] = []
+    vistos: Dict[Tuple[str, str], int] = {}
+
+    for numero, valores in filas:
+        valores = {c: (v or "").strip() for c, v in valores.items()}
+        vacias = [c for c in COLUMNAS_OBLIGATORIAS if not valores.get(c)]
+        if vacias:
+            errores.append({"fila": numero, "detalle": f"Faltan valores en: {', '.join(vacias)}"})
+            continue
+        activa = _booleano(valores.get("activa", ""))
+        if activa is None:
+            errores.append({"fila": numero, "detalle": f"Valor de activa no válido: {valores['activa']}"})
+            continue
+
+        jugadores = [
+            (valores["jugador1_nombre"], valores["jugador1_apellido"]),
+            (valores["jugador2_nombre"], valores["jugador2_apellido"])
+        ]
+        if jugadores[0] == jugadores[1]:
+            errores.append({"fila": numero, "detalle": "Los dos jugadores de la pareja son el mismo"})
+            continue
+        repetido = next((j for j in jugadores if j in vistos), None)
+        if repetido:
+            errores.append({
+                "fila": numero,
+                "detalle": f"El jugador {repetido[0]} {repetido[1]} ya aparece en la fila {vistos[repetido]}"
+            })
+            continue
+        for jugador in jugadores:
+            vistos[jugador] = numero
+
+        parejas.append({
+            "fila": numero,
+            "nombre": valores["nombre"],
+            "club_pertenencia": valores["club"],
+            "activa": activa,
+            "jugadores": jugadores
+        })
+
+    # Jugadores del fichero que ya están inscritos en el campeonato, en una consulta
+    inscritos: Set[Tuple[str, str]] = set()
+    if vistos:
+        inscritos = {
+            (fila.nombre, fila.apellido)
+            for fila in db.query(Jugador.nombre, Jugador.apellido).join(Pareja).filter(
+                Pareja.campeonato_id == campeonato_id,
+                tuple_(Jugador.nombre, Jugador.apellido).in_(list(vistos))
+            ).all()
+        }
+    if inscritos:
+        validas = []
+        for pareja in parejas:
+            repetido = next((j for j in pareja["jugadores"] if j in inscritos), None)
+            if repetido:
+                errores.append({
+                    "fila": pareja["fila"],
+                    "detalle": f"Ya existe un jugador con nombre {repetido[0]} {repetido[1]} en el campeonato"
+                })
+            else:
+                validas.append(pareja)
+        parejas = validas
+
+    errores.sort(key=lambda e: e["fila"])
+    return parejas, errores
@@ -0,0 +1,173 @@
+"""
+Consultas de los listados de parejas, mesas y resultados.
+
+Las parejas y las mesas se construyen directamente como diccionarios a partir
+de columnas sueltas, sin objetos del ORM ni modelos pydantic anidados: una
+consulta para la lista y una más por cada relación incluida (jugadores,
+parejas de la mesa), sea cual sea el número de filas. Sin `fields` se
+incluyen todos los campos, con la misma forma que los esquemas Pareja y Mesa.
+
+Cada función devuelve (contenido, cursor siguiente, directo); `directo`
+indica que el contenido ya está listo para serializarse (paginacion.responder).
+"""
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import desc, tuple_
+from sqlalchemy.orm import Session
+from ..models import Jugador, Mesa, Pareja, Resultado
+from .paginacion import leer_campos, leer_cursor, leer_limite, recortar_pagina, filas_a_diccionarios
+
+CAMPOS_PAREJA = ["id", "nombre", "club_pertenencia", "activa", "gb", "campeonato_id", "jugadores"]
+CAMPOS_MESA = ["id", "partida", "pareja1_id", "pareja2_id", "campeonato_id", "pareja1", "pareja2"]
+RELACIONES_MESA = ["pareja1", "pareja2"]
+CAMPOS_RESULTADO = ["id", "pareja_id", "mesa_id", "partida", "campeonato_id", "rp", "pp", "pg", "rt", "mg", "gb"]
+CAMPOS_JUGADOR = ["id", "nombre", "apellido", "pareja_id", "campeonato_id"]
+
+# Campos de las parejas anidadas en las mesas cuando se piden con `fields`
+CAMPOS_PAREJA_ANIDADA = ["id", "nombre", "club_pertenencia", "activa", "gb", "campeonato_id"]
+
+def jugadores_por_pareja(db: Session, pareja_ids: Iterable[int]) -> Dict[int, List[dict]]:
+    """Jugadores de varias parejas en una sola consulta, agrupados por pareja"""
+    jugadores: Dict[int, List[dict]] = {pareja_id: [] for pareja_id in pareja_ids}
+    if jugadores:
+        filas = db.query(*[getattr(Jugador, c) for c in CAMPOS_JUGADOR]).filter(
+            Jugador.pareja_id.in_(list(jugadores))
+        ).order_by(Jugador.id)
+        for jugador in filas_a_diccionarios(filas, CAMPOS_JUGADOR):
+            jugadores[jugador["pareja_id"]].append(jugador)
+    return jugadores
+
+def listar_parejas(
+    db: Session,
+    campeonato_id: int,
+    after: Optional[str] = None,
+    limit: Optional[int] = None,
+    fields: Optional[str] = None
+):
+    """Parejas del campeonato de la más reciente a la más antigua (id descendente)"""
+    campos = leer_campos(fields, CAMPOS_PAREJA)
+    cursor = leer_cursor(after, 1)
+    limite = leer_limite(limit)
+    salida = campos or CAMPOS_PAREJA
+
+    columnas = ["id"] + [c for c in salida if c not in ("id", "jugadores")]
+    query = db.query(*[getattr(Pareja, c) for c in columnas]).filter(Pareja.campeonato_id == campeonato_id)
+    if cursor:
+        query = query.filter(Pareja.id < cursor[0])
+    query = query.order_by(desc(Pareja.id))
+    if limite:
+        query = query.limit(limite + 1)
+
+    filas, siguiente = recortar_pagina(query.all(), limite, lambda p: (p.id,))
+    parejas = filas_a_diccionarios(filas, columnas)
+    if "jugadores" in salida:
+        jugadores = jugadores_por_pareja(db, [p["id"] for p in parejas])
+        for pareja in parejas:
+            pareja["jugadores"] = jugadores[pareja["id"]]
+    if campos is not None and "id" not in campos:
+        for pareja in parejas:
+            del pareja["id"]
+    return parejas, siguiente, True
+
+def consulta_mesas(db: Session, campeonato_id: int, partida: int):
+    """
+    Consulta de las mesas de una partida por número de mesa, sobre la clave
+    primaria. Se usa también en scripts/explain_indices.py.
+    """
+    return db.query(
+        Mesa.numero, Mesa.partida, Mesa.pareja1_id, Mesa.pareja2_id, Mesa.campeonato_id
+    ).filter(
+        Mesa.campeonato_id == campeonato_id,
+        Mesa.partida == partida
+    ).order_by(Mesa.numero.asc())
+
+def listar_mesas(
+    db: Session,
+    campeonato_id: int,
+    partida: int,
+    after: Optional[str] = None,
+    limit: Optional[int] = None,
+    fields: Optional[str] = None
+):
+    """
+    Mesas de una partida por número de mesa. Sin `fields` cada pareja incluye
+    sus jugadores, como el esquema Mesa; con `fields` las parejas anidadas
+    llevan solo sus columnas.
+    """
+    campos = leer_campos(fields, CAMPOS_MESA)
+    cursor = leer_cursor(after, 1)
+    limite = leer_limite(limit)
+    salida = campos or CAMPOS_MESA
+
+    query = consulta_mesas(db, campeonato_id, partida)
+    if cursor:
+        query = query.filter(Mesa.numero > cursor[0])
+    if limite:
+        query = query.limit(limite + 1)
+
+    filas, siguiente = recortar_pagina(query.all(), limite, lambda m: (m.numero,))
+    mesas = [
+        {
+            "id": fila.numero,
+            "partida": fila.partida,
+            "pareja1_id": fila.pareja1_id,
+            "pareja2_id": fila.pareja2_id,
+            "campeonato_id": fila.campeonato_id
+        }
+        for fila in filas
+    ]
+
+    relaciones = [r for r in RELACIONES_MESA if r in salida]
+    if relaciones:
+        pareja_ids = {m[f"{r}_id"] for m in mesas for r in relaciones} - {None}
+        parejas = {}
+        if pareja_ids:
+            # Limitar al campeonato permite usar el índice de parejas por campeonato
+            filas_parejas = db.query(*[getattr(Pareja, c) for c in CAMPOS_PAREJA_ANIDADA]).filter(
+                Pareja.campeonato_id == campeonato_id,
+                Pareja.id.in_(pareja_ids)
+            )
+            parejas = {p["id"]: p for p in filas_a_diccionarios(filas_parejas, CAMPOS_PAREJA_ANIDADA)}
+            if campos is None:
+                jugadores = jugadores_por_pareja(db, parejas)
+                for pareja_id, pareja in parejas.items():
+                    pareja["jugadores"] = jugadores[pareja_id]
+        for mesa in mesas:
+            for relacion in relaciones:
+                mesa[relacion] = parejas.get(mesa[f"{relacion}_id"])
+
+    if campos is not None:
+        mesas = [{c: mesa[c] for c in campos} for mesa in mesas]
+    return mesas, siguiente, True
+
+def listar_resultados(
+    db: Session,
+    campeonato_id: int,
+    after: Optional[str] = None,
+    limit: Optional[int] = None,
+    fields: Optional[str] = None
+):
+    """
+    Resultados del campeonato por partida y pareja, el orden del índice único
+    (campeonato_id, partida, pareja_id). El cursor es `partida:pareja_id`.
+    Sin `fields` devuelve objetos del modelo para el response_model.
+    """
+    campos = leer_campos(fields, CAMPOS_RESULTADO)
+    cursor = leer_cursor(after, 2)
+    limite = leer_limite(limit)
+
+    if campos is None:
+        query = db.query(Resultado)
+    else:
+        columnas = ["partida", "pareja_id"] + [c for c in campos if c not in ("partida", "pareja_id")]
+        query = db.query(*[getattr(Resultado, c) for c in columnas])
+    query = query.filter(Resultado.campeonato_id == campeonato_id)
+    if cursor:
+        query = query.filter(tuple_(Resultado.partida, Resultado.pareja_id) > tuple_(*cursor))
+    query = query.order_by(Resultado.partida, Resultado.pareja_id)
+    if limite:
+        query = query.limit(limite + 1)
+
+    filas, siguiente = recortar_pagina(query.all(), limite, lambda r: (r.partida, r.pareja_id))
+    if campos is None:
+        return filas, siguiente, False
+    return filas_a_diccionarios(filas, campos), siguiente, True
@@ -0,0 +1,89 @@
+"""
+Paginación por clave (keyset) y selección de campos de los listados.
+
+- `after` es el cursor devuelto en la cabecera X-Next-After de la página
+  anterior: la clave de ordenación de su última fila, con varias partes
+  separadas por ':' cuando la clave es compuesta. Cada página se lee con un
+  rango sobre un índice, sin OFFSET, así que cuesta lo mismo sea cual sea.
+- `limit` es el tamaño de página (como máximo LIMITE_MAXIMO). Sin `limit` ni
+  `after` se devuelve el listado completo, como antes.
+- `fields` es una lista de campos separados por comas. Solo se leen esas
+  columnas y relaciones, y la respuesta lleva únicamente esos campos.
+"""
+import os
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from fastapi import Response
+from .serializacion import respuesta_json
+
+LIMITE_MAXIMO = int(os.getenv("PAGINACION_LIMITE_MAXIMO", "1000"))
+
+CABECERA_SIGUIENTE = "X-Next-After"
+
+class ErrorPaginacion(ValueError):
+    """Parámetros de paginación o de selección de campos no válidos"""
+
+def leer_cursor(after: Optional[str], partes: int) -> Optional[Tuple[int, ...]]:
+    """Convierte el cursor `after` en una tupla de `partes` enteros"""
+    if after is None or after == "":
+        return None
+    try:
+        valores = tuple(int(v) for v in after.split(":"))
+    except ValueError:
+        valores = ()
+    if len(valores) != partes:
+        raise ErrorPaginacion(f"Cursor no válido: {after}")
+    return valores
+
+def formatear_cursor(valores: Sequence[Any]) -> str:
+    return ":".join(str(v) for v in valores)
+
+def leer_limite(limit: Optional[int]) -> Optional[int]:
+    if limit is None:
+        return None
+    if limit < 1:
+        raise ErrorPaginacion("limit debe ser mayor que 0")
+    return min(limit, LIMITE_MAXIMO)
+
+def leer_campos(fields: Optional[str], disponibles: Iterable[str]) -> Optional[List[str]]:
+    """Campos pedidos en `fields`, en el orden indicado y sin repetir"""
+    if fields is None or not fields.strip():
+        return None
+    campos = list(dict.fromkeys(c.strip() for c in fields.split(",") if c.strip()))
+    desconocidos = [c for c in campos if c not in disponibles]
+    if desconocidos:
+        raise ErrorPaginacion(
+            f"Campos desconocidos: {', '.join(desconocidos)}. Disponibles: {', '.join(disponibles)}"
+        )
+    return campos
+
+def recortar_pagina(filas: list, limite: Optional[int], clave) -> Tuple[list, Optional[str]]:
+    """
+    Las consultas piden limite + 1 filas: si llega la fila de más, hay otra
+    página y el cursor es la clave de la última fila devuelta
+    """
+    if limite is None or len(filas) <= limite:
+        return filas, None
+    filas = filas[:limite]
+    return filas, formatear_cursor(clave(filas[-1]))
+
+def responder(
+    contenido: Any,
+    response: Response,
+    siguiente: Optional[str],
+    directo: bool
+):
+    """
+    Añade el cursor de la página siguiente. Con `directo` el contenido ya son
+    diccionarios de tipos básicos y se serializa con orjson, sin pasar por el
+    response_model; si no, se devuelve tal cual para que lo procese el
+    response_model de la ruta.
+    """
+    if siguiente is not None:
+        response.headers[CABECERA_SIGUIENTE] = siguiente
+    if not directo:
+        return contenido
+    return respuesta_json(contenido, response)
+
+def filas_a_diccionarios(filas: Iterable[Any], campos: List[str]) -> List[Dict[str, Any]]:
+    """Convierte filas de columnas sueltas (Row) en diccionarios con los campos pedidos"""
+    return [{campo: getattr(fila, campo) for campo in campos} for fila in filas]
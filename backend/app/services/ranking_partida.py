@@ -0,0 +1,178 @@
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import Integer, asc, desc, false, func, insert, literal, select
+from typing import List
+from ..models import Campeonato, Clasificacion, Pareja, RankingPartida, Resultado
+
+# Columnas de la clasificación guardada, en el orden de consulta_ranking_partida
+COLUMNAS = [
+    "campeonato_id", "partida", "pareja_id", "posicion", "posicion_anterior", "gb",
+    "rt", "mg", "pp", "pg", "partidas_jugadas", "ultima_partida", "orden_sorteo"
+]
+
+def orden_ranking(gb, pg, pp, rt, mg, orden_sorteo) -> list:
+    """
+    Criterios de ordenación del ranking:
+    1. GB ascendente (grupo A antes que B)
+    2. PG descendente
+    3. PP (Diferencia) descendente
+    4. RT (Puntos Totales) descendente
+    5. MG (Manos Ganadas) ascendente
+    6. Orden del sorteo inicial como desempate final
+    """
+    return [
+        asc(gb),
+        desc(pg),
+        desc(pp),
+        desc(rt),
+        asc(mg),
+        asc(func.nullif(orden_sorteo, 0)).nulls_last()
+    ]
+
+def consulta_ranking_partida(campeonato: Campeonato, partida: int):
+    """
+    Calcula desde los resultados la clasificación al terminar una partida, con
+    la posición de cada pareja y la que tenía en la clasificación guardada de
+    la partida anterior.
+    """
+    totales = select(
+        Resultado.pareja_id,
+        func.sum(Resultado.rt).label('rt'),
+        func.sum(Resultado.mg).label('mg'),
+        func.sum(Resultado.pp).label('pp'),
+        func.sum(Resultado.pg).label('pg'),
+        func.count(Resultado.id).label('partidas_jugadas'),
+        func.max(Resultado.partida).label('ultima_partida')
+    ).where(
+        Resultado.campeonato_id == campeonato.id,
+        Resultado.partida <= partida
+    ).group_by(Resultado.pareja_id).subquery()
+
+    # Los grupos GB solo existen a partir de la partida siguiente a gb_valor
+    if campeonato.gb and campeonato.gb_valor is not None and partida > campeonato.gb_valor:
+        gb = func.coalesce(Pareja.gb, false())
+    else:
+        gb = false()
+    rt = func.coalesce(totales.c.rt, 0)
+    mg = func.coalesce(totales.c.mg, 0)
+    pp = func.coalesce(totales.c.pp, 0)
+    pg = func.coalesce(totales.c.pg, 0)
+    orden_sorteo = func.coalesce(Clasificacion.orden_sorteo, 0)
+    anterior = aliased(RankingPartida)
+
+    return select(
+        literal(campeonato.id, Integer).label('campeonato_id'),
+        literal(partida, Integer).label('partida'),
+        Pareja.id.label('pareja_id'),
+        func.row_number().over(order_by=orden_ranking(gb, pg, pp, rt, mg, orden_sorteo)).label('posicion'),
+        anterior.posicion.label('posicion_anterior'),
+        gb.label('gb'),
+        rt.label('rt'),
+        mg.label('mg'),
+        pp.label('pp'),
+        pg.label('pg'),
+        func.coalesce(totales.c.partidas_jugadas, 0).label('partidas_jugadas'),
+        func.coalesce(totales.c.ultima_partida, 0).label('ultima_partida'),
+        orden_sorteo.label('orden_sorteo')
+    ).select_from(
+        Pareja
+    ).outerjoin(
+        totales, totales.c.pareja_id == Pareja.id
+    ).outerjoin(
+        Clasificacion,
+        (Clasificacion.pareja_id == Pareja.id) &
+        (Clasificacion.campeonato_id == campeonato.id)
+    ).outerjoin(
+        anterior,
+        (anterior.pareja_id == Pareja.id) &
+        (anterior.campeonato_id == campeonato.id) &
+        (anterior.partida == partida - 1)
+    ).where(
+        Pareja.campeonato_id == campeonato.id,
+        Pareja.activa == True
+    )
+
+def consulta_ranking_historico(campeonato: Campeonato, partida: int, guardado: bool = True):
+    """
+    Ranking de una partida cerrada con los datos de cada pareja, ordenado por
+    posición. Con guardado=False se calcula desde los resultados, para las
+    partidas que todavía no tienen clasificación guardada.
+    """
+    if guardado:
+        fuente = select(RankingPartida).where(
+            RankingPartida.campeonato_id == campeonato.id,
+            RankingPartida.partida == partida
+        ).subquery()
+    else:
+        fuente = consulta_ranking_partida(campeonato, partida).subquery()
+
+    return select(
+        Pareja.id.label('numero'),
+        Pareja.nombre.label('nombre'),
+        Pareja.club_pertenencia.label('club'),
+        fuente.c.gb,
+        fuente.c.pp,
+        fuente.c.rt,
+        fuente.c.mg,
+        fuente.c.pg,
+        fuente.c.ultima_partida,
+        fuente.c.partidas_jugadas,
+        fuente.c.orden_sorteo.label('ordenSorteo'),
+        fuente.c.posicion,
+        fuente.c.posicion_anterior
+    ).join(
+        Pareja, Pareja.id == fuente.c.pareja_id
+    ).order_by(fuente.c.posicion)
+
+def existe_ranking_partida(db: Session, campeonato_id: int, partida: int) -> bool:
+    """Indica si la clasificación de la partida ya está guardada"""
+    return db.query(RankingPartida.pareja_id).filter(
+        RankingPartida.campeonato_id == campeonato_id,
+        RankingPartida.partida == partida
+    ).first() is not None
+
+def guardar_ranking_partida(db: Session, campeonato: Campeonato, partida: int) -> bool:
+    """
+    Guarda la clasificación de una partida que se cierra. Si ya estaba guardada
+    no se modifica. Devuelve True si se ha escrito. No hace commit.
+    """
+    if partida < 1 or existe_ranking_partida(db, campeonato.id, partida):
+        return False
+    # Los resultados pendientes de la sesión deben entrar en la clasificación
+    db.flush()
+    db.execute(insert(RankingPartida).from_select(COLUMNAS, consulta_ranking_partida(campeonato, partida)))
+    return True
+
+def borrar_rankings_partida(db: Session, campeonato_id: int, desde_partida: int = 1):
+    """Elimina las clasificaciones guardadas desde una partida, al reabrirla o reiniciar el campeonato"""
+    db.query(RankingPartida).filter(
+        RankingPartida.campeonato_id == campeonato_id,
+        RankingPartida.partida >= desde_partida
+    ).delete(synchronize_session=False)
+
+def regenerar_rankings_partida(db: Session, campeonato: Campeonato, desde_partida: int = 1) -> List[int]:
+    """
+    Vuelve a calcular las clasificaciones guardadas desde una partida. Solo lo
+    usan el mantenimiento (scripts.clasificacion) y init_app.py: al guardar
+    resultados las clasificaciones ya guardadas no cambian. Se regeneran las
+    partidas cerradas y la actual si ya estaba guardada (última partida).
+    Devuelve las partidas regeneradas. No hace commit.
+    """
+    guardadas = {
+        fila.partida
+        for fila in db.query(RankingPartida.partida).filter(
+            RankingPartida.campeonato_id == campeonato.id,
+            RankingPartida.partida >= desde_partida
+        ).distinct().all()
+    }
+    partidas = sorted(
+        set(range(max(desde_partida, 1), campeonato.partida_actual)) |
+        {p for p in guardadas if p <= campeonato.partida_actual}
+    )
+    if not partidas:
+        return []
+
+    borrar_rankings_partida(db, campeonato.id, desde_partida)
+    # En orden ascendente, porque cada partida toma la posición anterior de la previa
+    for partida in partidas:
+        guardar_ranking_partida(db, campeonato, partida)
+    return partidas
@@ -0,0 +1,23 @@
+"""
+Respuestas JSON serializadas con orjson.
+
+Los listados grandes (ranking, mesas, parejas) construyen sus filas como
+diccionarios de tipos básicos directamente desde la consulta y se devuelven
+con `respuesta_json`, sin volver a validarlas contra el response_model ni
+pasarlas por jsonable_encoder. El response_model de esas rutas se mantiene
+para documentar la forma de la respuesta en OpenAPI.
+"""
+from typing import Any
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+
+# Clase de respuesta por defecto de la aplicación (main.py)
+RespuestaJSON = ORJSONResponse
+
+def respuesta_json(contenido: Any, response: Response) -> RespuestaJSON:
+    """
+    Serializa `contenido` (diccionarios, listas y tipos básicos) con orjson,
+    conservando las cabeceras ya añadidas a `response` (ETag, cursor...)
+    """
+    cabeceras = {k: v for k, v in response.headers.items() if k.lower() != "content-length"}
+    return RespuestaJSON(content=contenido, headers=cabeceras)
@@ -0,0 +1,150 @@
+"""
+Subida de imágenes (logos y plantillas) direccionadas por contenido.
+
+El fichero se lee por bloques de TAMANO_BLOQUE y se escribe en un temporal
+desde el pool de hilos, sin bloquear el bucle de eventos, calculando a la vez
+su sha256. Si supera SUBIDA_TAMANO_MAXIMO se descarta. El nombre definitivo es
+el sha256 del contenido, así que subir dos veces la misma imagen no duplica el
+fichero y un nombre nunca cambia de contenido.
+
+Después de la respuesta, generar_variantes crea versiones reducidas para
+pantalla, impresión y miniatura (`<sha256>_<variante>.<ext>`). Mientras no
+existen, /static sirve el original en su lugar (estaticos.EstaticosConCache).
+"""
+import hashlib
+import logging
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+TAMANO_MAXIMO = int(os.getenv("SUBIDA_TAMANO_MAXIMO", str(10 * 1024 * 1024)))
+
+TAMANO_BLOQUE = 1024 * 1024
+
+EXTENSIONES_IMAGEN = ["jpg", "jpeg", "png", "gif", "svg", "webp"]
+
+# Lado mayor, en píxeles, de cada variante
+VARIANTES = {
+    "pantalla": 1280,
+    "impresion": 2480,  # A4 a 300 ppp
+    "miniatura": 200,
+}
+
+class ErrorSubida(ValueError):
+    """El fichero subido no es válido"""
+
+class SubidaDemasiadoGrande(ErrorSubida):
+    """El fichero supera TAMANO_MAXIMO"""
+
+@dataclass
+class Subida:
+    nombre: str
+    ruta: Path
+    sha256: str
+    duplicado: bool
+
+def extension_imagen(archivo: UploadFile) -> str:
+    """Comprueba que el fichero es una imagen admitida y devuelve su extensión"""
+    if not (archivo.content_type or "").startswith("image/"):
+        raise ErrorSubida("El archivo debe ser una imagen")
+    extension = (archivo.filename or "").rsplit(".", 1)[-1].lower()
+    if extension not in EXTENSIONES_IMAGEN:
+        raise ErrorSubida(f"Extensión no permitida. Use: {', '.join(EXTENSIONES_IMAGEN)}")
+    return extension
+
+def _escribir_bloque(destino, huella, bloque: bytes):
+    huella.update(bloque)
+    destino.write(bloque)
+
+async def guardar_subida(archivo: UploadFile, directorio: Path, extension: str) -> Subida:
+    """Guarda el fichero subido en `directorio` con el nombre `<sha256>.<extension>`"""
+    limite_mb = TAMANO_MAXIMO / (1024 * 1024)
+    if archivo.size is not None and archivo.size > TAMANO_MAXIMO:
+        raise SubidaDemasiadoGrande(f"El archivo no debe superar los {limite_mb:g} MB")
+
+    os.makedirs(directorio, exist_ok=True)
+    descriptor, temporal = tempfile.mkstemp(dir=directorio, suffix=".subida")
+    try:
+        huella = hashlib.sha256()
+        total = 0
+        with os.fdopen(descriptor, "wb") as destino:
+            while True:
+                bloque = await archivo.read(TAMANO_BLOQUE)
+                if not bloque:
+                    break
+                total += len(bloque)
+                if total > TAMANO_MAXIMO:
+                    raise SubidaDemasiadoGrande(f"El archivo no debe superar los {limite_mb:g} MB")
+                await run_in_threadpool(_escribir_bloque, destino, huella, bloque)
+        if total == 0:
+            raise ErrorSubida("El archivo está vacío")
+
+        sha256 = huella.hexdigest()
+        nombre = f"{sha256}.{extension}"
+        ruta = Path(directorio) / nombre
+        duplicado = ruta.exists()
+        if duplicado:
+            os.remove(temporal)
+        else:
+            os.replace(temporal, ruta)
+        return Subida(nombre=nombre, ruta=ruta, sha256=sha256, duplicado=duplicado)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+
+def nombre_variante(nombre: str, variante: str) -> str:
+    base, extension = os.path.splitext(nombre)
+    return f"{base}_{variante}{extension}"
+
+def urls_subida(prefijo: str, nombre: str, version: str) -> Dict[str, object]:
+    """URL del original y de cada variante, con `?v=` para guardarlas en caché"""
+    return {
+        "url": f"{prefijo}/{nombre}?v={version}",
+        "variantes": {
+            variante: f"{prefijo}/{nombre_variante(nombre, variante)}?v={version}"
+            for variante in VARIANTES
+        }
+    }
+
+def generar_variantes(ruta: Path):
+    """
+    Crea las variantes reducidas que falten. Se ejecuta en segundo plano
+    (BackgroundTasks) después de responder a la subida.
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        logger.warning("Pillow no está instalado: no se generan variantes de las imágenes")
+        return
+    ruta = Path(ruta)
+    # Las imágenes vectoriales no necesitan variantes
+    if ruta.suffix.lower() == ".svg":
+        return
+
+    pendientes = {
+        variante: ruta.with_name(nombre_variante(ruta.name, variante))
+        for variante in VARIANTES
+    }
+    pendientes = {v: destino for v, destino in pendientes.items() if not destino.exists()}
+    if not pendientes:
+        return
+    try:
+        with Image.open(ruta) as imagen:
+            imagen.load()
+            for variante, destino in pendientes.items():
+                lado = VARIANTES[variante]
+                copia = imagen.copy()
+                copia.thumbnail((lado, lado))
+                temporal = destino.with_name(destino.name + ".tmp")
+                copia.save(temporal, format=imagen.format, optimize=True)
+                os.replace(temporal, destino)
+        logger.info(f"Variantes generadas para {ruta.name}: {', '.join(pendientes)}")
+    except Exception as e:
+        logger.error(f"Error al generar las variantes de {ruta.name}: {str(e)}")
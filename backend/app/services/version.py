@@ -0,0 +1,45 @@
+from fastapi import Request, Response, status
+from sqlalchemy.orm import Session
+from typing import Optional
+from ..models import Campeonato
+from ..cache import invalidar_campeonato, leer_campeonato
+
+def incrementar_version(db: Session, campeonato_id: int):
+    """
+    Incrementa la versión de datos del campeonato. Se llama desde las rutas de
+    escritura antes del commit, de modo que la versión cambia en la misma transacción.
+    La versión forma parte de los datos en caché, que se invalidan al hacer commit.
+    """
+    if campeonato_id is None:
+        return
+    db.query(Campeonato).filter(
+        Campeonato.id == campeonato_id
+    ).update({Campeonato.version: Campeonato.version + 1}, synchronize_session=False)
+    invalidar_campeonato(db, campeonato_id)
+
+def obtener_version(db: Session, campeonato_id: int) -> Optional[int]:
+    """Devuelve la versión de datos del campeonato o None si no existe"""
+    campeonato = leer_campeonato(db, campeonato_id)
+    return campeonato.version if campeonato else None
+
+def calcular_etag(recurso: str, campeonato_id: int, version: int, *partes) -> str:
+    """ETag débil derivado del recurso, el campeonato y su versión de datos"""
+    sufijo = "".join(f"-{p}" for p in partes if p is not None)
+    return f'W/"{recurso}-{campeonato_id}-{version}{sufijo}"'
+
+def comprobar_etag(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """
+    Añade el ETag a la respuesta y, si coincide con If-None-Match,
+    devuelve directamente una respuesta 304 para no calcular el contenido.
+    """
+    cabeceras = {"ETag": etag, "Cache-Control": "no-cache"}
+    response.headers.update(cabeceras)
+    
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+    
+    etags_cliente = [e.strip() for e in if_none_match.split(",")]
+    if "*" in etags_cliente or etag in etags_cliente:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cabeceras)
+    return None
@@ -0,0 +1,73 @@
+"""
+Medición del arranque en modo multi-worker.
+
+Lanza `uvicorn app.main:app --workers N`, consulta /health hasta haber visto
+todos los workers y muestra para cada uno el tiempo hasta quedar listo
+(lifespan completado) y hasta atender su primera petición, medidos desde el
+inicio de su proceso. El esquema debe estar preparado antes con init_app.py.
+
+Uso (desde el directorio backend):
+    python -m benchmarks.arranque [--workers N] [--puerto P] [--timeout S]
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+import httpx
+
+def medir(workers: int, puerto: int, timeout: float) -> int:
+    inicio = time.time()
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app",
+         "--host", "127.0.0.1", "--port", str(puerto),
+         "--workers", str(workers), "--log-level", "warning"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    vistos = {}
+    primera_respuesta = None
+    try:
+        with httpx.Client(timeout=1) as cliente:
+            # Conexiones nuevas en cada petición para que el kernel las reparta entre workers
+            while len(vistos) < workers and time.time() - inicio < timeout:
+                try:
+                    r = cliente.get(f"http://127.0.0.1:{puerto}/health", headers={"Connection": "close"})
+                except httpx.TransportError:
+                    time.sleep(0.05)
+                    continue
+                if primera_respuesta is None:
+                    primera_respuesta = time.time() - inicio
+                worker = r.json()["worker"]
+                vistos.setdefault(worker["pid"], worker)
+    finally:
+        proceso.send_signal(signal.SIGINT)
+        try:
+            proceso.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proceso.kill()
+
+    if primera_respuesta is None:
+        print("El servidor no respondió. ¿Se ha ejecutado init_app.py?")
+        return 1
+
+    print(f"Primera respuesta del servidor: {primera_respuesta:.3f} s")
+    print(f"{'pid':>8}{'listo s':>10}{'primera petición s':>20}")
+    for pid, worker in sorted(vistos.items()):
+        print(f"{pid:>8}{worker['listo_s']:>10.3f}{worker['primera_peticion_s']:>20.3f}")
+    if len(vistos) < workers:
+        print(f"Solo respondieron {len(vistos)} de {workers} workers en {timeout} s")
+        return 1
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Medición del arranque multi-worker")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "2")))
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=30)
+    args = parser.parse_args()
+    return medir(args.workers, args.puerto, args.timeout)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""
+Benchmark de las estrategias de emparejamiento, sin base de datos.
+
+Simula un campeonato completo: en cada partida ordena las parejas con un
+ranking aleatorio, las empareja con la estrategia indicada y añade las mesas
+al historial. Mide el tiempo del emparejamiento de cada partida, en el propio
+proceso y a través del proceso auxiliar, y cuenta los rivales repetidos.
+
+Uso (desde el directorio backend):
+    python -m benchmarks.emparejamiento [--parejas 500,2000,5000] [--partidas 10] [--gb 3]
+"""
+import argparse
+import random
+import sys
+import time
+from app.services import emparejamiento
+from app.services.emparejamiento import ESTRATEGIAS, contar_repetidos
+
+def simular(estrategia: str, parejas: int, partidas: int, gb: int, en_proceso: bool, semilla: int):
+    azar = random.Random(semilla)
+    ids = list(range(1, parejas + 1))
+    rivales = {p: set() for p in ids}
+    descansos = set()
+    grupo_b = set()
+    tiempos = []
+    repetidos = 0
+
+    for partida in range(1, partidas + 1):
+        azar.shuffle(ids)
+        if gb and partida == gb + 1:
+            grupo_b = set(ids[len(ids) // 2:])
+        grupos = [[p for p in ids if p not in grupo_b], [p for p in ids if p in grupo_b]]
+
+        inicio = time.perf_counter()
+        if en_proceso:
+            mesas = emparejamiento._obtener_ejecutor().submit(
+                ESTRATEGIAS[estrategia], grupos, rivales, descansos
+            ).result()
+        else:
+            mesas = ESTRATEGIAS[estrategia](grupos, rivales, descansos)
+        tiempos.append(time.perf_counter() - inicio)
+
+        repetidos += contar_repetidos(mesas, rivales)
+        for p1, p2 in mesas:
+            if p2 is None:
+                descansos.add(p1)
+            else:
+                rivales[p1].add(p2)
+                rivales[p2].add(p1)
+    return tiempos, repetidos
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de las estrategias de emparejamiento")
+    parser.add_argument("--parejas", default="500,2000,5000", help="Tamaños separados por comas")
+    parser.add_argument("--partidas", type=int, default=10)
+    parser.add_argument("--gb", type=int, default=0, help="Partida tras la que se separan los grupos GB (0 sin GB)")
+    parser.add_argument("--semilla", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'estrategia':<13}{'parejas':>8}{'modo':>9}{'media ms':>10}{'max ms':>10}{'repetidos':>11}")
+    try:
+        for parejas in (int(n) for n in args.parejas.split(",")):
+            for estrategia in ESTRATEGIAS:
+                for en_proceso in (False, True):
+                    # La primera tarea arranca el proceso auxiliar; no se mide
+                    if en_proceso:
+                        emparejamiento._obtener_ejecutor().submit(len, []).result()
+                    tiempos, repetidos = simular(estrategia, parejas, args.partidas, args.gb, en_proceso, args.semilla)
+                    modo = "proceso" if en_proceso else "local"
+                    media = sum(tiempos) / len(tiempos) * 1000
+                    print(f"{estrategia:<13}{parejas:>8}{modo:>9}{media:>10.2f}{max(tiempos) * 1000:>10.2f}{repetidos:>11}")
+    finally:
+        emparejamiento.cerrar_ejecutor()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
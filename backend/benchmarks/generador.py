@@ -0,0 +1,165 @@
+"""
+Generador de campeonatos sintéticos a través de los modelos.
+
+Crea un campeonato con el número de parejas indicado (con sus dos jugadores),
+juega las partidas anteriores a la actual con resultados aleatorios usando las
+mismas reglas que POST /resultados y guarda las mesas de todas las partidas
+hasta la actual, como hace la aplicación.
+"""
+import random
+import time
+import uuid
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import insert, text
+from sqlalchemy.orm import Session
+from app.models import Campeonato, Pareja, Jugador, Mesa, Resultado, Clasificacion
+from app.schemas.resultado import ResultadoCreate
+from app.routes.resultados import calcular_resultados_mesa
+from app.services.estado_partida import recontar_partidas
+from app.services.ranking_partida import guardar_ranking_partida
+
+CAMPOS_TOTALES = ("rt", "mg", "pp", "pg")
+
+def _emparejar(orden: List[int]) -> List[Tuple[int, Optional[int]]]:
+    """Mesas consecutivas: 1ª con 2ª, 3ª con 4ª... la última puede quedar sola"""
+    return [
+        (orden[i], orden[i + 1] if i + 1 < len(orden) else None)
+        for i in range(0, len(orden), 2)
+    ]
+
+def _orden_ranking(parejas: List[int], totales: Dict[int, dict], gb: Dict[int, bool],
+                   sorteo: Dict[int, int], por_gb: bool = True) -> List[int]:
+    """Mismo orden que el ranking: GB, PG, PP y RT descendentes, MG ascendente, sorteo"""
+    def clave(pareja_id):
+        t = totales[pareja_id]
+        return (gb[pareja_id] if por_gb else False, -t["pg"], -t["pp"], -t["rt"], t["mg"], sorteo[pareja_id])
+    return sorted(parejas, key=clave)
+
+def _jugar_mesa(campeonato: Campeonato, partida: int, numero: int,
+                pareja1: int, pareja2: Optional[int], azar: random.Random) -> List[dict]:
+    def resultado(pareja_id):
+        rt = azar.randint(0, campeonato.pm + 129)
+        return ResultadoCreate(
+            pareja_id=pareja_id, mesa_id=numero, partida=partida,
+            campeonato_id=campeonato.id, rp=rt, rt=rt, mg=azar.randint(0, 8)
+        )
+    return calcular_resultados_mesa(
+        campeonato, resultado(pareja1), resultado(pareja2) if pareja2 else None
+    )
+
+def generar_campeonato(
+    db: Session,
+    parejas: int = 100,
+    partidas: int = 6,
+    partida_actual: int = 0,
+    con_resultados: bool = False,
+    gb: bool = False,
+    gb_valor: Optional[int] = None,
+    pm: int = 300,
+    semilla: Optional[int] = None
+) -> Campeonato:
+    """
+    Genera un campeonato y hace commit. Con partida_actual=0 la inscripción
+    sigue abierta; con partida_actual=N existen las mesas de las partidas 1..N y
+    los resultados de las anteriores, y los de la N si con_resultados=True.
+    Con gb=True las parejas de la mitad inferior del ranking pasan al grupo B
+    al terminar la partida gb_valor, como hace crear_mesas_ranking.
+    """
+    if not 0 <= partida_actual <= partidas:
+        raise ValueError("partida_actual debe estar entre 0 y el número de partidas")
+    azar = random.Random(semilla)
+
+    campeonato = Campeonato(
+        nombre=f"benchmark-{uuid.uuid4().hex[:8]}",
+        fecha_inicio=date.today(),
+        dias_duracion=1,
+        numero_partidas=partidas,
+        gb=gb,
+        gb_valor=gb_valor if gb else None,
+        activo=True,
+        partida_actual=partida_actual,
+        pm=pm,
+        version=int(time.time())
+    )
+    db.add(campeonato)
+    db.flush()
+
+    pareja_ids = list(db.scalars(
+        insert(Pareja).returning(Pareja.id),
+        [
+            dict(nombre=f"Pareja {n}", club_pertenencia=f"Club {n % 40}",
+                 activa=True, gb=False, campeonato_id=campeonato.id)
+            for n in range(1, parejas + 1)
+        ]
+    ))
+    db.execute(insert(Jugador), [
+        dict(nombre=f"Jugador {pareja_id}-{j}", apellido="Sintético",
+             pareja_id=pareja_id, campeonato_id=campeonato.id)
+        for pareja_id in pareja_ids for j in (1, 2)
+    ])
+
+    totales = {p: {**{c: 0 for c in CAMPOS_TOTALES}, "partidas_jugadas": 0, "ultima_partida": 0} for p in pareja_ids}
+    grupo_b = {p: False for p in pareja_ids}
+    sorteo = {p: 0 for p in pareja_ids}
+    filas_resultados = []
+    filas_mesas = []
+
+    for partida in range(1, partida_actual + 1):
+        if partida == 1:
+            orden = pareja_ids[:]
+            azar.shuffle(orden)
+            sorteo = {p: posicion for posicion, p in enumerate(orden, start=1)}
+        else:
+            if gb and partida - 1 == gb_valor:
+                # La mitad inferior del ranking pasa al grupo B
+                ranking = _orden_ranking(pareja_ids, totales, grupo_b, sorteo, por_gb=False)
+                for p in ranking[len(ranking) // 2:]:
+                    grupo_b[p] = True
+            orden = _orden_ranking(pareja_ids, totales, grupo_b, sorteo)
+        mesas = _emparejar(orden)
+        filas_mesas.extend(
+            dict(numero=numero, partida=partida, pareja1_id=pareja1,
+                 pareja2_id=pareja2, campeonato_id=campeonato.id,
+                 con_resultado=partida < partida_actual or con_resultados)
+            for numero, (pareja1, pareja2) in enumerate(mesas, start=1)
+        )
+
+        if partida == partida_actual and not con_resultados:
+            break
+        for numero, (pareja1, pareja2) in enumerate(mesas, start=1):
+            for fila in _jugar_mesa(campeonato, partida, numero, pareja1, pareja2, azar):
+                filas_resultados.append(fila)
+                t = totales[fila["pareja_id"]]
+                for campo in CAMPOS_TOTALES:
+                    t[campo] += int(fila[campo])
+                t["partidas_jugadas"] += 1
+                t["ultima_partida"] = partida
+
+    if filas_resultados:
+        db.execute(insert(Resultado), filas_resultados)
+    if filas_mesas:
+        db.execute(insert(Mesa), filas_mesas)
+        recontar_partidas(db, campeonato.id)
+    if partida_actual > 0:
+        db.execute(insert(Clasificacion), [
+            dict(pareja_id=p, campeonato_id=campeonato.id, orden_sorteo=sorteo[p],
+                 **{c: int(v) for c, v in totales[p].items()})
+            for p in pareja_ids
+        ])
+    grupo_b_ids = [p for p, en_b in grupo_b.items() if en_b]
+    if grupo_b_ids:
+        db.query(Pareja).filter(Pareja.id.in_(grupo_b_ids)).update({"gb": True}, synchronize_session=False)
+    # Clasificaciones guardadas de las partidas ya cerradas
+    for partida in range(1, partida_actual):
+        guardar_ranking_partida(db, campeonato, partida)
+
+    db.commit()
+    return campeonato
+
+def borrar_campeonato(db: Session, campeonato_id: int):
+    """Borra un campeonato generado con todos sus datos"""
+    for tabla in ("contadores_partida", "mesas", "resultados", "clasificaciones", "rankings_partida", "jugadores", "parejas"):
+        db.execute(text(f"DELETE FROM {tabla} WHERE campeonato_id = :id"), {"id": campeonato_id})
+    db.execute(text("DELETE FROM campeonatos WHERE id = :id"), {"id": campeonato_id})
+    db.commit()
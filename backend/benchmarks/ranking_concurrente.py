@@ -0,0 +1,116 @@
+"""
+Benchmark de lecturas concurrentes del ranking.
+
+Compara la consulta del ranking ejecutada con la sesión síncrona dentro de una
+corrutina (como hacían antes las rutas async def, bloqueando el event loop)
+con la misma consulta sobre AsyncSession. Con la sesión síncrona el
+rendimiento no mejora al aumentar la concurrencia porque las peticiones se
+ejecutan una detrás de otra; con la asíncrona escala hasta el tamaño del pool.
+
+La ganancia depende del tiempo que la petición pasa esperando a la base de
+datos. Con la base de datos en la misma máquina y pocos núcleos casi todo es
+CPU; --latencia-ms añade una espera en el servidor (pg_sleep) antes de cada
+consulta para simular la latencia de red hasta un servidor remoto.
+
+Uso (desde el directorio backend, contra una base de datos PostgreSQL):
+    python -m benchmarks.ranking_concurrente [--parejas N] [--peticiones N] [--concurrencia 1,4,16] [--latencia-ms N]
+
+Los datos sintéticos se borran al terminar.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from dotenv import load_dotenv
+
+env = os.getenv("ENV", "development")
+if env.lower() == "production":
+    dotenv_path = ".env.prod"
+else:
+    dotenv_path = ".env.dev"
+load_dotenv(dotenv_path=dotenv_path)
+
+from sqlalchemy import text
+from app import database
+from app.routes.ranking import consulta_ranking
+from benchmarks.generador import generar_campeonato, borrar_campeonato
+
+LATENCIA = text("SELECT pg_sleep(:segundos)")
+
+async def ranking_bloqueante(campeonato_id: int, latencia: float = 0):
+    db = database.SessionLocal()
+    try:
+        if latencia:
+            db.execute(LATENCIA, {"segundos": latencia})
+        return db.execute(consulta_ranking(campeonato_id)).all()
+    finally:
+        db.close()
+
+async def ranking_asincrono(campeonato_id: int, latencia: float = 0):
+    async with database.AsyncSessionLocal() as db:
+        if latencia:
+            await db.execute(LATENCIA, {"segundos": latencia})
+        return (await db.execute(consulta_ranking(campeonato_id))).all()
+
+async def medir(funcion, campeonato_id: int, peticiones: int, concurrencia: int, latencia: float) -> dict:
+    latencias = []
+    pendientes = iter(range(peticiones))
+
+    async def trabajador():
+        for _ in pendientes:
+            inicio = time.perf_counter()
+            await funcion(campeonato_id, latencia)
+            latencias.append(time.perf_counter() - inicio)
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(trabajador() for _ in range(concurrencia)))
+    total = time.perf_counter() - inicio
+
+    latencias.sort()
+    return {
+        "peticiones_s": peticiones / total,
+        "p50_ms": statistics.median(latencias) * 1000,
+        "p95_ms": latencias[int(len(latencias) * 0.95) - 1] * 1000
+    }
+
+def crear_campeonato(parejas: int) -> int:
+    with database.SessionLocal() as db:
+        return generar_campeonato(db, parejas, partidas=5, partida_actual=4, con_resultados=True).id
+
+async def ejecutar(campeonato_id: int, peticiones: int, niveles, latencia: float):
+    # Calentar ambos pools antes de medir
+    await ranking_asincrono(campeonato_id)
+    await ranking_bloqueante(campeonato_id)
+
+    print(f"{'modo':<12}{'concurrencia':>13}{'pet/s':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for nombre, funcion in (("bloqueante", ranking_bloqueante), ("asincrono", ranking_asincrono)):
+        for concurrencia in niveles:
+            r = await medir(funcion, campeonato_id, peticiones, concurrencia, latencia)
+            print(f"{nombre:<12}{concurrencia:>13}{r['peticiones_s']:>10.1f}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}")
+
+    await database.async_engine.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de lecturas concurrentes del ranking")
+    parser.add_argument("--parejas", type=int, default=500, help="Parejas del campeonato sintético")
+    parser.add_argument("--peticiones", type=int, default=200, help="Peticiones por medición")
+    parser.add_argument("--concurrencia", default="1,2,4,8", help="Niveles de concurrencia separados por comas")
+    parser.add_argument("--latencia-ms", type=float, default=0, help="Espera simulada por petición en el servidor")
+    args = parser.parse_args()
+    niveles = [int(n) for n in args.concurrencia.split(",")]
+
+    database.init_db(os.getenv("DB_NAME"))
+    database.init_async_db(os.getenv("DB_NAME"))
+
+    campeonato_id = crear_campeonato(args.parejas)
+    try:
+        asyncio.run(ejecutar(campeonato_id, args.peticiones, niveles, args.latencia_ms / 1000))
+    finally:
+        with database.SessionLocal() as db:
+            borrar_campeonato(db, campeonato_id)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
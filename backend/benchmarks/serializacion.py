@@ -0,0 +1,145 @@
+"""
+Benchmark de la serialización de los listados grandes, sin base de datos.
+
+Compara, para el ranking, las mesas y las parejas, el camino anterior (objetos
+del ORM o diccionarios validados contra el response_model, jsonable_encoder y
+json.dumps, como hace JSONResponse) con el actual (diccionarios de tipos
+básicos construidos desde las filas y serializados con orjson). Las filas se
+crean en memoria, de modo que solo se mide la serialización. Los tiempos se
+dan en milisegundos por cada 1.000 filas.
+
+Uso (desde el directorio backend):
+    python -m benchmarks.serializacion [--filas 1000,10000] [--repeticiones 20]
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from collections import namedtuple
+from typing import List
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from app.models import Jugador, Mesa, Pareja
+from app.routes.ranking import ranking_a_diccionarios
+from app.schemas import Mesa as MesaSchema, Pareja as ParejaSchema
+from app.schemas.ranking import RankingPareja
+from app.services.listados import CAMPOS_JUGADOR, CAMPOS_PAREJA_ANIDADA
+from app.services.paginacion import filas_a_diccionarios
+
+CAMPEONATO = 1
+
+FilaRanking = namedtuple("FilaRanking", [
+    "numero", "nombre", "club", "gb", "pp", "rt", "mg", "pg", "ultima_partida",
+    "partidas_jugadas", "ordenSorteo", "posicion_anterior"
+])
+FilaPareja = namedtuple("FilaPareja", CAMPOS_PAREJA_ANIDADA)
+FilaJugador = namedtuple("FilaJugador", CAMPOS_JUGADOR)
+FilaMesa = namedtuple("FilaMesa", ["numero", "partida", "pareja1_id", "pareja2_id", "campeonato_id"])
+
+# FastAPI crea el validador del response_model una sola vez, al registrar la ruta
+ADAPTADORES = {esquema: TypeAdapter(List[esquema]) for esquema in (RankingPareja, MesaSchema, ParejaSchema)}
+
+def json_anterior(contenido, esquema) -> bytes:
+    """Camino de FastAPI con response_model y JSONResponse"""
+    adaptador = ADAPTADORES[esquema]
+    validado = adaptador.validate_python(contenido, from_attributes=True)
+    datos = jsonable_encoder(adaptador.dump_python(validado, mode="json"))
+    return json.dumps(datos, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+def generar_parejas(n: int):
+    """Parejas como objetos del ORM (camino anterior) y como filas de columnas sueltas"""
+    objetos, filas, jugadores = [], [], []
+    for i in range(1, n + 1):
+        pareja_jugadores = [
+            FilaJugador(2 * i - 1, f"Nombre{i}a", f"Apellido{i}a", i, CAMPEONATO),
+            FilaJugador(2 * i, f"Nombre{i}b", f"Apellido{i}b", i, CAMPEONATO)
+        ]
+        fila = FilaPareja(i, f"Pareja {i}", f"Club {i % 40}", True, i % 2 == 0, CAMPEONATO)
+        filas.append(fila)
+        jugadores.extend(pareja_jugadores)
+        objetos.append(Pareja(
+            **fila._asdict(),
+            jugadores=[Jugador(**j._asdict()) for j in pareja_jugadores]
+        ))
+    return objetos, filas, jugadores
+
+def parejas_con_jugadores(filas, jugadores) -> dict:
+    """Ensamblado de listados.listar_parejas / listar_mesas"""
+    parejas = {p["id"]: p for p in filas_a_diccionarios(filas, CAMPOS_PAREJA_ANIDADA)}
+    for pareja in parejas.values():
+        pareja["jugadores"] = []
+    for jugador in filas_a_diccionarios(jugadores, CAMPOS_JUGADOR):
+        parejas[jugador["pareja_id"]]["jugadores"].append(jugador)
+    return parejas
+
+def caso_ranking(n: int):
+    filas = [
+        FilaRanking(i, f"Pareja {i}", f"Club {i % 40}", False, 300 - i, 900 - i, i % 7, 3,
+                    3, 3, i, n - i + 1 if i % 3 else None)
+        for i in range(1, n + 1)
+    ]
+    anterior = lambda: json_anterior(ranking_a_diccionarios(filas), RankingPareja)
+    actual = lambda: orjson.dumps(ranking_a_diccionarios(filas))
+    return anterior, actual
+
+def caso_parejas(n: int):
+    objetos, filas, jugadores = generar_parejas(n)
+    anterior = lambda: json_anterior(objetos, ParejaSchema)
+    actual = lambda: orjson.dumps(list(parejas_con_jugadores(filas, jugadores).values()))
+    return anterior, actual
+
+def caso_mesas(n: int):
+    # n mesas, con el doble de parejas
+    objetos_parejas, filas_parejas, jugadores = generar_parejas(2 * n)
+    filas = [FilaMesa(i, 1, 2 * i - 1, 2 * i, CAMPEONATO) for i in range(1, n + 1)]
+    objetos = [
+        Mesa(
+            numero=f.numero, partida=f.partida, pareja1_id=f.pareja1_id, pareja2_id=f.pareja2_id,
+            campeonato_id=f.campeonato_id,
+            pareja1=objetos_parejas[f.pareja1_id - 1], pareja2=objetos_parejas[f.pareja2_id - 1]
+        )
+        for f in filas
+    ]
+
+    def actual():
+        parejas = parejas_con_jugadores(filas_parejas, jugadores)
+        return orjson.dumps([
+            {
+                "id": f.numero, "partida": f.partida, "pareja1_id": f.pareja1_id,
+                "pareja2_id": f.pareja2_id, "campeonato_id": f.campeonato_id,
+                "pareja1": parejas.get(f.pareja1_id), "pareja2": parejas.get(f.pareja2_id)
+            }
+            for f in filas
+        ])
+    return (lambda: json_anterior(objetos, MesaSchema)), actual
+
+CASOS = {"ranking": caso_ranking, "mesas": caso_mesas, "parejas": caso_parejas}
+
+def medir(funcion, repeticiones: int) -> float:
+    funcion()
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la serialización de los listados")
+    parser.add_argument("--filas", default="1000,10000", help="Tamaños separados por comas")
+    parser.add_argument("--repeticiones", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'listado':<9}{'filas':>8}{'antes ms/1k':>13}{'ahora ms/1k':>13}{'mejora':>8}")
+    for filas in (int(n) for n in args.filas.split(",")):
+        for nombre, caso in CASOS.items():
+            anterior, actual = caso(filas)
+            antes = medir(anterior, args.repeticiones) * 1000 * 1000 / filas
+            ahora = medir(actual, args.repeticiones) * 1000 * 1000 / filas
+            print(f"{nombre:<9}{filas:>8}{antes:>13.2f}{ahora:>13.2f}{antes / ahora:>7.1f}x")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+"""
+Suite de micro-benchmarks de las rutas principales.
+
+Cada benchmark genera su propio campeonato sintético (benchmarks/generador.py),
+mide la ruta a través de la aplicación completa con TestClient y borra el
+campeonato al terminar. La preparación de los datos no entra en la medición.
+
+El informe JSON incluye el commit y el entorno para poder comparar ejecuciones:
+
+    python -m benchmarks.suite --parejas 100,1000 --salida antes.json
+    ...
+    python -m benchmarks.suite --parejas 100,1000 --salida despues.json --comparar antes.json
+
+Se debe ejecutar contra una base de datos PostgreSQL local dedicada, con el
+esquema preparado con init_app.py.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from dotenv import load_dotenv
+
+env = os.getenv("ENV", "development")
+if env.lower() == "production":
+    dotenv_path = ".env.prod"
+else:
+    dotenv_path = ".env.dev"
+load_dotenv(dotenv_path=dotenv_path)
+
+import logging
+import sqlalchemy
+from sqlalchemy import text
+from fastapi.testclient import TestClient
+from app.main import app
+from app import database
+from benchmarks.generador import generar_campeonato, borrar_campeonato
+
+# El log de cada sentencia SQL de app.main distorsionaría las mediciones
+logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
+
+def _comprobar(respuesta):
+    if respuesta.status_code >= 400:
+        raise RuntimeError(f"{respuesta.request.method} {respuesta.request.url}: {respuesta.status_code} {respuesta.text[:200]}")
+    return respuesta
+
+def _medir(funcion) -> float:
+    inicio = time.perf_counter()
+    funcion()
+    return time.perf_counter() - inicio
+
+class Campeonato:
+    """Genera un campeonato al entrar y lo borra al salir"""
+    def __init__(self, **opciones):
+        self.opciones = opciones
+
+    def __enter__(self):
+        with database.SessionLocal() as db:
+            campeonato = generar_campeonato(db, **self.opciones)
+            self.id = campeonato.id
+            self.partida_actual = campeonato.partida_actual
+        return self
+
+    def __exit__(self, *exc):
+        with database.SessionLocal() as db:
+            borrar_campeonato(db, self.id)
+
+def bench_obtener_ranking(cliente, parejas, repeticiones, partidas):
+    with Campeonato(parejas=parejas, partidas=partidas, partida_actual=partidas - 1, con_resultados=True) as c:
+        return [
+            _medir(lambda: _comprobar(cliente.get("/resultados/ranking", params={"campeonato_id": c.id})))
+            for _ in range(repeticiones)
+        ]
+
+def bench_get_mesas(cliente, parejas, repeticiones, partidas):
+    with Campeonato(parejas=parejas, partidas=partidas, partida_actual=partidas - 1) as c:
+        return [
+            _medir(lambda: _comprobar(cliente.get("/mesas", params={"campeonato_id": c.id, "partida": c.partida_actual})))
+            for _ in range(repeticiones)
+        ]
+
+def bench_crear_mesas_ranking(cliente, parejas, repeticiones, partidas):
+    tiempos = []
+    for _ in range(repeticiones):
+        with Campeonato(parejas=parejas, partidas=partidas, partida_actual=partidas - 1, con_resultados=True) as c:
+            tiempos.append(_medir(lambda: _comprobar(cliente.post("/mesas/ranking", params={"campeonato_id": c.id}))))
+    return tiempos
+
+def bench_crear_mesas_suizo(cliente, parejas, repeticiones, partidas):
+    tiempos = []
+    for _ in range(repeticiones):
+        with Campeonato(parejas=parejas, partidas=partidas, partida_actual=partidas - 1, con_resultados=True) as c:
+            tiempos.append(_medir(lambda: _comprobar(cliente.post(
+                "/mesas/ranking", params={"campeonato_id": c.id, "estrategia": "suizo"}
+            ))))
+    return tiempos
+
+def bench_crear_resultados(cliente, parejas, repeticiones, partidas):
+    with Campeonato(parejas=parejas, partidas=partidas, partida_actual=partidas - 1) as c:
+        mesas = _comprobar(cliente.get("/mesas", params={"campeonato_id": c.id, "partida": c.partida_actual})).json()
+        # Una mesa distinta en cada repetición
+        mesas = [m for m in mesas if m["pareja2_id"] is not None][:repeticiones]
+
+        def resultado(mesa, pareja_id, rt):
+            return {"pareja_id": pareja_id, "mesa_id": mesa["id"], "partida": c.partida_actual,
+                    "campeonato_id": c.id, "rp": rt, "rt": rt, "mg": 2}
+
+        return [
+            _medir(lambda: _comprobar(cliente.post("/resultados", json={
+                "resultado1": resultado(mesa, mesa["pareja1_id"], 250),
+                "resultado2": resultado(mesa, mesa["pareja2_id"], 180)
+            })))
+            for mesa in mesas
+        ]
+
+def bench_cerrar_inscripcion(cliente, parejas, repeticiones, partidas):
+    tiempos = []
+    for _ in range(repeticiones):
+        with Campeonato(parejas=parejas, partidas=partidas) as c:
+            tiempos.append(_medir(lambda: _comprobar(cliente.post(f"/campeonatos/{c.id}/cerrar-inscripcion"))))
+    return tiempos
+
+def bench_recalcular_valores(cliente, parejas, repeticiones, partidas):
+    with Campeonato(parejas=parejas, partidas=partidas, partida_actual=partidas - 1, con_resultados=True) as c:
+        return [
+            _medir(lambda: _comprobar(cliente.post(f"/resultados/recalcular/{c.id}")))
+            for _ in range(repeticiones)
+        ]
+
+BENCHMARKS = {
+    "obtener_ranking": bench_obtener_ranking,
+    "get_mesas": bench_get_mesas,
+    "crear_mesas_ranking": bench_crear_mesas_ranking,
+    "crear_mesas_suizo": bench_crear_mesas_suizo,
+    "crear_resultados": bench_crear_resultados,
+    "cerrar_inscripcion": bench_cerrar_inscripcion,
+    "recalcular_valores": bench_recalcular_valores,
+}
+
+def resumir(tiempos) -> dict:
+    ms = sorted(t * 1000 for t in tiempos)
+    return {
+        "repeticiones": len(ms),
+        "min_ms": round(ms[0], 3),
+        "media_ms": round(statistics.fmean(ms), 3),
+        "p50_ms": round(statistics.median(ms), 3),
+        "p95_ms": round(ms[max(int(len(ms) * 0.95) - 1, 0)], 3),
+        "max_ms": round(ms[-1], 3)
+    }
+
+def entorno() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    with database.SessionLocal() as db:
+        servidor = db.execute(text("SHOW server_version")).scalar() \
+            if db.get_bind().dialect.name == "postgresql" else db.get_bind().dialect.name
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "sqlalchemy": sqlalchemy.__version__,
+        "base_de_datos": servidor,
+        "maquina": platform.node()
+    }
+
+def comparar(anterior: dict, actual: dict):
+    previos = {(r["benchmark"], r["parejas"]): r for r in anterior["resultados"]}
+    print(f"\nComparación con {anterior['entorno'].get('commit')} (p50 ms)")
+    print(f"{'benchmark':<22}{'parejas':>8}{'antes':>10}{'ahora':>10}{'cambio':>9}")
+    for r in actual["resultados"]:
+        previo = previos.get((r["benchmark"], r["parejas"]))
+        if previo is None:
+            continue
+        cambio = (r["p50_ms"] - previo["p50_ms"]) / previo["p50_ms"] * 100 if previo["p50_ms"] else 0
+        print(f"{r['benchmark']:<22}{r['parejas']:>8}{previo['p50_ms']:>10.2f}{r['p50_ms']:>10.2f}{cambio:>+8.1f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite de micro-benchmarks")
+    parser.add_argument("--parejas", default="10,100,1000", help="Tamaños de campeonato separados por comas (10 a 10000)")
+    parser.add_argument("--partidas", type=int, default=4, help="Partidas del campeonato; se mide en la penúltima")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--solo", default=None, help="Benchmarks a ejecutar separados por comas")
+    parser.add_argument("--salida", default="benchmark.json", help="Fichero del informe JSON")
+    parser.add_argument("--comparar", default=None, help="Informe anterior con el que comparar")
+    args = parser.parse_args()
+
+    tamanos = [int(n) for n in args.parejas.split(",")]
+    if any(not 10 <= n <= 10000 for n in tamanos):
+        parser.error("El número de parejas debe estar entre 10 y 10000")
+    if args.partidas < 2:
+        parser.error("Se necesitan al menos 2 partidas")
+    nombres = args.solo.split(",") if args.solo else list(BENCHMARKS)
+    desconocidos = set(nombres) - set(BENCHMARKS)
+    if desconocidos:
+        parser.error(f"Benchmarks desconocidos: {', '.join(sorted(desconocidos))}")
+
+    informe = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "parametros": {"partidas": args.partidas, "repeticiones": args.repeticiones},
+        "resultados": []
+    }
+    with TestClient(app) as cliente:
+        informe["entorno"] = entorno()
+        print(f"{'benchmark':<22}{'parejas':>8}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+        for parejas in tamanos:
+            for nombre in nombres:
+                tiempos = BENCHMARKS[nombre](cliente, parejas, args.repeticiones, args.partidas)
+                r = {"benchmark": nombre, "parejas": parejas, **resumir(tiempos)}
+                informe["resultados"].append(r)
+                print(f"{nombre:<22}{parejas:>8}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['max_ms']:>10.2f}")
+
+    with open(args.salida, "w") as f:
+        json.dump(informe, f, indent=2)
+    print(f"\nInforme guardado en {args.salida}")
+
+    if args.comparar:
+        with open(args.comparar) as f:
+            comparar(json.load(f), informe)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
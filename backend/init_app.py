@@ -1,7 +1,14 @@
-from app.database import init_db
-import psycopg2
-from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+"""
+Preparación única de la aplicación antes de arrancar los workers de la API:
+directorios estáticos, tablas, migraciones de Alembic y relleno de las
+tablas derivadas de los campeonatos existentes. Es idempotente y se
+puede ejecutar en cada despliegue.
+
+Uso (desde el directorio backend):
+    python init_app.py
+"""
 import os
+import pathlib
 from dotenv import load_dotenv
 
 env = os.getenv("ENV", "development")
@@ -11,13 +18,102 @@ else:
     dotenv_path = ".env.dev"
 load_dotenv(dotenv_path=dotenv_path)
 
+from sqlalchemy import exists, inspect, text
+from sqlalchemy.orm import Session
+from alembic import command
+from alembic.config import Config
+from app.database import init_db, crear_esquema, LOCK_ESQUEMA
+from app.models import Campeonato, Clasificacion, RankingPartida
+from app.services.clasificacion import reconstruir_clasificacion
+from app.services.ranking_partida import regenerar_rankings_partida
+
+BASE_DIR = pathlib.Path(__file__).resolve().parent
+
+# Primera revisión de Alembic; las bases de datos creadas antes de usarlo ya la incluyen
+REVISION_INICIAL = "fbf1aa575a28"
+
+def crear_directorios():
+    for directorio in ("static", "static/logos", "static/plantillas"):
+        os.makedirs(BASE_DIR / directorio, exist_ok=True)
+
+def aplicar_migraciones(engine, base_de_datos_nueva: bool):
+    """
+    Lleva el esquema a la última revisión de Alembic. Una base de datos recién
+    creada con create_all ya está al día y solo se marca como tal.
+    """
+    config = Config(str(BASE_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BASE_DIR / "alembic"))
+
+    if "alembic_version" not in inspect(engine).get_table_names():
+        if base_de_datos_nueva:
+            command.stamp(config, "head")
+            return
+        command.stamp(config, REVISION_INICIAL)
+    command.upgrade(config, "head")
+
+def rellenar_tablas_derivadas(engine):
+    """
+    Rellena la clasificación y las clasificaciones guardadas de cada partida de
+    los campeonatos que ya estaban en juego antes de que existieran esas tablas.
+    Los campeonatos que ya las tienen no se tocan.
+    """
+    with Session(engine) as db:
+        sin_clasificacion = db.query(Campeonato.id).filter(
+            Campeonato.partida_actual > 0,
+            ~exists().where(Clasificacion.campeonato_id == Campeonato.id)
+        ).all()
+        for campeonato in sin_clasificacion:
+            reconstruir_clasificacion(db, campeonato.id)
+
+        # Las clasificaciones de cada partida usan el orden del sorteo guardado
+        # en la clasificación, por eso se rellenan después
+        sin_rankings = db.query(Campeonato).filter(
+            Campeonato.partida_actual > 1,
+            ~exists().where(RankingPartida.campeonato_id == Campeonato.id)
+        ).all()
+        for campeonato in sin_rankings:
+            regenerar_rankings_partida(db, campeonato)
+
+        db.commit()
+    if sin_clasificacion or sin_rankings:
+        print(f"Clasificaciones reconstruidas: {len(sin_clasificacion)} campeonatos; "
+              f"clasificaciones por partida: {len(sin_rankings)} campeonatos")
+
+def _con_lock_esquema(engine, funcion, *args):
+    """Ejecuta la función con el advisory lock del esquema en PostgreSQL"""
+    if engine.dialect.name != "postgresql":
+        return funcion(*args)
+    # Serializar las migraciones si se lanzan varias inicializaciones a la vez
+    with engine.connect() as conn:
+        conn.execute(text("SELECT pg_advisory_lock(:clave)"), {"clave": LOCK_ESQUEMA})
+        try:
+            return funcion(*args)
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:clave)"), {"clave": LOCK_ESQUEMA})
+
 def init_database():
     """
     Inicializa la base de datos y crea las tablas necesarias
     """
     try:
         print("Iniciando inicialización de la base de datos...")
-        engine = init_db('domino_app')
+        crear_directorios()
+        engine = init_db(os.getenv("DB_NAME", "domino_app"), crear_tablas=False)
+        base_de_datos_nueva = "campeonatos" not in inspect(engine).get_table_names()
+
+        # En una base de datos existente las migraciones van antes que
+        # create_all: create_all crearía vacías las tablas nuevas sin añadir
+        # las columnas, y las migraciones que las crean y las rellenan ya no
+        # tendrían nada que hacer
+        if not base_de_datos_nueva:
+            _con_lock_esquema(engine, aplicar_migraciones, engine, False)
+        # crear_esquema toma el mismo lock por su cuenta
+        crear_esquema(engine)
+        if base_de_datos_nueva:
+            _con_lock_esquema(engine, aplicar_migraciones, engine, True)
+        else:
+            _con_lock_esquema(engine, rellenar_tablas_derivadas, engine)
+
         print("Base de datos inicializada correctamente")
         return True
     except Exception as e:
@@ -28,4 +124,4 @@ if __name__ == "__main__":
     success = init_database()
     if not success:
         print("La inicialización de la base de datos falló. Revise los logs para más detalles.")
-        exit(1) 
\ No newline at end of file
+        exit(1)
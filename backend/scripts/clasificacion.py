@@ -0,0 +1,75 @@
+"""
+Mantenimiento de la tabla de clasificación y de las clasificaciones
+guardadas de cada partida.
+
+Uso (desde el directorio backend):
+    python -m scripts.clasificacion reconstruir [--campeonato ID]
+    python -m scripts.clasificacion verificar [--campeonato ID]
+
+Sin --campeonato se procesan todos los campeonatos.
+"""
+import argparse
+import os
+import sys
+from dotenv import load_dotenv
+
+env = os.getenv("ENV", "development")
+if env.lower() == "production":
+    dotenv_path = ".env.prod"
+else:
+    dotenv_path = ".env.dev"
+load_dotenv(dotenv_path=dotenv_path)
+
+from app import database
+from app.models import Campeonato
+from app.services.clasificacion import reconstruir_clasificacion, verificar_clasificacion
+from app.services.ranking_partida import regenerar_rankings_partida
+
+def _campeonatos(db, campeonato_id):
+    query = db.query(Campeonato.id, Campeonato.nombre)
+    if campeonato_id is not None:
+        query = query.filter(Campeonato.id == campeonato_id)
+    return query.order_by(Campeonato.id).all()
+
+def reconstruir(db, campeonato_id=None):
+    for campeonato in _campeonatos(db, campeonato_id):
+        parejas = reconstruir_clasificacion(db, campeonato.id)
+        partidas = regenerar_rankings_partida(db, db.get(Campeonato, campeonato.id))
+        db.commit()
+        print(f"Campeonato {campeonato.id} ({campeonato.nombre}): {parejas} parejas reconstruidas, "
+              f"{len(partidas)} partidas cerradas guardadas")
+    return 0
+
+def verificar(db, campeonato_id=None):
+    incoherentes = 0
+    for campeonato in _campeonatos(db, campeonato_id):
+        diferencias = verificar_clasificacion(db, campeonato.id)
+        if not diferencias:
+            print(f"Campeonato {campeonato.id} ({campeonato.nombre}): clasificación coherente")
+            continue
+        
+        incoherentes += 1
+        print(f"Campeonato {campeonato.id} ({campeonato.nombre}): {len(diferencias)} diferencias")
+        for d in diferencias:
+            print(f"  pareja {d['pareja_id']}: {d['campo']} guardado={d['guardado']} esperado={d['esperado']}")
+    
+    # Código de salida distinto de cero para poder usarlo en scripts de comprobación
+    return 1 if incoherentes else 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Mantenimiento de la clasificación")
+    parser.add_argument("accion", choices=["reconstruir", "verificar"])
+    parser.add_argument("--campeonato", type=int, default=None, help="ID del campeonato")
+    args = parser.parse_args()
+    
+    database.init_db(os.getenv("DB_NAME"))
+    db = database.SessionLocal()
+    try:
+        if args.accion == "reconstruir":
+            return reconstruir(db, args.campeonato)
+        return verificar(db, args.campeonato)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+"""
+Comprobación de planes de ejecución de las consultas más frecuentes.
+
+Genera dentro de una transacción un campeonato sintético (5.000 parejas por
+defecto) junto con otros campeonatos de relleno para que las tablas tengan un
+tamaño realista, ejecuta ANALYZE y revisa con EXPLAIN que las consultas de
+`obtener_ranking`, `crear_mesas_ranking` y `get_mesas` usan índices en lugar
+de recorrer las tablas completas. Al terminar se deshace la transacción, por
+lo que no quedan datos en la base de datos.
+
+Uso (desde el directorio backend):
+    python -m scripts.explain_indices [--parejas N] [--relleno N] [--partidas N] [--analyze] [--verbose]
+
+Devuelve un código de salida distinto de cero si alguna consulta hace un
+Seq Scan sobre las tablas vigiladas.
+"""
+import argparse
+import json
+import os
+import sys
+import uuid
+from dotenv import load_dotenv
+
+env = os.getenv("ENV", "development")
+if env.lower() == "production":
+    dotenv_path = ".env.prod"
+else:
+    dotenv_path = ".env.dev"
+load_dotenv(dotenv_path=dotenv_path)
+
+from sqlalchemy import text
+from app import database
+from app.models import Campeonato
+from app.routes.ranking import consulta_ranking
+from app.routes.mesa import consulta_ranking_parejas
+from app.services.listados import consulta_mesas
+
+# Tablas en las que no se admite un Seq Scan
+TABLAS_VIGILADAS = {"resultados", "mesas", "parejas", "clasificaciones"}
+
+def generar_datos(db, parejas: int, relleno: int, partidas: int) -> int:
+    """
+    Inserta el campeonato objetivo y los de relleno con generate_series.
+    Devuelve el id del campeonato objetivo.
+    """
+    prefijo = f"explain-{uuid.uuid4().hex[:8]}"
+    ids = db.execute(text("""
+        INSERT INTO campeonatos (nombre, fecha_inicio, dias_duracion, numero_partidas,
+                                 gb, activo, partida_actual, pm, version)
+        SELECT :prefijo || '-' || g, CURRENT_DATE, 1, :numero_partidas,
+               false, true, :partidas, 300, 0
+        FROM generate_series(0, :relleno) AS g
+        ORDER BY g
+        RETURNING id
+    """), {
+        "prefijo": prefijo,
+        "numero_partidas": partidas + 1,
+        "partidas": partidas,
+        "relleno": relleno
+    }).scalars().all()
+    objetivo = min(ids)
+
+    db.execute(text("""
+        INSERT INTO parejas (nombre, club_pertenencia, activa, gb, campeonato_id)
+        SELECT 'Pareja ' || g, 'Club ' || (g % 40), g % 50 <> 0, false, c
+        FROM unnest(CAST(:ids AS integer[])) AS c
+        CROSS JOIN generate_series(1, :parejas) AS g
+    """), {"ids": ids, "parejas": parejas})
+
+    # Numerar las parejas dentro de cada campeonato para repartirlas en mesas
+    db.execute(text("""
+        CREATE TEMPORARY TABLE explain_parejas ON COMMIT DROP AS
+        SELECT id, campeonato_id,
+               ROW_NUMBER() OVER (PARTITION BY campeonato_id ORDER BY id) AS n
+        FROM parejas
+        WHERE campeonato_id = ANY(CAST(:ids AS integer[]))
+    """), {"ids": ids})
+
+    db.execute(text("""
+        INSERT INTO resultados (pareja_id, rp, pp, pg, gb, mesa_id, partida, campeonato_id, rt, mg)
+        SELECT p.id, (p.n * 37 + g * 11) % 300, (p.n * 13 + g) % 200 - 100,
+               (p.n + g) % 2, false, (p.n + 1) / 2, g, p.campeonato_id,
+               (p.n * 7 + g * 3) % 300, (p.n + g) % 5
+        FROM explain_parejas p
+        CROSS JOIN generate_series(1, :partidas) AS g
+    """), {"partidas": partidas})
+
+    db.execute(text("""
+        INSERT INTO clasificaciones (pareja_id, campeonato_id, rt, mg, pp, pg,
+                                     partidas_jugadas, ultima_partida, orden_sorteo)
+        SELECT r.pareja_id, r.campeonato_id, SUM(r.rt), SUM(r.mg), SUM(r.pp), SUM(r.pg),
+               COUNT(*), MAX(r.partida), MIN(p.n)
+        FROM resultados r
+        JOIN explain_parejas p ON p.id = r.pareja_id
+        GROUP BY r.pareja_id, r.campeonato_id
+    """))
+
+    # Las mesas de todas las partidas, incluida la siguiente a la actual
+    db.execute(text("""
+        INSERT INTO mesas (numero, partida, pareja1_id, pareja2_id, campeonato_id)
+        SELECT (p1.n + 1) / 2, g, p1.id, p2.id, p1.campeonato_id
+        FROM explain_parejas p1
+        LEFT JOIN explain_parejas p2
+               ON p2.campeonato_id = p1.campeonato_id AND p2.n = p1.n + 1
+        CROSS JOIN generate_series(1, :partidas + 1) AS g
+        WHERE p1.n % 2 = 1
+    """), {"partidas": partidas})
+
+    for tabla in ("campeonatos", "parejas", "resultados", "clasificaciones", "mesas"):
+        db.execute(text(f"ANALYZE {tabla}"))
+
+    return objetivo
+
+def _nodos(plan):
+    yield plan
+    for hijo in plan.get("Plans", []):
+        yield from _nodos(hijo)
+
+def explicar(db, query, analyze: bool = False):
+    """
+    Ejecuta EXPLAIN sobre la consulta de SQLAlchemy (Query o select) y
+    devuelve el plan en JSON
+    """
+    sentencia = getattr(query, "statement", query)
+    sql = sentencia.compile(
+        dialect=db.get_bind().dialect,
+        compile_kwargs={"literal_binds": True}
+    )
+    opciones = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+    resultado = db.execute(text(f"EXPLAIN ({opciones}) {sql}")).scalar()
+    if isinstance(resultado, str):
+        resultado = json.loads(resultado)
+    return resultado[0]
+
+def comprobar(nombre: str, plan: dict, verbose: bool = False) -> bool:
+    nodos = list(_nodos(plan["Plan"]))
+    accesos = [
+        f"{n['Node Type']}({n.get('Index Name') or n['Relation Name']})"
+        for n in nodos if "Relation Name" in n or "Index Name" in n
+    ]
+    secuenciales = [
+        n["Relation Name"] for n in nodos
+        if n["Node Type"] == "Seq Scan" and n.get("Relation Name") in TABLAS_VIGILADAS
+    ]
+
+    estado = "ERROR" if secuenciales else "OK"
+    tiempo = f" {plan['Execution Time']:.1f} ms" if "Execution Time" in plan else ""
+    print(f"[{estado}] {nombre}{tiempo}")
+    print(f"    {', '.join(accesos)}")
+    if secuenciales:
+        print(f"    Seq Scan sobre: {', '.join(sorted(set(secuenciales)))}")
+    if verbose:
+        print(json.dumps(plan, indent=2))
+    return not secuenciales
+
+def main():
+    parser = argparse.ArgumentParser(description="Comprobación de índices con EXPLAIN")
+    parser.add_argument("--parejas", type=int, default=5000, help="Parejas por campeonato")
+    parser.add_argument("--relleno", type=int, default=20, help="Campeonatos de relleno")
+    parser.add_argument("--partidas", type=int, default=4, help="Partidas ya jugadas")
+    parser.add_argument("--analyze", action="store_true", help="Usar EXPLAIN ANALYZE")
+    parser.add_argument("--verbose", action="store_true", help="Mostrar los planes completos")
+    args = parser.parse_args()
+
+    database.init_db(os.getenv("DB_NAME"))
+    db = database.SessionLocal()
+    try:
+        if db.get_bind().dialect.name != "postgresql":
+            print("Este script solo funciona con PostgreSQL")
+            return 2
+
+        print(f"Generando {args.relleno + 1} campeonatos de {args.parejas} parejas...")
+        campeonato_id = generar_datos(db, args.parejas, args.relleno, args.partidas)
+        campeonato = db.query(Campeonato).filter(Campeonato.id == campeonato_id).one()
+
+        consultas = [
+            ("obtener_ranking", consulta_ranking(campeonato_id, partida_anterior=campeonato.partida_actual - 1)),
+            ("crear_mesas_ranking", consulta_ranking_parejas(db, campeonato)),
+            ("crear_mesas_ranking (asignación GB)", consulta_ranking_parejas(db, campeonato, por_gb=False)),
+            ("get_mesas", consulta_mesas(db, campeonato_id, campeonato.partida_actual + 1)),
+        ]
+
+        correctas = [
+            comprobar(nombre, explicar(db, query, args.analyze), args.verbose)
+            for nombre, query in consultas
+        ]
+        return 0 if all(correctas) else 1
+    finally:
+        # Nunca dejar los datos sintéticos en la base de datos
+        db.rollback()
+        db.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
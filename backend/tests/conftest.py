@@ -0,0 +1,110 @@
+"""
+Fixtures de las pruebas: la aplicación completa sobre un fichero SQLite nuevo
+para cada prueba, sin servidor PostgreSQL.
+
+Uso (desde el directorio backend):
+    python -m pytest -q
+"""
+import datetime
+import os
+import sys
+
+import pytest
+
+# Antes de importar la aplicación, que lee la configuración al cargarse
+os.environ["DB_BACKEND"] = "sqlite"
+os.environ["DB_NAME"] = "pruebas"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+from app import database
+from app.cache import cache_campeonatos
+from app.main import app
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setenv("DB_SQLITE_DIR", str(tmp_path))
+    database.crear_esquema(database.init_db(os.environ["DB_NAME"], crear_tablas=False))
+    database.engine.dispose()
+    cache_campeonatos.limpiar()
+    with TestClient(app) as cliente:
+        yield cliente
+    cache_campeonatos.limpiar()
+
+
+@pytest.fixture
+def db(client):
+    sesion = database.SessionLocal()
+    yield sesion
+    sesion.close()
+
+
+def crear_campeonato(client, numero_partidas=4, **datos) -> int:
+    respuesta = client.post("/campeonatos/", json={
+        "nombre": "Campeonato de pruebas",
+        "fecha_inicio": datetime.date.today().isoformat(),
+        "dias_duracion": 1,
+        "numero_partidas": numero_partidas,
+        "gb": False,
+        "pm": 300,
+        **datos
+    })
+    assert respuesta.status_code == 200, respuesta.text
+    return respuesta.json()["id"]
+
+
+def crear_parejas(client, campeonato_id: int, n: int):
+    for i in range(n):
+        respuesta = client.post("/parejas/", json={
+            "nombre": f"Pareja {i + 1}",
+            "club_pertenencia": "Club",
+            "campeonato_id": campeonato_id,
+            "jugadores": [
+                {"nombre": f"A{i}", "apellido": "Uno"},
+                {"nombre": f"B{i}", "apellido": "Dos"}
+            ]
+        })
+        assert respuesta.status_code == 200, respuesta.text
+
+
+def jugar_partida(client, campeonato_id: int, partida: int, puntos=None):
+    """
+    Guarda los resultados de todas las mesas de la partida. `puntos(mesa)`
+    devuelve los puntos de cada pareja; por defecto gana siempre la pareja 1.
+    """
+    mesas = client.get("/mesas", params={"campeonato_id": campeonato_id, "partida": partida}).json()
+    resultados = []
+    for mesa in mesas:
+        rt1, rt2 = puntos(mesa) if puntos else (300, 100)
+        resultado = {"resultado1": {
+            "pareja_id": mesa["pareja1_id"], "mesa_id": mesa["id"], "partida": partida,
+            "campeonato_id": campeonato_id, "rp": 0, "rt": rt1, "mg": 2
+        }}
+        if mesa["pareja2_id"]:
+            resultado["resultado2"] = {
+                "pareja_id": mesa["pareja2_id"], "mesa_id": mesa["id"], "partida": partida,
+                "campeonato_id": campeonato_id, "rp": 0, "rt": rt2, "mg": 1
+            }
+        resultados.append(resultado)
+    respuesta = client.post(
+        f"/resultados/partida/{partida}/bulk", params={"campeonato_id": campeonato_id}, json=resultados
+    )
+    assert respuesta.status_code == 200, respuesta.text
+    return mesas
+
+
+def preparar_campeonato(client, parejas: int = 8) -> int:
+    """Campeonato con la partida 1 jugada y la partida 2 sorteada"""
+    campeonato_id = crear_campeonato(client)
+    crear_parejas(client, campeonato_id, parejas)
+    assert client.post(f"/campeonatos/{campeonato_id}/cerrar-inscripcion").status_code == 200
+    jugar_partida(client, campeonato_id, 1)
+    assert client.post("/mesas/ranking", params={"campeonato_id": campeonato_id}).status_code == 200
+    return campeonato_id
+
+
+@pytest.fixture
+def campeonato_en_juego(client):
+    return preparar_campeonato(client)
@@ -0,0 +1,96 @@
+"""
+Middleware de compresión: qué respuestas se comprimen, con qué codificación
+y cuáles se comprimen fuera del bucle de eventos.
+"""
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app import compresion
+from app.compresion import Compresion, elegir_codificacion
+
+GRANDE = "x" * 20_000
+PEQUENO = "x" * 2_000
+
+
+@pytest.fixture
+def cliente():
+    app = FastAPI()
+    app.add_middleware(Compresion, tamano_minimo=1024, tamano_hilo=10_000)
+
+    @app.get("/texto/{tamano}")
+    def texto(tamano: int):
+        return PlainTextResponse("x" * tamano)
+
+    @app.get("/flujo")
+    def flujo():
+        return StreamingResponse(iter([GRANDE, GRANDE]), media_type="text/plain")
+
+    return TestClient(app)
+
+
+@pytest.fixture
+def hilos(monkeypatch):
+    """Cuerpos que se comprimen en el pool de hilos"""
+    enviados = []
+    original = compresion.run_in_threadpool
+
+    async def espiar(funcion, cuerpo, *args):
+        enviados.append(len(cuerpo))
+        return await original(funcion, cuerpo, *args)
+
+    monkeypatch.setattr(compresion, "run_in_threadpool", espiar)
+    return enviados
+
+
+@pytest.mark.parametrize("cabecera, esperada", [
+    ("gzip, deflate", "gzip"),
+    ("br;q=1.0, gzip;q=0.8", "br"),
+    ("br;q=0, gzip", "gzip"),
+    ("*", "gzip"),
+    ("identity", None),
+    ("", None),
+])
+def test_elegir_codificacion(cabecera, esperada):
+    if esperada == "br" and compresion.brotli is None:
+        esperada = "gzip"
+    assert elegir_codificacion(cabecera) == esperada
+
+
+def test_comprime_en_un_hilo_los_cuerpos_grandes(cliente, hilos):
+    respuesta = cliente.get(f"/texto/{len(GRANDE)}", headers={"Accept-Encoding": "gzip"})
+    assert respuesta.headers["content-encoding"] == "gzip"
+    assert respuesta.headers["vary"] == "Accept-Encoding"
+    assert int(respuesta.headers["content-length"]) < len(GRANDE)
+    assert respuesta.text == GRANDE
+    assert hilos == [len(GRANDE)]
+
+
+def test_comprime_en_linea_los_cuerpos_medianos(cliente, hilos):
+    respuesta = cliente.get(f"/texto/{len(PEQUENO)}", headers={"Accept-Encoding": "gzip"})
+    assert respuesta.headers["content-encoding"] == "gzip"
+    assert respuesta.text == PEQUENO
+    assert hilos == []
+
+
+def test_brotli(cliente):
+    if compresion.brotli is None:
+        pytest.skip("brotli no está instalado")
+    respuesta = cliente.get(f"/texto/{len(GRANDE)}", headers={"Accept-Encoding": "br"})
+    assert respuesta.headers["content-encoding"] == "br"
+    assert respuesta.text == GRANDE
+
+
+def test_no_comprime_cuerpos_pequenos_ni_flujos(cliente, hilos):
+    respuesta = cliente.get("/texto/100", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in respuesta.headers
+    assert respuesta.headers["vary"] == "Accept-Encoding"
+
+    respuesta = cliente.get("/flujo", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in respuesta.headers
+    assert respuesta.text == GRANDE * 2
+
+    respuesta = cliente.get(f"/texto/{len(GRANDE)}", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in respuesta.headers
+    assert hilos == []
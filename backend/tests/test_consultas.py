@@ -0,0 +1,75 @@
+"""
+Presupuesto de consultas de las lecturas más frecuentes. Los límites no
+dependen del número de parejas: una consulta por pareja o por mesa (N+1)
+los supera en cuanto el campeonato crece. Incluyen la lectura del campeonato,
+que la caché no tiene todavía después de cada escritura.
+"""
+import pytest
+
+from app.database import maximo_consultas
+from conftest import jugar_partida, preparar_campeonato
+
+
+@pytest.fixture(params=[8, 30], ids=["8_parejas", "30_parejas"])
+def campeonato_id(client, request):
+    campeonato_id = preparar_campeonato(client, request.param)
+    jugar_partida(client, campeonato_id, 2)
+    return campeonato_id
+
+
+def test_mesas(client, campeonato_id):
+    with maximo_consultas(4):
+        respuesta = client.get("/mesas", params={"campeonato_id": campeonato_id, "partida": 2})
+    assert respuesta.status_code == 200
+    assert all(mesa["pareja1"]["nombre"] for mesa in respuesta.json())
+
+
+def test_parejas(client, campeonato_id):
+    with maximo_consultas(2):
+        respuesta = client.get("/parejas/", params={"campeonato_id": campeonato_id})
+    assert respuesta.status_code == 200
+    assert all(len(pareja["jugadores"]) == 2 for pareja in respuesta.json())
+
+
+def test_parejas_del_campeonato(client, campeonato_id):
+    with maximo_consultas(3):
+        respuesta = client.get(f"/campeonatos/{campeonato_id}/parejas")
+    assert respuesta.status_code == 200
+    assert all(len(pareja["jugadores"]) == 2 for pareja in respuesta.json())
+
+
+def test_ranking(client, campeonato_id):
+    with maximo_consultas(2):
+        respuesta = client.get("/resultados/ranking", params={"campeonato_id": campeonato_id})
+    assert respuesta.status_code == 200
+    assert [fila["posicion"] for fila in respuesta.json()] == list(range(1, len(respuesta.json()) + 1))
+
+
+def test_ranking_de_partida_cerrada(client, campeonato_id):
+    with maximo_consultas(3):
+        respuesta = client.get("/resultados/ranking", params={"campeonato_id": campeonato_id, "partida": 1})
+    assert respuesta.status_code == 200
+
+
+def test_dashboard(client, campeonato_id):
+    with maximo_consultas(7):
+        respuesta = client.get(f"/campeonatos/{campeonato_id}/dashboard")
+    assert respuesta.status_code == 200
+    assert respuesta.json()["estado_partida"]["completa"]
+
+
+def test_estado_partida(client, campeonato_id):
+    with maximo_consultas(2):
+        respuesta = client.get(f"/campeonatos/{campeonato_id}/partidas/2/estado")
+    assert respuesta.status_code == 200
+
+
+def test_ranking_sin_cambios_responde_304(client, campeonato_id):
+    etag = client.get("/resultados/ranking", params={"campeonato_id": campeonato_id}).headers["etag"]
+    with maximo_consultas(1):
+        respuesta = client.get(
+            "/resultados/ranking",
+            params={"campeonato_id": campeonato_id},
+            headers={"If-None-Match": etag}
+        )
+    assert respuesta.status_code == 304
@@ -0,0 +1,110 @@
+"""
+Emparejamiento del sistema suizo y del algoritmo de peso máximo en que se
+apoya, comparados con una búsqueda exhaustiva en casos pequeños.
+"""
+import itertools
+import random
+
+import pytest
+
+from app.services.emparejamiento import contar_repetidos, emparejar_suizo
+from app.services.emparejamiento_maximo import emparejamiento_peso_maximo
+
+
+def _emparejamientos(vertices):
+    """Todos los emparejamientos (no necesariamente perfectos) de los vértices"""
+    if not vertices:
+        yield []
+        return
+    primero, resto = vertices[0], vertices[1:]
+    yield from _emparejamientos(resto)
+    for k, otro in enumerate(resto):
+        for parcial in _emparejamientos(resto[:k] + resto[k + 1:]):
+            yield [(primero, otro)] + parcial
+
+
+def _perfectos(orden):
+    if not orden:
+        yield []
+        return
+    primero, resto = orden[0], orden[1:]
+    for k, otro in enumerate(resto):
+        for parcial in _perfectos(resto[:k] + resto[k + 1:]):
+            yield [(primero, otro)] + parcial
+
+
+def _historial(parejas, enfrentamientos):
+    rivales = {p: set() for p in parejas}
+    for p1, p2 in enfrentamientos:
+        rivales[p1].add(p2)
+        rivales[p2].add(p1)
+    return rivales
+
+
+@pytest.mark.parametrize("cardinalidad_maxima", [False, True])
+def test_peso_maximo_igual_que_busqueda_exhaustiva(cardinalidad_maxima):
+    aleatorio = random.Random(20)
+    for _ in range(300):
+        n = aleatorio.randint(2, 8)
+        aristas = [
+            (i, j, aleatorio.randint(-5, 20))
+            for i, j in itertools.combinations(range(n), 2)
+            if aleatorio.random() < 0.6
+        ]
+        if not aristas:
+            continue
+        pesos = {(i, j): peso for i, j, peso in aristas}
+
+        companero = emparejamiento_peso_maximo(aristas, cardinalidad_maxima)
+        elegidas = [(i, j) for i, j in enumerate(companero) if i < j]
+        assert all(companero[j] == i for i, j in elegidas)
+        assert all(par in pesos for par in elegidas)
+
+        def clave(emparejamiento):
+            peso = sum(pesos[par] for par in emparejamiento)
+            return (len(emparejamiento), peso) if cardinalidad_maxima else peso
+
+        validos = [
+            e for e in _emparejamientos(list(range(n)))
+            if all(par in pesos for par in e)
+        ]
+        assert clave(elegidas) == max(clave(e) for e in validos)
+
+
+def test_suizo_evita_repetir_cuando_las_consecutivas_ya_jugaron():
+    # 1-2 y 3-4 ya se enfrentaron: emparejar por orden repetiría las dos mesas
+    rivales = _historial(range(1, 7), [(1, 2), (3, 4)])
+    mesas = emparejar_suizo([[1, 2, 3, 4, 5, 6]], rivales, set())
+    assert contar_repetidos(mesas, rivales) == 0
+    assert sorted(p for mesa in mesas for p in mesa) == [1, 2, 3, 4, 5, 6]
+
+
+def test_suizo_repite_el_minimo_posible():
+    aleatorio = random.Random(7)
+    for _ in range(200):
+        parejas = list(range(1, 11))
+        # Historial denso: muchas veces no hay solución sin repeticiones
+        enfrentamientos = [
+            par for par in itertools.combinations(parejas, 2) if aleatorio.random() < 0.5
+        ]
+        rivales = _historial(parejas, enfrentamientos)
+        mesas = emparejar_suizo([parejas], rivales, set())
+
+        assert sorted(p for mesa in mesas for p in mesa) == parejas
+        minimo = min(contar_repetidos(e, rivales) for e in _perfectos(parejas))
+        assert contar_repetidos(mesas, rivales) == minimo
+
+
+def test_suizo_descansa_la_peor_que_no_haya_descansado():
+    parejas = [1, 2, 3, 4, 5]
+    mesas = emparejar_suizo([parejas], _historial(parejas, []), descansos={5})
+    assert (4, None) in mesas
+    assert sorted(p for mesa in mesas for p in mesa if p is not None) == parejas
+
+
+def test_suizo_baja_la_ultima_pareja_de_un_grupo_impar():
+    grupos = [[1, 2, 3], [4, 5, 6, 7, 8]]
+    mesas = emparejar_suizo(grupos, _historial(range(1, 9), []), set())
+    # El grupo A queda par al bajar la pareja 3 al grupo B
+    assert (1, 2) in mesas
+    assert (3, 4) in mesas
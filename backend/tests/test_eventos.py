@@ -0,0 +1,100 @@
+"""
+Eventos en tiempo real (SSE): reparto por campeonato, entrega solo después
+del commit y canal /eventos.
+"""
+import asyncio
+import json
+import time
+
+import pytest
+
+from app.routes.eventos import suscribir_eventos
+from app.services.eventos import (
+    Difusor, difusor, formatear_sse, PAREJA_ACTUALIZADA, RESULTADO_GUARDADO, SINCRONIZAR
+)
+from conftest import crear_campeonato, crear_parejas
+
+
+def _evento(tipo, campeonato_id, **datos):
+    return json.dumps({"t": tipo, "c": campeonato_id, **datos})
+
+
+def _recibidos(suscripcion, esperados, espera=2.0):
+    """Mensajes de la cola; los eventos llegan al event loop de la aplicación desde otro hilo"""
+    limite = time.monotonic() + espera
+    mensajes = []
+    while len(mensajes) < esperados and time.monotonic() < limite:
+        while not suscripcion.cola.empty():
+            mensajes.append(suscripcion.cola.get_nowait())
+        time.sleep(0.01)
+    return mensajes
+
+
+def test_reparte_por_campeonato():
+    local = Difusor()
+    del_1 = local.suscribir(1)
+    del_2 = local.suscribir(2)
+    todos = local.suscribir()
+
+    local.difundir(_evento(RESULTADO_GUARDADO, 1, mesa=3))
+    assert del_1.cola.get_nowait() == formatear_sse(RESULTADO_GUARDADO, {"c": 1, "mesa": 3})
+    assert todos.cola.qsize() == 1
+    assert del_2.cola.empty()
+
+
+def test_descarta_eventos_mal_formados():
+    local = Difusor()
+    suscripcion = local.suscribir()
+    local.difundir("no es json")
+    local.difundir(json.dumps({"c": 1}))
+    assert suscripcion.cola.empty()
+
+
+def test_cliente_lento_recibe_sincronizar():
+    local = Difusor()
+    suscripcion = local.suscribir()
+    for mesa in range(150):
+        local.difundir(_evento(RESULTADO_GUARDADO, 1, mesa=mesa))
+    # Al llenarse la cola se descartan los pendientes y se pide recargar todo
+    mensajes = [suscripcion.cola.get_nowait() for _ in range(suscripcion.cola.qsize())]
+    assert mensajes[0] == formatear_sse(SINCRONIZAR, {})
+    assert len(mensajes) < 100
+
+
+def test_las_escrituras_publican_despues_del_commit(client):
+    campeonato_id = crear_campeonato(client)
+    suscripcion = difusor.suscribir(campeonato_id)
+    try:
+        crear_parejas(client, campeonato_id, 1)
+        mensajes = _recibidos(suscripcion, 1)
+        assert len(mensajes) == 1
+        assert mensajes[0].startswith(f"event: {PAREJA_ACTUALIZADA}\n")
+
+        # Una escritura que falla no publica nada
+        respuesta = client.post("/parejas/", json={"nombre": "Sin campeonato", "campeonato_id": 999, "jugadores": []})
+        assert respuesta.status_code >= 400
+        assert _recibidos(suscripcion, 1, espera=0.2) == []
+    finally:
+        difusor.cancelar(suscripcion)
+
+
+@pytest.mark.asyncio
+async def test_canal_sse():
+    class Peticion:
+        async def is_disconnected(self):
+            return False
+
+    suscripciones = set(difusor.suscripciones)
+    respuesta = await suscribir_eventos(Peticion(), campeonato_id=7)
+    assert respuesta.media_type == "text/event-stream"
+    cuerpo = respuesta.body_iterator
+    assert await cuerpo.__anext__() == "retry: 2000\n\n"
+
+    difusor.difundir(_evento(RESULTADO_GUARDADO, 7, mesa=1))
+    difusor.difundir(_evento(RESULTADO_GUARDADO, 8, mesa=1))
+    mensaje = await asyncio.wait_for(cuerpo.__anext__(), timeout=1)
+    assert mensaje == formatear_sse(RESULTADO_GUARDADO, {"c": 7, "mesa": 1})
+
+    # Al cerrarse la conexión se cancela la suscripción
+    await cuerpo.aclose()
+    assert difusor.suscripciones == suscripciones
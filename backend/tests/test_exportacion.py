@@ -0,0 +1,72 @@
+"""
+Exportación en CSV o NDJSON (GET /campeonatos/{id}/export/...): las filas se
+escriben por lotes y tienen que coincidir con lo que devuelve la API.
+"""
+import csv
+import io
+import json
+
+import pytest
+
+from app.services import exportacion
+
+
+@pytest.fixture(autouse=True)
+def lotes_pequenos(monkeypatch):
+    # Varios lotes por descarga, para comprobar que se unen bien
+    monkeypatch.setattr(exportacion, "TAMANO_LOTE", 3)
+
+
+def _exportar(client, campeonato_id, que, **params):
+    respuesta = client.get(f"/campeonatos/{campeonato_id}/export/{que}", params=params)
+    assert respuesta.status_code == 200, respuesta.text
+    return respuesta
+
+
+def _csv(respuesta):
+    return list(csv.DictReader(io.StringIO(respuesta.text)))
+
+
+def _ndjson(respuesta):
+    return [json.loads(linea) for linea in respuesta.text.splitlines()]
+
+
+def test_resultados_csv(client, campeonato_en_juego):
+    respuesta = _exportar(client, campeonato_en_juego, "resultados")
+    assert respuesta.headers["content-type"].startswith("text/csv")
+    assert 'filename="campeonato_' in respuesta.headers["content-disposition"]
+    filas = _csv(respuesta)
+    assert len(filas) == 8
+    assert [(f["partida"], f["mesa"]) for f in filas] == sorted((f["partida"], f["mesa"]) for f in filas)
+    assert {f["pareja"] for f in filas} == {f"Pareja {i}" for i in range(1, 9)}
+
+
+def test_mesas_de_una_partida_o_de_todas(client, campeonato_en_juego):
+    todas = _ndjson(_exportar(client, campeonato_en_juego, "mesas", formato="ndjson"))
+    assert [(m["partida"], m["mesa"]) for m in todas] == [(p, n) for p in (1, 2) for n in range(1, 5)]
+
+    segunda = _ndjson(_exportar(client, campeonato_en_juego, "mesas", formato="ndjson", partida=2))
+    api = client.get("/mesas", params={"campeonato_id": campeonato_en_juego, "partida": 2}).json()
+    assert [(m["mesa"], m["pareja1_id"], m["pareja2_id"]) for m in segunda] == [
+        (m["id"], m["pareja1_id"], m["pareja2_id"]) for m in api
+    ]
+
+
+def test_clasificacion_igual_que_el_ranking(client, campeonato_en_juego):
+    filas = _ndjson(_exportar(client, campeonato_en_juego, "clasificacion", formato="ndjson"))
+    ranking = client.get("/resultados/ranking", params={"campeonato_id": campeonato_en_juego}).json()
+    # Las posiciones siguen la numeración a través de los lotes
+    assert [f["posicion"] for f in filas] == list(range(1, 9))
+    assert [(f["pareja_id"], f["pg"], f["pp"]) for f in filas] == [
+        (r["pareja_id"], r["pg"], r["pp"]) for r in ranking
+    ]
+
+    cerrada = _csv(_exportar(client, campeonato_en_juego, "clasificacion", partida=1))
+    assert [int(f["posicion"]) for f in cerrada] == list(range(1, 9))
+
+
+def test_errores(client, campeonato_en_juego):
+    base = f"/campeonatos/{campeonato_en_juego}/export"
+    assert client.get(f"{base}/resultados", params={"formato": "xml"}).status_code == 400
+    assert client.get(f"{base}/clasificacion", params={"partida": 3}).status_code == 404
+    assert client.get("/campeonatos/999/export/resultados").status_code == 404
@@ -0,0 +1,83 @@
+"""
+Importación de parejas desde CSV o XLSX (POST /parejas/import).
+"""
+import io
+
+import pytest
+
+from app.models import Jugador, Pareja
+from conftest import crear_campeonato, crear_parejas
+
+CABECERA = "nombre;club;jugador1_nombre;jugador1_apellido;jugador2_nombre;jugador2_apellido;activa"
+
+
+def _importar(client, campeonato_id, contenido, nombre="parejas.csv"):
+    return client.post(
+        "/parejas/import",
+        params={"campeonato_id": campeonato_id},
+        files={"archivo": (nombre, contenido)}
+    )
+
+
+def _csv(*filas):
+    return "\n".join([CABECERA, *filas]).encode("utf-8")
+
+
+def test_importa_csv_y_devuelve_los_errores(client, db):
+    campeonato_id = crear_campeonato(client)
+    contenido = _csv(
+        "Los Ases;Club A;Ana;Pérez;Luis;Gómez;si",
+        "Sin club;;Eva;Ruiz;Juan;Sanz;",
+        "Repetida;Club B;Ana;Pérez;Marta;Díaz;",
+        "Inactiva;Club C;Rosa;Vila;Pau;Mas;no",
+        "Mal activa;Club D;Iván;Gil;Sara;Roca;quizá",
+    )
+    respuesta = _importar(client, campeonato_id, contenido)
+    assert respuesta.status_code == 200, respuesta.text
+    cuerpo = respuesta.json()
+    assert cuerpo["creadas"] == 2
+    assert [e["fila"] for e in cuerpo["errores"]] == [3, 4, 6]
+
+    parejas = {p.nombre: p for p in db.query(Pareja).filter(Pareja.campeonato_id == campeonato_id)}
+    assert set(parejas) == {"Los Ases", "Inactiva"}
+    assert parejas["Los Ases"].activa and not parejas["Inactiva"].activa
+    jugadores = {(j.nombre, j.apellido) for j in parejas["Los Ases"].jugadores}
+    assert jugadores == {("Ana", "Pérez"), ("Luis", "Gómez")}
+
+
+def test_rechaza_jugadores_ya_inscritos(client, db):
+    campeonato_id = crear_campeonato(client)
+    crear_parejas(client, campeonato_id, 1)
+    inscrito = db.query(Jugador).filter(Jugador.campeonato_id == campeonato_id).first()
+
+    contenido = _csv(f"Nueva;Club;{inscrito.nombre};{inscrito.apellido};Otro;Jugador;")
+    cuerpo = _importar(client, campeonato_id, contenido).json()
+    assert cuerpo["creadas"] == 0
+    assert "Ya existe un jugador" in cuerpo["errores"][0]["detalle"]
+
+
+def test_importa_xlsx(client, db):
+    openpyxl = pytest.importorskip("openpyxl")
+    libro = openpyxl.Workbook()
+    hoja = libro.active
+    hoja.append(CABECERA.split(";"))
+    hoja.append(["Hoja", "Club", "Nuria", "Font", "Jordi", "Puig", None])
+    fichero = io.BytesIO()
+    libro.save(fichero)
+
+    campeonato_id = crear_campeonato(client)
+    respuesta = _importar(client, campeonato_id, fichero.getvalue(), "parejas.xlsx")
+    assert respuesta.json() == {"creadas": 1, "errores": []}
+    assert db.query(Pareja).filter(Pareja.nombre == "Hoja").one().activa
+
+
+def test_cabecera_incompleta(client):
+    campeonato_id = crear_campeonato(client)
+    respuesta = _importar(client, campeonato_id, b"nombre;club\nA;B\n")
+    assert respuesta.status_code == 400
+    assert "jugador1_nombre" in respuesta.json()["detail"]
+
+
+def test_no_importa_con_el_campeonato_iniciado(client, campeonato_en_juego):
+    respuesta = _importar(client, campeonato_en_juego, _csv("Tarde;Club;Ana;Pérez;Luis;Gómez;"))
+    assert respuesta.status_code == 400
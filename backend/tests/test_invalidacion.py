@@ -0,0 +1,118 @@
+"""
+Invalidación de la caché de campeonatos entre workers con el evento interno
+INVALIDAR_CACHE (LISTEN/NOTIFY en PostgreSQL).
+
+La prueba con PostgreSQL solo se ejecuta si PRUEBAS_POSTGRES_URL apunta a
+una base de datos; no necesita tablas.
+"""
+import asyncio
+import json
+import os
+import time
+
+import pytest
+from sqlalchemy import create_engine, text, update
+
+from app import database
+from app.models import Campeonato
+from app.services.eventos import (
+    CANAL_EVENTOS, INVALIDAR_CACHE, SINCRONIZAR,
+    Difusor, EscuchaNotificaciones, difusor, formatear_sse
+)
+from conftest import crear_campeonato
+
+URL_POSTGRES = os.getenv("PRUEBAS_POSTGRES_URL")
+
+
+def _aviso(campeonato_id):
+    return json.dumps({"t": INVALIDAR_CACHE, "c": campeonato_id})
+
+
+def test_el_aviso_va_a_las_caches_y_no_a_los_clientes():
+    local = Difusor()
+    suscripcion = local.suscribir()
+    recibidos = []
+
+    def falla(campeonato_id):
+        raise RuntimeError("caché rota")
+
+    local.al_invalidar(falla)
+    local.al_invalidar(recibidos.append)
+    local.difundir(_aviso(3))
+    local.difundir(_aviso(None))
+    # Un invalidador que falla no impide los demás
+    assert recibidos == [3, None]
+    assert suscripcion.cola.empty()
+
+
+def test_aviso_de_otro_worker(client, db):
+    campeonato_id = crear_campeonato(client)
+    assert client.get("/campeonatos/actual").json()["pm"] == 300
+
+    # Otro worker cambia el campeonato: la caché de este no se entera al hacer commit
+    db.execute(update(Campeonato).where(Campeonato.id == campeonato_id).values(pm=500))
+    db.commit()
+    assert client.get("/campeonatos/actual").json()["pm"] == 300
+
+    # El aviso llega por LISTEN al event loop; con INVALIDAR_CACHE solo toca la caché
+    difusor.difundir(_aviso(campeonato_id))
+    assert client.get("/campeonatos/actual").json()["pm"] == 500
+
+
+def test_cada_escritura_publica_un_aviso(client, monkeypatch):
+    campeonato_id = crear_campeonato(client)
+    recibidos = []
+    monkeypatch.setattr(difusor, "invalidadores", difusor.invalidadores + [recibidos.append])
+
+    respuesta = client.put(f"/campeonatos/{campeonato_id}", json={"pm": 400})
+    assert respuesta.status_code == 200, respuesta.text
+    # Se entrega en el event loop de la aplicación, después del commit
+    limite = time.monotonic() + 2
+    while not recibidos and time.monotonic() < limite:
+        time.sleep(0.01)
+    time.sleep(0.05)
+    assert recibidos == [campeonato_id]
+
+
+def test_al_reconectar_se_vacian_las_caches(monkeypatch):
+    local = Difusor()
+    suscripcion = local.suscribir()
+    recibidos = []
+    local.al_invalidar(recibidos.append)
+
+    escucha = EscuchaNotificaciones(local)
+    escucha.activa = True
+    monkeypatch.setattr(escucha, "_conectar", lambda: setattr(escucha, "conexion", object()))
+    escucha._reconectar()
+    # Los avisos enviados sin conexión se han perdido
+    assert recibidos == [None]
+    assert suscripcion.cola.get_nowait() == formatear_sse(SINCRONIZAR, {})
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not URL_POSTGRES, reason="PRUEBAS_POSTGRES_URL no definida")
+async def test_notify_entre_procesos(monkeypatch):
+    motor = create_engine(URL_POSTGRES)
+    monkeypatch.setattr(database, "engine", motor)
+    local = Difusor()
+    recibidos = []
+    local.al_invalidar(recibidos.append)
+    escucha = EscuchaNotificaciones(local)
+    await escucha.iniciar()
+    try:
+        # La transacción de otro worker: el aviso solo sale al hacer commit
+        with motor.begin() as conexion:
+            conexion.execute(
+                text("SELECT pg_notify(:canal, :payload)"),
+                {"canal": CANAL_EVENTOS, "payload": _aviso(5)}
+            )
+            await asyncio.sleep(0.1)
+            assert recibidos == []
+        for _ in range(200):
+            if recibidos:
+                break
+            await asyncio.sleep(0.01)
+        assert recibidos == [5]
+    finally:
+        await escucha.detener()
+        motor.dispose()
@@ -0,0 +1,31 @@
+"""
+Consulta de una mesa (GET /mesas/{numero}): las mesas de todas las partidas
+se conservan y el número solo es único dentro de cada partida.
+"""
+
+
+def _mesa(client, numero=1, **params):
+    return client.get(f"/mesas/{numero}", params=params)
+
+
+def test_mesa_de_una_partida(client, campeonato_en_juego):
+    anterior = _mesa(client, campeonato_id=campeonato_en_juego, partida=1)
+    actual = _mesa(client, campeonato_id=campeonato_en_juego, partida=2)
+    assert anterior.status_code == actual.status_code == 200
+    assert (anterior.json()["partida"], actual.json()["partida"]) == (1, 2)
+
+
+def test_por_defecto_campeonato_activo_y_partida_actual(client, campeonato_en_juego):
+    esperada = _mesa(client, campeonato_id=campeonato_en_juego, partida=2).json()
+    assert _mesa(client).json() == esperada
+    assert _mesa(client, campeonato_id=campeonato_en_juego).json() == esperada
+    assert _mesa(client, partida=1).json()["partida"] == 1
+
+
+def test_mesa_o_campeonato_inexistente(client, campeonato_en_juego):
+    assert _mesa(client, 99).status_code == 404
+    assert _mesa(client, campeonato_id=999).status_code == 404
+
+
+def test_sin_campeonato_activo(client):
+    assert _mesa(client).status_code == 404
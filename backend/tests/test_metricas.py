@@ -0,0 +1,70 @@
+"""
+Métricas por ruta en formato Prometheus (GET /metrics).
+"""
+import re
+
+import pytest
+
+from app.metricas import Histograma, LIMITES, registro
+
+
+@pytest.fixture
+def metricas(client):
+    registro.reiniciar()
+
+    def leer():
+        """Valor de cada serie, por nombre con etiquetas"""
+        respuesta = client.get("/metrics")
+        assert respuesta.status_code == 200
+        assert respuesta.headers["content-type"].startswith("text/plain; version=0.0.4")
+        valores = {}
+        for linea in respuesta.text.splitlines():
+            if linea and not linea.startswith("#"):
+                serie, valor = linea.rsplit(" ", 1)
+                valores[serie] = float(valor)
+        return valores
+    yield leer
+    registro.reiniciar()
+
+
+def _serie(nombre, metodo, ruta, **extra):
+    etiquetas = [f'metodo="{metodo}"', f'ruta="{ruta}"'] + [f'{k}="{v}"' for k, v in extra.items()]
+    return f"{nombre}{{{','.join(etiquetas)}}}"
+
+
+def test_agrupa_por_plantilla_de_ruta(client, campeonato_en_juego, metricas):
+    for numero in (1, 2, 3):
+        client.get(f"/mesas/{numero}", params={"campeonato_id": campeonato_en_juego, "partida": 1})
+    client.get("/mesas/99", params={"campeonato_id": campeonato_en_juego, "partida": 1})
+    client.get("/no/existe")
+
+    valores = metricas()
+    assert valores[_serie("domino_peticiones_total", "GET", "/mesas/{mesa_id}", estado="2xx")] == 3
+    assert valores[_serie("domino_peticiones_total", "GET", "/mesas/{mesa_id}", estado="4xx")] == 1
+    assert valores[_serie("domino_peticiones_total", "GET", "sin_ruta", estado="4xx")] == 1
+    assert not any(re.search(r'ruta="/mesas/\d', serie) for serie in valores)
+
+
+def test_duracion_consultas_y_en_curso(client, campeonato_en_juego, metricas):
+    client.get("/resultados/ranking", params={"campeonato_id": campeonato_en_juego})
+    client.get("/resultados/ranking", params={"campeonato_id": campeonato_en_juego})
+
+    valores = metricas()
+    ruta = ("GET", "/resultados/ranking")
+    assert valores[_serie("domino_peticion_duracion_segundos_count", *ruta)] == 2
+    assert valores[_serie("domino_peticion_duracion_segundos_bucket", *ruta, le="+Inf")] == 2
+    assert valores[_serie("domino_peticion_bd_segundos_count", *ruta)] == 2
+    assert valores[_serie("domino_peticion_consultas_total", *ruta)] > 0
+    assert valores[_serie("domino_peticiones_en_curso", *ruta)] == 0
+
+
+def test_histograma_acumulado():
+    histograma = Histograma()
+    for valor in (0.001, 0.02, 0.02, 30.0):
+        histograma.observar(valor)
+    assert histograma.total == 4
+    assert histograma.cubetas[0] == 1
+    assert histograma.cubetas[LIMITES.index(0.025)] == 2
+    # Los valores por encima del último límite solo cuentan en +Inf
+    assert sum(histograma.cubetas) == 3
+    assert histograma.suma == pytest.approx(30.041)
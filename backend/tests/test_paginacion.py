@@ -0,0 +1,76 @@
+"""
+Paginación por clave (`after`, `limit`) y selección de campos (`fields`) de
+los listados de parejas, mesas y resultados.
+"""
+import pytest
+
+from app.services.paginacion import CABECERA_SIGUIENTE
+
+
+def _listados(campeonato_id):
+    return {
+        "parejas": ("/parejas/", {"campeonato_id": campeonato_id}),
+        "mesas": ("/mesas", {"campeonato_id": campeonato_id, "partida": 1}),
+        "resultados": (f"/resultados/campeonato/{campeonato_id}", {}),
+    }
+
+
+def _recorrer(client, url, params, limit):
+    """Todas las páginas, siguiendo el cursor de cada respuesta"""
+    filas, paginas, after = [], 0, None
+    while True:
+        pagina = {**params, "limit": limit, **({"after": after} if after else {})}
+        respuesta = client.get(url, params=pagina)
+        assert respuesta.status_code == 200, respuesta.text
+        assert len(respuesta.json()) <= limit
+        filas += respuesta.json()
+        paginas += 1
+        after = respuesta.headers.get(CABECERA_SIGUIENTE)
+        if after is None:
+            return filas, paginas
+
+
+@pytest.mark.parametrize("listado", ["parejas", "mesas", "resultados"])
+def test_las_paginas_forman_el_listado_completo(client, campeonato_en_juego, listado):
+    url, params = _listados(campeonato_en_juego)[listado]
+    completo = client.get(url, params=params)
+    assert CABECERA_SIGUIENTE not in completo.headers
+
+    filas, paginas = _recorrer(client, url, params, limit=3)
+    assert filas == completo.json()
+    assert paginas == -(-len(filas) // 3)
+
+
+def test_orden_de_cada_listado(client, campeonato_en_juego):
+    listados = _listados(campeonato_en_juego)
+    parejas = client.get(listados["parejas"][0], params=listados["parejas"][1]).json()
+    assert [p["id"] for p in parejas] == sorted((p["id"] for p in parejas), reverse=True)
+    resultados = client.get(listados["resultados"][0]).json()
+    claves = [(r["partida"], r["pareja_id"]) for r in resultados]
+    assert claves == sorted(claves)
+
+
+def test_seleccion_de_campos(client, campeonato_en_juego):
+    listados = _listados(campeonato_en_juego)
+    url, params = listados["parejas"]
+    parejas = client.get(url, params={**params, "fields": "nombre,jugadores"}).json()
+    assert all(set(p) == {"nombre", "jugadores"} and len(p["jugadores"]) == 2 for p in parejas)
+
+    url, params = listados["mesas"]
+    mesas = client.get(url, params={**params, "fields": "id,pareja1"}).json()
+    assert all(set(m) == {"id", "pareja1"} and "jugadores" not in m["pareja1"] for m in mesas)
+
+    url, params = listados["resultados"]
+    resultados = client.get(url, params={"fields": "pareja_id,rt", "limit": 2}).json()
+    assert resultados and all(set(r) == {"pareja_id", "rt"} for r in resultados)
+
+
+@pytest.mark.parametrize("params", [
+    {"after": "x"},
+    {"after": "1:2"},
+    {"limit": 0},
+    {"fields": "nombre,inexistente"},
+])
+def test_parametros_no_validos(client, campeonato_en_juego, params):
+    url, base = _listados(campeonato_en_juego)["parejas"]
+    assert client.get(url, params={**base, **params}).status_code == 400
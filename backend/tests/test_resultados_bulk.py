@@ -0,0 +1,98 @@
+"""
+Envío en bloque de los resultados de una partida (POST /resultados/partida/{partida}/bulk).
+"""
+import pytest
+
+from app.database import maximo_consultas
+from app.models import Resultado
+from conftest import crear_campeonato, crear_parejas
+
+
+def _item(mesa, campeonato_id, partida=1, rt1=300, rt2=100, **cambios):
+    item = {
+        "resultado1": {
+            "pareja_id": mesa["pareja1_id"], "mesa_id": mesa["id"], "partida": partida,
+            "campeonato_id": campeonato_id, "rp": 0, "rt": rt1, "mg": 2
+        },
+        "resultado2": {
+            "pareja_id": mesa["pareja2_id"], "mesa_id": mesa["id"], "partida": partida,
+            "campeonato_id": campeonato_id, "rp": 0, "rt": rt2, "mg": 1
+        }
+    }
+    item["resultado2"].update(cambios)
+    return item
+
+
+def _enviar(client, campeonato_id, items, partida=1):
+    return client.post(f"/resultados/partida/{partida}/bulk", params={"campeonato_id": campeonato_id}, json=items)
+
+
+@pytest.fixture
+def partida_sorteada(client):
+    def preparar(parejas=8):
+        campeonato_id = crear_campeonato(client)
+        crear_parejas(client, campeonato_id, parejas)
+        assert client.post(f"/campeonatos/{campeonato_id}/cerrar-inscripcion").status_code == 200
+        mesas = client.get("/mesas", params={"campeonato_id": campeonato_id, "partida": 1}).json()
+        return campeonato_id, mesas
+    return preparar
+
+
+def _filas(db, campeonato_id):
+    db.expire_all()
+    return {
+        r.pareja_id: (r.rt, r.pp, r.pg, r.mg)
+        for r in db.query(Resultado).filter(Resultado.campeonato_id == campeonato_id)
+    }
+
+
+def test_guarda_las_mesas_validas_y_devuelve_los_errores(client, db, partida_sorteada):
+    campeonato_id, mesas = partida_sorteada()
+    otra = mesas[1]
+    items = [
+        _item(mesas[0], campeonato_id),
+        _item(otra, campeonato_id, pareja_id=mesas[2]["pareja2_id"]),  # parejas de otra mesa
+        _item({**mesas[2], "id": 99}, campeonato_id),                  # mesa inexistente
+        _item(mesas[3], campeonato_id, partida=2),                     # otra partida
+        _item(mesas[0], campeonato_id),                                # mesa repetida
+    ]
+    respuesta = _enviar(client, campeonato_id, items)
+    assert respuesta.status_code == 200, respuesta.text
+    cuerpo = respuesta.json()
+    assert cuerpo["creados"] == 1
+    assert [e["indice"] for e in cuerpo["errores"]] == [1, 2, 3, 4]
+
+    assert set(_filas(db, campeonato_id)) == {mesas[0]["pareja1_id"], mesas[0]["pareja2_id"]}
+    estado = client.get(f"/campeonatos/{campeonato_id}/partidas/1/estado").json()
+    assert estado["mesas_con_resultado"] == 1
+
+
+def test_no_sobrescribe_resultados_guardados(client, db, partida_sorteada):
+    campeonato_id, mesas = partida_sorteada()
+    assert _enviar(client, campeonato_id, [_item(mesas[0], campeonato_id)]).json()["creados"] == 1
+    antes = _filas(db, campeonato_id)
+
+    respuesta = _enviar(client, campeonato_id, [_item(mesas[0], campeonato_id, rt1=0, rt2=300)])
+    assert respuesta.json()["creados"] == 0
+    assert _filas(db, campeonato_id) == antes
+
+
+def test_calcula_lo_mismo_que_el_envio_por_mesa(client, db, partida_sorteada):
+    campeonato_id, mesas = partida_sorteada()
+    assert client.post("/resultados", json=_item(mesas[0], campeonato_id, rt1=250, rt2=180)).status_code == 200
+    assert _enviar(client, campeonato_id, [_item(mesas[1], campeonato_id, rt1=250, rt2=180)]).status_code == 200
+
+    filas = _filas(db, campeonato_id)
+    assert filas[mesas[0]["pareja1_id"]] == filas[mesas[1]["pareja1_id"]]
+    assert filas[mesas[0]["pareja2_id"]] == filas[mesas[1]["pareja2_id"]]
+
+
+def test_consultas_constantes(client, partida_sorteada):
+    campeonato_id, mesas = partida_sorteada(40)
+    with maximo_consultas(10):
+        respuesta = _enviar(client, campeonato_id, [_item(mesa, campeonato_id) for mesa in mesas])
+    assert respuesta.json() == {"creados": 20, "errores": []}
+
+
+def test_campeonato_inexistente(client):
+    assert _enviar(client, 999, []).status_code == 404
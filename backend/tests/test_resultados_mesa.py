@@ -0,0 +1,63 @@
+"""
+Resultados de una mesa (GET y PUT /resultados/mesa/{mesa_id}): el número de
+mesa solo es único dentro de la partida de cada campeonato.
+"""
+import pytest
+
+from app.models import Campeonato
+from conftest import crear_campeonato, crear_parejas, jugar_partida
+
+
+def _resultados(client, campeonato_id, mesa_id=1, partida=1):
+    respuesta = client.get(
+        f"/resultados/mesa/{mesa_id}", params={"campeonato_id": campeonato_id, "partida": partida}
+    )
+    assert respuesta.status_code == 200, respuesta.text
+    return {r["pareja_id"]: r["rt"] for r in respuesta.json()}
+
+
+@pytest.fixture
+def dos_campeonatos(client, db):
+    """Dos campeonatos con la partida 1 jugada; los dos tienen una mesa 1"""
+    ids = []
+    for nombre in ("Primero", "Segundo"):
+        # Solo puede haber un campeonato activo
+        db.query(Campeonato).update({"activo": False})
+        db.commit()
+        campeonato_id = crear_campeonato(client, nombre=nombre)
+        crear_parejas(client, campeonato_id, 4)
+        assert client.post(f"/campeonatos/{campeonato_id}/cerrar-inscripcion").status_code == 200
+        mesas = jugar_partida(client, campeonato_id, 1)
+        ids.append((campeonato_id, mesas[0]))
+    return ids
+
+
+def test_lee_solo_los_resultados_del_campeonato(client, dos_campeonatos):
+    (primero, mesa1), (segundo, mesa2) = dos_campeonatos
+    assert set(_resultados(client, primero)) == {mesa1["pareja1_id"], mesa1["pareja2_id"]}
+    assert set(_resultados(client, segundo)) == {mesa2["pareja1_id"], mesa2["pareja2_id"]}
+
+
+def test_corregir_una_mesa_no_toca_otro_campeonato(client, dos_campeonatos):
+    (primero, mesa1), (segundo, _) = dos_campeonatos
+    antes = _resultados(client, segundo)
+
+    datos = {
+        "resultado1": {
+            "pareja_id": mesa1["pareja1_id"], "mesa_id": 1, "partida": 1,
+            "campeonato_id": primero, "rp": 0, "rt": 100, "mg": 1
+        },
+        "resultado2": {
+            "pareja_id": mesa1["pareja2_id"], "mesa_id": 1, "partida": 1,
+            "campeonato_id": primero, "rp": 0, "rt": 300, "mg": 2
+        }
+    }
+    respuesta = client.put("/resultados/mesa/1", params={"campeonato_id": primero}, json=datos)
+    assert respuesta.status_code == 200, respuesta.text
+
+    assert _resultados(client, primero) == {mesa1["pareja1_id"]: 100, mesa1["pareja2_id"]: 300}
+    assert _resultados(client, segundo) == antes
+
+    # Los resultados tienen que ser del campeonato de la ruta
+    respuesta = client.put("/resultados/mesa/1", params={"campeonato_id": segundo}, json=datos)
+    assert respuesta.status_code == 400
@@ -0,0 +1,95 @@
+"""
+Subida de logos y plantillas: ficheros con el sha256 del contenido como
+nombre, límite de tamaño y variantes reducidas.
+"""
+import hashlib
+import importlib
+import io
+
+import pytest
+
+from app.services import subidas
+
+rutas_campeonato = importlib.import_module("app.routes.campeonato")
+rutas_plantilla = importlib.import_module("app.routes.plantilla")
+
+
+def _png(lado=400):
+    Image = pytest.importorskip("PIL.Image")
+    fichero = io.BytesIO()
+    Image.new("RGB", (lado, lado), "red").save(fichero, format="PNG")
+    return fichero.getvalue()
+
+
+@pytest.fixture
+def directorios(tmp_path, monkeypatch):
+    logos = tmp_path / "logos"
+    plantillas = tmp_path / "plantillas"
+    plantillas.mkdir()
+    monkeypatch.setattr(rutas_campeonato, "LOGO_DIR", logos)
+    monkeypatch.setattr(rutas_plantilla, "PLANTILLAS_DIR", plantillas)
+    monkeypatch.setattr(rutas_plantilla, "PLANTILLA_MESAS_ACTUAL", plantillas / "plantilla_mesas.actual")
+    return logos, plantillas
+
+
+def _subir_logo(client, contenido, nombre="logo.png", tipo="image/png"):
+    return client.post("/campeonatos/upload-logo", files={"file": (nombre, contenido, tipo)})
+
+
+def test_logo_con_nombre_por_contenido(client, directorios):
+    logos, _ = directorios
+    contenido = _png()
+    sha256 = hashlib.sha256(contenido).hexdigest()
+
+    primera = _subir_logo(client, contenido)
+    assert primera.status_code == 200, primera.text
+    cuerpo = primera.json()
+    assert cuerpo["sha256"] == sha256 and not cuerpo["duplicado"]
+    assert cuerpo["logo_path"] == f"/static/logos/{sha256}.png?v={sha256[:12]}"
+    assert (logos / f"{sha256}.png").read_bytes() == contenido
+
+    # La misma imagen con otro nombre reutiliza el fichero
+    segunda = _subir_logo(client, contenido, "otro.png").json()
+    assert segunda["duplicado"] and segunda["logo_path"] == cuerpo["logo_path"]
+    originales = [p.name for p in logos.iterdir() if "_" not in p.name]
+    assert originales == [f"{sha256}.png"]
+
+
+def test_variantes_reducidas(client, directorios):
+    logos, _ = directorios
+    contenido = _png(400)
+    sha256 = _subir_logo(client, contenido).json()["sha256"]
+    # Las tareas en segundo plano se ejecutan antes de que TestClient devuelva la respuesta
+    Image = pytest.importorskip("PIL.Image")
+    with Image.open(logos / f"{sha256}_miniatura.png") as miniatura:
+        assert max(miniatura.size) == subidas.VARIANTES["miniatura"]
+    # Las variantes mayores que el original lo dejan con su tamaño
+    with Image.open(logos / f"{sha256}_pantalla.png") as pantalla:
+        assert pantalla.size == (400, 400)
+
+
+def test_rechaza_ficheros_no_validos(client, directorios, monkeypatch):
+    logos, _ = directorios
+    assert _subir_logo(client, b"texto", "logo.txt", "text/plain").status_code == 400
+    assert _subir_logo(client, b"datos", "logo.exe", "image/png").status_code == 400
+    assert _subir_logo(client, b"").status_code == 400
+
+    monkeypatch.setattr(subidas, "TAMANO_MAXIMO", 1000)
+    monkeypatch.setattr(subidas, "TAMANO_BLOQUE", 256)
+    assert _subir_logo(client, b"x" * 1001).status_code == 413
+    # No quedan temporales de las subidas descartadas
+    assert not logos.exists() or list(logos.iterdir()) == []
+
+
+def test_plantilla_de_mesas_actual(client, directorios):
+    _, plantillas = directorios
+    assert client.get("/plantillas/mesas").status_code == 404
+
+    primera = client.post("/plantillas/mesas", files={"file": ("a.png", _png(300), "image/png")})
+    assert primera.status_code == 201, primera.text
+    assert client.get("/plantillas/mesas").json() == primera.json()
+
+    segunda = client.post("/plantillas/mesas", files={"file": ("b.png", _png(200), "image/png")}).json()
+    assert segunda["url"] != primera.json()["url"]
+    assert client.get("/plantillas/mesas").json() == segunda
+    assert set(segunda["variantes"]) == set(subidas.VARIANTES)
@@ -0,0 +1,165 @@
+"""
+Tablas que se mantienen junto con los resultados: contadores_partida,
+clasificaciones y rankings_partida. Después de cada operación tienen que
+coincidir con lo que se calcula desde las mesas y los resultados.
+"""
+from init_app import rellenar_tablas_derivadas
+
+from app import database
+from app.models import Clasificacion, ContadorPartida, RankingPartida
+from app.services.clasificacion import verificar_clasificacion
+from conftest import crear_campeonato, crear_parejas, jugar_partida
+
+
+def _estado(client, campeonato_id, partida):
+    respuesta = client.get(f"/campeonatos/{campeonato_id}/partidas/{partida}/estado")
+    assert respuesta.status_code == 200, respuesta.text
+    return respuesta.json()
+
+
+def _resultado_mesa(mesa, campeonato_id, partida, rt1=300, rt2=100):
+    return {
+        "resultado1": {
+            "pareja_id": mesa["pareja1_id"], "mesa_id": mesa["id"], "partida": partida,
+            "campeonato_id": campeonato_id, "rp": 0, "rt": rt1, "mg": 2
+        },
+        "resultado2": {
+            "pareja_id": mesa["pareja2_id"], "mesa_id": mesa["id"], "partida": partida,
+            "campeonato_id": campeonato_id, "rp": 0, "rt": rt2, "mg": 1
+        }
+    }
+
+
+def _partidas_guardadas(db, campeonato_id):
+    db.expire_all()
+    return sorted({
+        fila.partida for fila in db.query(RankingPartida.partida).filter(
+            RankingPartida.campeonato_id == campeonato_id
+        )
+    })
+
+
+def test_contador_de_mesas_con_resultado(client):
+    campeonato_id = crear_campeonato(client)
+    crear_parejas(client, campeonato_id, 8)
+    assert client.post(f"/campeonatos/{campeonato_id}/cerrar-inscripcion").status_code == 200
+    assert _estado(client, campeonato_id, 1) == {
+        "partida": 1, "mesas": 4, "mesas_con_resultado": 0, "completa": False
+    }
+
+    mesas = client.get("/mesas", params={"campeonato_id": campeonato_id, "partida": 1}).json()
+    assert client.post("/resultados", json=_resultado_mesa(mesas[0], campeonato_id, 1)).status_code == 200
+    assert _estado(client, campeonato_id, 1)["mesas_con_resultado"] == 1
+
+    # Corregir el resultado de una mesa no la cuenta dos veces
+    respuesta = client.put(
+        f"/resultados/mesa/{mesas[0]['id']}",
+        params={"campeonato_id": campeonato_id},
+        json=_resultado_mesa(mesas[0], campeonato_id, 1, 150, 250)
+    )
+    assert respuesta.status_code == 200, respuesta.text
+    assert _estado(client, campeonato_id, 1)["mesas_con_resultado"] == 1
+
+    jugar_partida(client, campeonato_id, 1)
+    assert _estado(client, campeonato_id, 1)["completa"]
+
+
+def test_contadores_al_avanzar_retroceder_y_borrar_mesas(client, campeonato_en_juego, db):
+    campeonato_id = campeonato_en_juego
+    assert _estado(client, campeonato_id, 2) == {
+        "partida": 2, "mesas": 4, "mesas_con_resultado": 0, "completa": False
+    }
+
+    assert client.post(f"/campeonatos/{campeonato_id}/retroceder-partida").status_code == 200
+    assert _estado(client, campeonato_id, 2)["mesas"] == 0
+    assert _estado(client, campeonato_id, 1)["completa"]
+
+    assert client.delete(f"/mesas/campeonato/{campeonato_id}").status_code == 200
+    assert _estado(client, campeonato_id, 1)["mesas"] == 0
+    assert db.query(ContadorPartida).filter(ContadorPartida.campeonato_id == campeonato_id).count() == 0
+
+
+def test_clasificacion_coincide_con_los_resultados(client, campeonato_en_juego, db):
+    campeonato_id = campeonato_en_juego
+    jugar_partida(client, campeonato_id, 2, puntos=lambda mesa: (120, 280))
+    assert verificar_clasificacion(db, campeonato_id) == []
+
+    ranking = client.get("/resultados/ranking", params={"campeonato_id": campeonato_id}).json()
+    assert {fila["partidas_jugadas"] for fila in ranking} == {2}
+
+
+def test_ranking_guardado_de_cada_partida_cerrada(client, campeonato_en_juego, db):
+    campeonato_id = campeonato_en_juego
+    assert _partidas_guardadas(db, campeonato_id) == [1]
+
+    jugar_partida(client, campeonato_id, 2)
+    vivo = client.get("/resultados/ranking", params={"campeonato_id": campeonato_id}).json()
+    assert client.post("/mesas/ranking", params={"campeonato_id": campeonato_id}).status_code == 200
+    assert _partidas_guardadas(db, campeonato_id) == [1, 2]
+
+    guardado = client.get("/resultados/ranking", params={"campeonato_id": campeonato_id, "partida": 2}).json()
+    assert [(f["pareja_id"], f["pg"], f["pp"]) for f in guardado] == [(f["pareja_id"], f["pg"], f["pp"]) for f in vivo]
+
+    # Al volver a la partida 2, la clasificación de esa partida deja de estar cerrada
+    assert client.post(f"/campeonatos/{campeonato_id}/retroceder-partida").status_code == 200
+    assert _partidas_guardadas(db, campeonato_id) == [1]
+
+
+def test_corregir_una_partida_cerrada_no_cambia_su_ranking_guardado(client, campeonato_en_juego):
+    campeonato_id = campeonato_en_juego
+    guardado = client.get("/resultados/ranking", params={"campeonato_id": campeonato_id, "partida": 1}).json()
+    mesa = client.get("/mesas", params={"campeonato_id": campeonato_id, "partida": 1}).json()[0]
+
+    # Se intercambian los puntos de las dos parejas
+    respuesta = client.put(
+        f"/resultados/mesa/{mesa['id']}",
+        params={"campeonato_id": campeonato_id},
+        json=_resultado_mesa(mesa, campeonato_id, 1, 100, 300)
+    )
+    assert respuesta.status_code == 200, respuesta.text
+
+    assert client.get(
+        "/resultados/ranking", params={"campeonato_id": campeonato_id, "partida": 1}
+    ).json() == guardado
+    vivo = {f["pareja_id"]: f["rt"] for f in client.get("/resultados/ranking", params={"campeonato_id": campeonato_id}).json()}
+    assert (vivo[mesa["pareja1_id"]], vivo[mesa["pareja2_id"]]) == (100, 300)
+
+
+def test_reiniciar_deja_el_ranking_a_cero(client, campeonato_en_juego, db):
+    campeonato_id = campeonato_en_juego
+    antes = client.get("/resultados/ranking", params={"campeonato_id": campeonato_id}).json()
+    assert sorted(fila["pg"] for fila in antes) == [0, 0, 0, 0, 1, 1, 1, 1]
+
+    # Los resultados y las mesas se conservan, pero la partida actual vuelve a 0
+    assert client.put(f"/campeonatos/{campeonato_id}/reiniciar").status_code == 200
+    despues = client.get("/resultados/ranking", params={"campeonato_id": campeonato_id}).json()
+    assert [(f["pg"], f["pp"], f["rt"], f["partidas_jugadas"]) for f in despues] == [(0, 0, 0, 0)] * 8
+    assert _partidas_guardadas(db, campeonato_id) == []
+    db.expire_all()
+    assert verificar_clasificacion(db, campeonato_id) == []
+
+
+def test_borrar_mesas_deja_el_ranking_a_cero(client, campeonato_en_juego):
+    campeonato_id = campeonato_en_juego
+    assert client.delete(f"/mesas/campeonato/{campeonato_id}").status_code == 200
+    assert client.put(f"/campeonatos/{campeonato_id}/reiniciar").status_code == 200
+    ranking = client.get("/resultados/ranking", params={"campeonato_id": campeonato_id}).json()
+    assert {(f["pg"], f["rt"], f["partidas_jugadas"]) for f in ranking} == {(0, 0, 0)}
+
+
+def test_init_app_rellena_las_tablas_de_campeonatos_existentes(client, campeonato_en_juego, db):
+    campeonato_id = campeonato_en_juego
+    ranking = client.get("/resultados/ranking", params={"campeonato_id": campeonato_id, "partida": 1}).json()
+
+    # Campeonato anterior a las tablas derivadas
+    db.query(RankingPartida).filter(RankingPartida.campeonato_id == campeonato_id).delete()
+    db.query(Clasificacion).filter(Clasificacion.campeonato_id == campeonato_id).delete()
+    db.commit()
+
+    rellenar_tablas_derivadas(database.engine)
+    db.expire_all()
+    assert verificar_clasificacion(db, campeonato_id) == []
+    assert _partidas_guardadas(db, campeonato_id) == [1]
+    assert client.get(
+        "/resultados/ranking", params={"campeonato_id": campeonato_id, "partida": 1}
+    ).json() == ranking
@@ -0,0 +1,43 @@
+"""
+Versión de datos de cada campeonato y ETag de las lecturas que dependen de ella.
+"""
+from app.models import Campeonato
+from conftest import crear_campeonato, crear_parejas, jugar_partida
+
+
+def _ranking(client, campeonato_id, etag=None):
+    return client.get(
+        "/resultados/ranking",
+        params={"campeonato_id": campeonato_id},
+        headers={"If-None-Match": etag} if etag else {}
+    )
+
+
+def test_version_inicial_fija(client, db):
+    primero = crear_campeonato(client, nombre="Primero")
+    # Solo puede haber un campeonato activo
+    db.query(Campeonato).update({"activo": False})
+    db.commit()
+    segundo = crear_campeonato(client, nombre="Segundo")
+    versiones = {c.id: c.version for c in db.query(Campeonato)}
+    assert versiones == {primero: 0, segundo: 0}
+
+
+def test_cada_escritura_cambia_la_version(client, db):
+    campeonato_id = crear_campeonato(client)
+    crear_parejas(client, campeonato_id, 4)
+    antes = db.get(Campeonato, campeonato_id).version
+    assert client.post(f"/campeonatos/{campeonato_id}/cerrar-inscripcion").status_code == 200
+    db.expire_all()
+    assert db.get(Campeonato, campeonato_id).version == antes + 1
+
+
+def test_etag_del_ranking(client, campeonato_en_juego):
+    respuesta = _ranking(client, campeonato_en_juego)
+    etag = respuesta.headers["etag"]
+    assert _ranking(client, campeonato_en_juego, etag).status_code == 304
+
+    jugar_partida(client, campeonato_en_juego, 2)
+    respuesta = _ranking(client, campeonato_en_juego, etag)
+    assert respuesta.status_code == 200
+    assert respuesta.headers["etag"] != etag
@@ -26,6 +26,17 @@ api.interceptors.response.use(
   }
 );
 
+// URL de una variante reducida ('miniatura', 'pantalla' o 'impresion') de una
+// imagen subida al servidor. Mientras no se ha generado, el servidor devuelve
+// la imagen original.
+export function urlVariante(url, variante) {
+  if (!url || !url.includes('/static/')) return url;
+  const [ruta, consulta] = url.split('?');
+  const punto = ruta.lastIndexOf('.');
+  if (punto <= ruta.lastIndexOf('/')) return url;
+  return `${ruta.slice(0, punto)}_${variante}${ruta.slice(punto)}${consulta ? `?${consulta}` : ''}`;
+}
+
 // Servicio para gestión de archivos y uploads
 export const fileService = {
   async uploadLogo(file) {
@@ -38,10 +49,10 @@ export const fileService = {
         throw new Error('El archivo debe ser una imagen (jpg, png, gif, etc.)');
       }
       
-      // Verificar tamaño máximo (5MB)
-      if (file.size > 5 * 1024 * 1024) {
+      // Verificar tamaño máximo (10MB, el límite del servidor)
+      if (file.size > 10 * 1024 * 1024) {
         console.error('El archivo es demasiado grande:', file.size);
-        throw new Error('El archivo no debe superar los 5MB');
+        throw new Error('El archivo no debe superar los 10MB');
       }
       
       const formData = new FormData();
@@ -177,6 +188,19 @@ export const campeonatoService = {
     }
   },
 
+  // Campeonato, mesas y resultados de la partida actual, ranking y estado de
+  // la partida leídos de la misma versión de los datos
+  async obtenerDashboard(id) {
+    const response = await api.get(`/campeonatos/${id}/dashboard`);
+    return response.data;
+  },
+
+  // Mesas de la partida y cuántas tienen resultado, sin leer los resultados
+  async obtenerEstadoPartida(id, partida) {
+    const response = await api.get(`/campeonatos/${id}/partidas/${partida}/estado`);
+    return response.data;
+  },
+
   async obtenerDetalles() {
     const response = await api.get('/resultados/ranking');
     return response.data;
@@ -219,8 +243,9 @@ export const campeonatoService = {
 };
 
 export const parejaService = {
-  async obtenerParejas(campeonatoId) {
-    const response = await api.get(`/campeonatos/${campeonatoId}/parejas`);
+  // params admite after, limit y fields (paginación y selección de campos)
+  async obtenerParejas(campeonatoId, params = {}) {
+    const response = await api.get(`/campeonatos/${campeonatoId}/parejas`, { params });
     return response.data;
   },
 
@@ -234,6 +259,17 @@ export const parejaService = {
     return response.data;
   },
 
+  async importar(campeonatoId, archivo) {
+    const formData = new FormData();
+    formData.append('archivo', archivo);
+    const response = await api.post('/parejas/import', formData, {
+      params: { campeonato_id: campeonatoId },
+      headers: { 'Content-Type': 'multipart/form-data' },
+      timeout: 60000
+    });
+    return response.data;
+  },
+
   async actualizar(id, data) {
     const response = await api.put(`/parejas/${id}`, data);
     return response.data;
@@ -251,9 +287,10 @@ export const parejaService = {
 };
 
 export const mesaService = {
-  async obtenerMesas(campeonatoId, partida) {
+  async obtenerMesas(campeonatoId, partida, params = {}) {
     const response = await api.get(`/mesas`, {
       params: {
+        ...params,
         campeonato_id: campeonatoId,
         partida: partida
       }
@@ -266,8 +303,10 @@ export const mesaService = {
     return response.data;
   },
 
-  async obtenerMesa(id) {
-    const response = await api.get(`/mesas/${id}`);
+  async obtenerMesa(campeonatoId, partida, numero) {
+    const response = await api.get(`/mesas/${numero}`, {
+      params: { campeonato_id: campeonatoId, partida }
+    });
     return response.data;
   },
 
@@ -293,24 +332,41 @@ export const resultadoService = {
     }
   },
 
-  async obtenerPorMesa(mesaId, partida) {
-    const response = await api.get(`/resultados/mesa/${mesaId}?partida=${partida}`);
+  /**
+   * Guarda los resultados de varias mesas de una partida en una sola petición
+   * @param {number} campeonatoId - ID del campeonato
+   * @param {number} partida - Número de partida
+   * @param {Array<{resultado1: Object, resultado2: Object|null}>} mesas - Resultados por mesa
+   * @returns {Promise<{creados: number, errores: Array}>} - Mesas guardadas y errores por mesa
+   */
+  async crearResultadosPartida(campeonatoId, partida, mesas) {
+    const response = await api.post(`/resultados/partida/${partida}/bulk?campeonato_id=${campeonatoId}`, mesas);
+    return response.data;
+  },
+
+  async obtenerPorMesa(campeonatoId, mesaId, partida) {
+    // El número de mesa solo es único dentro de la partida de cada campeonato
+    const response = await api.get(`/resultados/mesa/${mesaId}`, {
+      params: { campeonato_id: campeonatoId, partida }
+    });
     return response.data;
   },
 
-  async obtenerResultadosCampeonato(campeonatoId) {
-    const response = await api.get(`/resultados/campeonato/${campeonatoId}`);
+  async obtenerResultadosCampeonato(campeonatoId, params = {}) {
+    const response = await api.get(`/resultados/campeonato/${campeonatoId}`, { params });
     return response.data;
   },
 
-  async obtenerRanking(campeonatoId) {
+  async obtenerRanking(campeonatoId, partida = null) {
     if (!campeonatoId) {
       console.error('Error: campeonatoId es requerido');
       throw new Error('ID de campeonato es requerido');
     }
     
     try {
-      const response = await api.get(`/resultados/ranking?campeonato_id=${campeonatoId}`);
+      // Con partida se obtiene la clasificación guardada al cerrar esa partida
+      const params = partida ? { campeonato_id: campeonatoId, partida } : { campeonato_id: campeonatoId };
+      const response = await api.get('/resultados/ranking', { params });
       return response.data;
     } catch (error) {
       console.error('Error en obtenerRanking:', error);
@@ -333,12 +389,12 @@ export const resultadoService = {
     return response.data;
   },
 
-  async actualizarPorMesa(mesaId, resultado1, resultado2 = null) {
+  async actualizarPorMesa(campeonatoId, mesaId, resultado1, resultado2 = null) {
     const data = {
       resultado1: resultado1,
       resultado2: resultado2
     };
-    const response = await api.put(`/resultados/mesa/${mesaId}`, data);
+    const response = await api.put(`/resultados/mesa/${mesaId}?campeonato_id=${campeonatoId}`, data);
     return response.data;
   },
 
@@ -0,0 +1,96 @@
+import { api } from './api';
+
+// Tipos de evento enviados por el backend en /eventos
+export const EVENTOS = {
+  RESULTADO_GUARDADO: 'resultado_guardado',
+  PARTIDA_CREADA: 'partida_creada',
+  PAREJA_ACTUALIZADA: 'pareja_actualizada',
+  RANKING_ACTUALIZADO: 'ranking_actualizado',
+  CAMPEONATO_ACTUALIZADO: 'campeonato_actualizado',
+  // El cliente ha podido perder eventos y debe recargar todo
+  SINCRONIZAR: 'sincronizar'
+};
+
+// Un mismo cambio genera varios eventos seguidos (p. ej. resultado y ranking):
+// se agrupan para que cada suscriptor recargue una sola vez
+const AGRUPAR_MS = 150;
+
+// Una única conexión EventSource compartida por todos los componentes
+let eventSource = null;
+let conectadoAntes = false;
+const suscriptores = new Set();
+
+const notificar = (tipo, datos) => {
+  suscriptores.forEach((suscriptor) => {
+    if (!suscriptor.tipos.includes(tipo) || suscriptor.pendiente) return;
+
+    suscriptor.pendiente = setTimeout(() => {
+      suscriptor.pendiente = null;
+      try {
+        suscriptor.callback(tipo, datos);
+      } catch (error) {
+        console.error(`Error al procesar el evento ${tipo}:`, error);
+      }
+    }, AGRUPAR_MS);
+  });
+};
+
+const conectar = () => {
+  if (eventSource) return;
+
+  eventSource = new EventSource(`${api.defaults.baseURL}/eventos`);
+
+  Object.values(EVENTOS).forEach(tipo => {
+    eventSource.addEventListener(tipo, (e) => {
+      let datos = {};
+      try {
+        datos = JSON.parse(e.data);
+      } catch (error) {
+        console.error('Evento con datos no válidos:', e.data);
+      }
+      notificar(tipo, datos);
+    });
+  });
+
+  eventSource.onopen = () => {
+    // Tras una reconexión se han podido perder eventos: recargar todo
+    if (conectadoAntes) {
+      notificar(EVENTOS.SINCRONIZAR, {});
+    }
+    conectadoAntes = true;
+  };
+
+  eventSource.onerror = () => {
+    // EventSource reintenta la conexión automáticamente
+    console.warn('Conexión de eventos interrumpida, reintentando...');
+  };
+};
+
+const desconectar = () => {
+  if (eventSource) {
+    eventSource.close();
+    eventSource = null;
+    conectadoAntes = false;
+  }
+};
+
+/**
+ * Suscribe un callback a uno o varios tipos de evento.
+ * SINCRONIZAR se incluye siempre para recargar tras una reconexión.
+ * @param {string[]} tipos - Tipos de evento (ver EVENTOS)
+ * @param {Function} callback - Recibe (tipo, datos)
+ * @returns {Function} - Cancela la suscripción
+ */
+export const suscribirEventos = (tipos, callback) => {
+  const suscriptor = { tipos: [...tipos, EVENTOS.SINCRONIZAR], callback, pendiente: null };
+  suscriptores.add(suscriptor);
+  conectar();
+
+  return () => {
+    clearTimeout(suscriptor.pendiente);
+    suscriptores.delete(suscriptor);
+    if (suscriptores.size === 0) {
+      desconectar();
+    }
+  };
+};
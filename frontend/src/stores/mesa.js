@@ -24,7 +24,7 @@ export const useMesaStore = defineStore('mesa', () => {
             // Obtener los resultados para cada mesa
             const mesasConResultados = await Promise.all(mesasData.map(async mesa => {
                 try {
-                    const resultados = await resultadoService.obtenerPorMesa(mesa.id, partida);
+                    const resultados = await resultadoService.obtenerPorMesa(campeonatoId, mesa.id, partida);
                     return {
                         ...mesa,
                         tiene_resultado: resultados && resultados.length > 0,
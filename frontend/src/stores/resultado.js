@@ -40,7 +40,7 @@ export const useResultadoStore = defineStore('resultado', () => {
         loading.value = true;
         error.value = null;
         try {
-            const response = await resultadoService.actualizarPorMesa(mesaId, resultado1, resultado2);
+            const response = await resultadoService.actualizarPorMesa(resultado1.campeonato_id, mesaId, resultado1, resultado2);
             await obtenerRanking(resultado1.campeonato_id);
             return response;
         } catch (e) {
@@ -114,11 +114,11 @@ export const useResultadoStore = defineStore('resultado', () => {
         return obtenerRanking(campeonatoId);
     };
 
-    const obtenerResultadosPorMesa = async (mesaId, partida) => {
+    const obtenerResultadosPorMesa = async (campeonatoId, mesaId, partida) => {
         loading.value = true;
         error.value = null;
         try {
-            const response = await resultadoService.obtenerPorMesa(mesaId, partida);
+            const response = await resultadoService.obtenerPorMesa(campeonatoId, mesaId, partida);
             return response;
         } catch (e) {
             console.error('Error al obtener resultados de mesa:', e);
@@ -30,9 +30,17 @@ if [ $COUNT -eq $MAX_RETRIES ]; then
     exit 1
 fi
 
-# Iniciar el backend
-echo "🚀 Iniciando el backend..."
-cd /app/backend && uvicorn app.main:app --host 0.0.0.0 --port 8000 &
+# Preparar tablas y migraciones una sola vez, antes de arrancar los workers
+echo "🔧 Preparando el esquema de la base de datos..."
+cd /app/backend && python init_app.py
+if [ $? -ne 0 ]; then
+    echo "❌ Error: No se pudo preparar el esquema de la base de datos"
+    exit 1
+fi
+
+# Iniciar el backend (WEB_CONCURRENCY workers)
+echo "🚀 Iniciando el backend con ${WEB_CONCURRENCY:-1} workers..."
+cd /app/backend && uvicorn app.main:app --host 0.0.0.0 --port 8000 --workers ${WEB_CONCURRENCY:-1} &
 BACKEND_PID=$!
 
 # Esperar a que el backend esté listo